@@ -37,6 +37,9 @@ from config.base_config import *
 from config.loguru_config import init_log_config
 from framework.api_model import QueryResponse
 from models.vectordatabase.v_client import get_instance_client
+from models.embeddings.embedding_cache import get_embedding_cache
+from models.vectordatabase.search_cache import get_search_cache
+from models.vectordatabase.namespace_snapshot import SNAPSHOT_FORMATS, SNAPSHOT_FORMAT_PARQUET
 from custom.amway.sft.service.sft_data_service import SftDataService
 from service.tablespace_data_schedule import reload_online_count_predict
 
@@ -88,10 +91,12 @@ async def redoc_html():
 async def start_scheduler():
     """
     1.日志框架初始化配置
-    2.定时任务初始化配置
+    2.向量库客户端初始化配置
+    3.定时任务初始化配置
     :return:
     """
     init_log_config()
+    get_instance_client().init_client()
     if SCHEDULES_ENABLED:
         scheduler.add_job(reload_namespace_file, 'interval', seconds=SCHEDULES_RATE_SECOND)
     if OCP_SCHEDULES_ENABLED:
@@ -103,11 +108,12 @@ async def start_scheduler():
 @app.on_event('shutdown')
 async def stop_scheduler():
     """
-    定时任务回收化配置
+    定时任务及向量库客户端回收化配置
     :return:
     """
     if SCHEDULES_ENABLED:
         scheduler.shutdown()
+    get_instance_client().close_client()
 
 
 @app.get('/')
@@ -197,6 +203,8 @@ async def api_upload_file(
             remark="python",
             vector_ids=ids
         )
+        # 向量化去重统计
+        response.data = localRepositoryDomain.dedup_stats
     except BusinessException as business_err:
         logger.error("###API###api_upload_file error, requestId={}, err={}.", request_id, business_err)
         response.message = business_err.message
@@ -673,6 +681,124 @@ def api_get_namespace_info(
     return response
 
 
+@app.post(
+    path="/namespace/{namespace_id}/clone",
+    tags=["Namespace:知识库模块"],
+    summary="复制知识库(不重新向量化)",
+    response_model=QueryResponse,
+    response_description="返回体对象[status:结果状态(0成功), message:错误信息, data:业务数据]",
+)
+def api_clone_namespace(
+        namespace_id: str,
+        namespace: str = None,
+        name: str = None,
+        user_id: str = None,
+) -> QueryResponse:
+    """
+    复制知识库: 向量数据及所属文件信息复制至新知识库, 无需重新上传文件\n
+    :param namespace_id: 源知识库标识\n
+    :param namespace: 新知识库空间, 为空时自动生成\n
+    :param name: 新知识库名称, 为空时自动生成\n
+    :param user_id: 新知识库专属用户, 为空时与源知识库一致\n
+    :return: 新知识库详情
+    """
+    response = QueryResponse()
+    request_id = str(uuid.uuid4())
+    try:
+        new_namespace_id = LocalRepositoryDomain(request_id=request_id).clone(
+            namespace_id=namespace_id,
+            namespace=namespace,
+            name=name,
+            user_id=user_id,
+        )
+        response.data = NamespaceDomain(request_id=request_id).find_by_id(namespace_id=new_namespace_id)
+    except BusinessException as business_err:
+        logger.error("###API###api_clone_namespace error, requestId={}, err={}.", request_id, business_err)
+        response.message = business_err.message
+        response.status = business_err.code
+    except Exception as err:
+        logger.error("###API###api_clone_namespace error, requestId={}, err={}.", request_id, err)
+        response.message = str(err)
+        response.status = -1
+    return response
+
+
+@app.post(
+    path="/namespace/{namespace_id}/snapshot",
+    tags=["Namespace:知识库模块"],
+    summary="导出知识库快照(Parquet/Arrow IPC)",
+    response_model=QueryResponse,
+    response_description="返回体对象[status:结果状态(0成功), message:错误信息, data:业务数据]",
+)
+def api_export_namespace_snapshot(
+        namespace_id: str,
+        file_format: str = SNAPSHOT_FORMAT_PARQUET,
+) -> QueryResponse:
+    """
+    导出知识库快照: 向量、文档、元数据及知识库文件信息写入VECTOR_SNAPSHOT_PATH目录, 用于跨环境迁移及备份\n
+    :param namespace_id: 知识库标识\n
+    :param file_format: 快照格式: parquet[Parquet] arrow[Arrow IPC]\n
+    :return: 快照文件名称及向量数量
+    """
+    response = QueryResponse()
+    request_id = str(uuid.uuid4())
+    try:
+        if file_format not in SNAPSHOT_FORMATS:
+            raise BusinessException(-1, f"不支持的快照格式: {file_format}")
+        response.data = LocalRepositoryDomain(request_id=request_id).export_snapshot(
+            namespace_id=namespace_id,
+            file_format=file_format,
+        )
+    except BusinessException as business_err:
+        logger.error("###API###api_export_namespace_snapshot error, requestId={}, err={}.", request_id, business_err)
+        response.message = business_err.message
+        response.status = business_err.code
+    except Exception as err:
+        logger.error("###API###api_export_namespace_snapshot error, requestId={}, err={}.", request_id, err)
+        response.message = str(err)
+        response.status = -1
+    return response
+
+
+@app.post(
+    path="/namespace/snapshot/import",
+    tags=["Namespace:知识库模块"],
+    summary="导入知识库快照",
+    response_model=QueryResponse,
+    response_description="返回体对象[status:结果状态(0成功), message:错误信息, data:业务数据]",
+)
+def api_import_namespace_snapshot(
+        file_name: str,
+        namespace: str = None,
+        name: str = None,
+) -> QueryResponse:
+    """
+    导入知识库快照: 向量按原标识批量写入, 不重新向量化; 知识库信息不存在时按快照创建\n
+    :param file_name: 快照文件名称(位于VECTOR_SNAPSHOT_PATH目录)\n
+    :param namespace: 目标知识库空间, 为空时与快照一致\n
+    :param name: 目标知识库名称, 为空时与快照一致\n
+    :return: 知识库详情
+    """
+    response = QueryResponse()
+    request_id = str(uuid.uuid4())
+    try:
+        namespace_id = LocalRepositoryDomain(request_id=request_id).import_snapshot(
+            file_name=file_name,
+            namespace=namespace,
+            name=name,
+        )
+        response.data = NamespaceDomain(request_id=request_id).find_by_id(namespace_id=namespace_id)
+    except BusinessException as business_err:
+        logger.error("###API###api_import_namespace_snapshot error, requestId={}, err={}.", request_id, business_err)
+        response.message = business_err.message
+        response.status = business_err.code
+    except Exception as err:
+        logger.error("###API###api_import_namespace_snapshot error, requestId={}, err={}.", request_id, err)
+        response.message = str(err)
+        response.status = -1
+    return response
+
+
 @app.get(
     path="/namespace/{namespace_id}/file",
     tags=["Namespace:知识库模块"],
@@ -713,11 +839,15 @@ def api_get_namespace_file(
 def api_get_namespace_file_info(
         namespace_id: str,
         file_id: str,
+        limit: int = None,
+        after: str = None,
 ) -> QueryResponse:
     """
     查询知识库所属的指定文件详情
     :param namespace_id: 主键标识
     :param file_id: 文件标识
+    :param limit: 向量数据分页大小, 为空时返回全部
+    :param after: 上一页返回的next_after, 为空时从第一页开始
     :return: 文件详情信息
     """
     response = QueryResponse()
@@ -732,7 +862,14 @@ def api_get_namespace_file_info(
             return response
 
         ids = str(namespaceFileModel.vector_ids).split(',') if namespaceFileModel.vector_ids else []
-        vector_list = get_instance_client().query_data(namespace=namespaceModel.namespace, ids=ids)
+        vector_list = get_instance_client().query_data(
+            namespace=namespaceModel.namespace,
+            ids=ids,
+            columns=["uuid", "collection_id", "custom_id", "document", "cmetadata"],
+            limit=limit,
+            after=after,
+            stream=limit is None,
+        )
         vector_list_result = [
             {
                 "uuid": v.uuid,
@@ -745,8 +882,11 @@ def api_get_namespace_file_info(
         ]
         response.data = namespaceFileModel
         setattr(response.data, "namespace", namespaceModel)
+        setattr(response.data, "vector_total", len(ids))
         setattr(response.data, "vector_list_length", len(vector_list_result))
         setattr(response.data, "vector_list", vector_list_result)
+        setattr(response.data, "next_after", vector_list_result[-1]["custom_id"]
+                if limit and len(vector_list_result) == limit else None)
     except BusinessException as business_err:
         logger.error("###API###api_get_namespace_file_info error, requestId={}, err={}.", request_id, business_err)
         response.message = business_err.message
@@ -844,7 +984,7 @@ def api_del_vector_namespace(
     request_id = str(uuid.uuid4())
     try:
         vector_client = get_instance_client()
-        vector_client.delete_data(namespace=namespace, delete_all=True)
+        response.data = vector_client.delete_data(namespace=namespace, delete_all=True)
     except BusinessException as business_err:
         logger.error("###API###api_del_vector_namespace error, requestId={}, err={}.", request_id, business_err)
         response.message = business_err.message
@@ -879,7 +1019,7 @@ def api_del_vector_namespace_data(
         logger.info("###API###api_del_vector_namespace_data INFO, requestId={}, ids={}", request_id, ids)
         if ids and len(ids) > 0 and ids[0] != 'None':
             vector_client = get_instance_client()
-            vector_client.delete_data(namespace=namespace, ids=ids)
+            response.data = vector_client.delete_data(namespace=namespace, ids=ids)
     except BusinessException as business_err:
         logger.error("###API###api_del_vector_namespace_data error, requestId={}, err={}.",
                      request_id, business_err)
@@ -892,6 +1032,127 @@ def api_del_vector_namespace_data(
     return response
 
 
+@app.get(
+    path="/vector/index",
+    tags=["Vector:向量模块"],
+    summary="查询命名空间的向量索引状态",
+    response_model=QueryResponse,
+    response_description="返回体对象[status:结果状态(0成功), message:错误信息, data:业务数据]",
+)
+def api_get_vector_index(
+        namespace: str,
+) -> QueryResponse:
+    """
+    查询命名空间的向量索引状态\n
+    :param namespace: 命名空间\n
+    :return: QueryResponse
+    """
+    response = QueryResponse()
+    request_id = str(uuid.uuid4())
+    try:
+        response.data = get_instance_client().get_index_status(namespace=namespace)
+    except BusinessException as business_err:
+        logger.error("###API###api_get_vector_index error, requestId={}, err={}.", request_id, business_err)
+        response.message = business_err.message
+        response.status = business_err.code
+    except Exception as err:
+        logger.error("###API###api_get_vector_index error, requestId={}, err={}.", request_id, err)
+        response.message = str(err)
+        response.status = -1
+    return response
+
+
+@app.post(
+    path="/vector/index",
+    tags=["Vector:向量模块"],
+    summary="创建、重建或删除命名空间的向量索引",
+    response_model=QueryResponse,
+    response_description="返回体对象[status:结果状态(0成功), message:错误信息, data:业务数据]",
+)
+def api_manage_vector_index(
+        namespace: str,
+        action: str = "create",
+        index_type: str = None,
+        m: int = PGVECTOR_HNSW_M,
+        ef_construction: int = PGVECTOR_HNSW_EF_CONSTRUCTION,
+        lists: int = None,
+) -> QueryResponse:
+    """
+    创建、重建或删除命名空间的向量索引\n
+    :param namespace: 命名空间\n
+    :param action: 操作类型[create][rebuild][drop]\n
+    :param index_type: 索引类型[hnsw][ivfflat], 本地向量库为[ivf]\n
+    :param m: HNSW每层最大连接数\n
+    :param ef_construction: HNSW建索引候选集大小\n
+    :param lists: IVFFlat聚类列表数, 为空时按数据量计算\n
+    :return: QueryResponse
+    """
+    response = QueryResponse()
+    request_id = str(uuid.uuid4())
+    try:
+        vector_client = get_instance_client()
+        if action == "create":
+            vector_client.create_index(
+                namespace=namespace,
+                index_type=index_type,
+                m=m,
+                ef_construction=ef_construction,
+                lists=lists,
+            )
+        elif action == "rebuild":
+            vector_client.rebuild_index(namespace=namespace)
+        elif action == "drop":
+            vector_client.drop_index(namespace=namespace, index_type=index_type)
+        else:
+            raise ValueError(f"不支持的索引操作类型: {action}")
+        response.data = vector_client.get_index_status(namespace=namespace)
+    except BusinessException as business_err:
+        logger.error("###API###api_manage_vector_index error, requestId={}, err={}.", request_id, business_err)
+        response.message = business_err.message
+        response.status = business_err.code
+    except Exception as err:
+        logger.error("###API###api_manage_vector_index error, requestId={}, err={}.", request_id, err)
+        response.message = str(err)
+        response.status = -1
+    return response
+
+
+@app.get(
+    path="/vector/search-cache",
+    tags=["Vector:向量模块"],
+    summary="查询语义搜索结果缓存的统计信息",
+    response_model=QueryResponse,
+    response_description="返回体对象[status:结果状态(0成功), message:错误信息, data:业务数据]",
+)
+def api_get_vector_search_cache() -> QueryResponse:
+    """
+    查询语义搜索结果缓存的统计信息(命中、未命中、过期、淘汰、失效次数, 命中率, 条数及字节数)\n
+    :return: QueryResponse
+    """
+    response = QueryResponse()
+    search_cache = get_search_cache()
+    response.data = search_cache.stats() if search_cache else None
+    return response
+
+
+@app.get(
+    path="/vector/embedding-cache",
+    tags=["Vector:向量模块"],
+    summary="查询本地向量缓存的统计信息",
+    response_model=QueryResponse,
+    response_description="返回体对象[status:结果状态(0成功), message:错误信息, data:业务数据]",
+)
+def api_get_embedding_cache() -> QueryResponse:
+    """
+    查询本地持久化向量缓存的统计信息(命中、未命中、写入、淘汰次数, 命中率, 条数及字节数)\n
+    :return: QueryResponse
+    """
+    response = QueryResponse()
+    embedding_cache = get_embedding_cache()
+    response.data = embedding_cache.stats() if embedding_cache else None
+    return response
+
+
 @app.post(
     path="/sft/init-data",
     tags=["SFT:微调模块"],
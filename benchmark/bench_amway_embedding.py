@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Amway Embedding请求压测(使用本地替身服务): 逐条请求 vs 批量请求、不同并发数的吞吐量, 以及旧版服务的回退、失败重试
+也可通过--url指定真实服务
+
+python -m benchmark.bench_amway_embedding --chunks 3000 --batch-sizes 1 8 32 64
+python -m benchmark.bench_amway_embedding --batch-sizes 1 32 --in-flight 1 4 8 --rate-limit 0
+python -m benchmark.bench_amway_embedding --latency-ms 20 --per-chunk-ms 1 --no-batch-server --fail-rate 0.05
+"""
+import argparse
+import time
+
+from benchmark.stub_embedding_server import start_server
+from models.embeddings.amway import amway_embedding_api
+from models.embeddings.amway.amway_embedding_api import AmwayApiEmbeddings
+from models.embeddings.amway.amway_embedding_config import MAX_IN_FLIGHT, RATE_LIMIT, RATE_BURST
+from models.embeddings.embedding_executor import EmbeddingExecutor, TokenBucket
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=3000)
+    parser.add_argument("--chunk-chars", type=int, default=500)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--batch-max-bytes", type=int, default=256 * 1024)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="替身服务每次请求的固定耗时")
+    parser.add_argument("--per-chunk-ms", type=float, default=1.0, help="替身服务每个Chunk的推理耗时")
+    parser.add_argument("--in-flight", type=int, nargs="+", default=[MAX_IN_FLIGHT])
+    parser.add_argument("--rate-limit", type=float, default=RATE_LIMIT, help="每秒请求数, 0为不限流")
+    parser.add_argument("--no-batch-server", action="store_true", help="替身服务不支持批量请求, 验证回退")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="替身服务请求随机失败的比例, 验证重试")
+    parser.add_argument("--url", default=None, help="真实服务地址, 为空时启动替身服务")
+    args = parser.parse_args()
+
+    server, url = None, args.url
+    if not url:
+        server, url = start_server(
+            latency_ms=args.latency_ms,
+            per_chunk_ms=args.per_chunk_ms,
+            batch=not args.no_batch_server,
+            fail_rate=args.fail_rate,
+        )
+    texts = [f"{i:06d} " + "知识库文档内容" * (args.chunk_chars // 7) for i in range(args.chunks)]
+    try:
+        expected = None
+        amway_embedding_api._rate_limiter = TokenBucket(rate=args.rate_limit, capacity=RATE_BURST)
+        for in_flight in args.in_flight:
+            amway_embedding_api._executor = EmbeddingExecutor(
+                max_in_flight=in_flight,
+                max_retries=amway_embedding_api.MAX_RETRIES,
+                backoff=amway_embedding_api.RETRY_BACKOFF,
+                backoff_max=amway_embedding_api.RETRY_BACKOFF_MAX,
+            )
+            for batch_size in args.batch_sizes:
+                embeddings = AmwayApiEmbeddings(
+                    amway_embeddings_api_url=url,
+                    batch_size=batch_size,
+                    batch_max_bytes=args.batch_max_bytes,
+                )
+                start = time.perf_counter()
+                vectors = embeddings.embed_documents(texts)
+                elapsed = time.perf_counter() - start
+                expected = expected or vectors
+                print(f"in_flight={in_flight:<3} batch_size={batch_size:<4} chunks={len(vectors):<6} "
+                      f"elapsed={elapsed:8.2f}s  {len(vectors) / elapsed:10.1f} chunks/s  "
+                      f"same_as_first={vectors == expected}")
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+查询向量化微批处理压测(使用本地替身服务): 模拟多个并发用户各自调用embed_query, 对比逐条请求与微批处理的
+单次查询延迟(p50/p99)、查询吞吐量及向量化服务收到的请求QPS
+也可通过--url指定真实服务
+
+python -m benchmark.bench_embed_query --users 50 --queries 20
+python -m benchmark.bench_embed_query --users 50 --max-wait-ms 2 5 10 --max-batch-size 16 --rate-limit 0
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from benchmark.stub_embedding_server import start_server
+from models.embeddings.amway import amway_embedding_api
+from models.embeddings.amway.amway_embedding_api import AmwayApiEmbeddings
+from models.embeddings.amway.amway_embedding_config import RATE_LIMIT, RATE_BURST
+from models.embeddings.embedding_batcher import MicroBatchEmbeddings, QueryBatcher
+from models.embeddings.embedding_executor import TokenBucket
+
+
+def run_users(embeddings, users: int, queries: int, barrier_timeout: float = 60):
+    """
+    并发用户各自顺序发起查询, 返回每次查询的耗时及总耗时
+    """
+    latencies = [[] for _ in range(users)]
+    barrier = threading.Barrier(users + 1)
+
+    def user(index: int):
+        barrier.wait(barrier_timeout)
+        for i in range(queries):
+            text = f"用户{index}的第{i}个问题: 如何申请成为营销人员?"
+            start = time.perf_counter()
+            embeddings.embed_query(text)
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    barrier.wait(barrier_timeout)
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return [value for values in latencies for value in values], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50, help="并发用户数")
+    parser.add_argument("--queries", type=int, default=20, help="每个用户的查询次数")
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[5.0])
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="替身服务每次请求的固定耗时")
+    parser.add_argument("--per-chunk-ms", type=float, default=1.0, help="替身服务每个Chunk的推理耗时")
+    parser.add_argument("--rate-limit", type=float, default=RATE_LIMIT, help="每秒请求数, 0为不限流")
+    parser.add_argument("--url", default=None, help="真实服务地址, 为空时启动替身服务")
+    args = parser.parse_args()
+
+    server, url = None, args.url
+    if not url:
+        server, url = start_server(latency_ms=args.latency_ms, per_chunk_ms=args.per_chunk_ms)
+    amway_embedding_api._rate_limiter = TokenBucket(rate=args.rate_limit, capacity=RATE_BURST)
+    embedding = AmwayApiEmbeddings(amway_embeddings_api_url=url)
+    cases = [("direct", None)] + [(f"batch wait={wait}ms", wait) for wait in args.max_wait_ms]
+    try:
+        for name, max_wait_ms in cases:
+            embeddings, batcher = embedding, None
+            if max_wait_ms is not None:
+                batcher = QueryBatcher(
+                    embedding=embedding,
+                    max_wait_ms=max_wait_ms,
+                    max_batch_size=args.max_batch_size,
+                    max_in_flight=args.max_in_flight,
+                )
+                embeddings = MicroBatchEmbeddings(embedding=embedding, batcher=batcher)
+            requests_before = server.stats["requests"] if server else 0
+            latencies, elapsed = run_users(embeddings, args.users, args.queries)
+            requests = (server.stats["requests"] - requests_before) if server else None
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            line = (f"{name:<20} queries={len(latencies):<6} elapsed={elapsed:7.2f}s  "
+                    f"{len(latencies) / elapsed:8.1f} queries/s  p50={p50:8.1f}ms  p99={p99:8.1f}ms")
+            if requests is not None:
+                line += f"  service_requests={requests:<6} service_qps={requests / elapsed:7.1f}"
+            if batcher:
+                line += f"  avg_batch={batcher.stats()['avg_batch_size']:.1f}"
+            print(line)
+    finally:
+        if server:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
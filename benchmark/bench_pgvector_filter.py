@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+带元数据过滤的向量检索延迟压测: 旧版 cmetadata->>key 文本比较 vs JSONB GIN 可索引条件
+
+python -m benchmark.bench_pgvector_filter --namespace bench_filter --rows 20000 --iterations 50
+"""
+import argparse
+import time
+import uuid
+from typing import Any, Dict, List
+
+import numpy as np
+import sqlalchemy
+
+import models.vectordatabase.custom.custom_pgvector as custom_pgvector
+from benchmark.bench_utils import RandomEmbeddings, get_connection_string, percentile
+from config.base_config import PGVECTOR_DIMENSIONS
+from models.vectordatabase.custom.custom_pgvector import PGVector, DistanceStrategy
+from models.vectordatabase.custom.pgvector_filter import build_metadata_filter
+
+FILTERS = {
+    "source $eq": {"source": "file_7.pdf"},
+    "scene $in": {"scene": {"$in": ["faq", "guide"]}},
+    "answer $exists": {"answer": {"$exists": True}},
+    "source $eq + page range": {"source": "file_7.pdf", "page": {"$gte": 5, "$lt": 10}},
+}
+
+
+def legacy_metadata_filter(column: sqlalchemy.Column, filter: Dict[str, Any]):
+    """
+    旧版过滤: 仅支持等值与in, 按文本比较, 无法使用索引
+    """
+    if not filter:
+        return None
+    clauses = []
+    for key, value in filter.items():
+        if isinstance(value, dict) and "$in" in value:
+            clauses.append(column[key].astext.in_([str(v) for v in value["$in"]]))
+        elif isinstance(value, dict) and "$exists" in value:
+            clauses.append(column[key].astext.isnot(None))
+        elif isinstance(value, dict):
+            if "$gte" in value:
+                clauses.append(column[key].astext.cast(sqlalchemy.Integer) >= value["$gte"])
+            if "$lt" in value:
+                clauses.append(column[key].astext.cast(sqlalchemy.Integer) < value["$lt"])
+        else:
+            clauses.append(column[key].astext == str(value))
+    return sqlalchemy.and_(*clauses)
+
+
+def build_metadatas(rows: int) -> List[Dict[str, Any]]:
+    scenes = ["faq", "guide", "policy", "product", "training"]
+    metadatas = []
+    for i in range(rows):
+        metadata = {"source": f"file_{i % 500}.pdf", "scene": scenes[i % len(scenes)], "page": i % 50}
+        if i % 10 == 0:
+            metadata["answer"] = f"answer {i}"
+        metadatas.append(metadata)
+    return metadatas
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--namespace", default="bench_filter")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=4)
+    args = parser.parse_args()
+
+    embedding = RandomEmbeddings()
+    store = PGVector(
+        connection_string=get_connection_string(),
+        embedding_function=embedding,
+        collection_name=args.namespace,
+        distance_strategy=DistanceStrategy.COSINE,
+        pre_delete_collection=True,
+    )
+    vectors = np.random.default_rng(7).standard_normal((args.rows, PGVECTOR_DIMENSIONS), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    store.bulk_add_embeddings(
+        texts=[f"benchmark document {i}" for i in range(args.rows)],
+        embeddings=vectors.tolist(),
+        metadatas=build_metadatas(args.rows),
+        ids=[uuid.uuid4().hex for _ in range(args.rows)],
+    )
+    store.create_index()
+    with store._conn.begin() as conn:
+        conn.execute(sqlalchemy.text(f"ANALYZE {custom_pgvector.EmbeddingStore.__tablename__}"))
+    queries = embedding.embed_documents(["query"] * args.iterations)
+
+    for mode, builder in (("legacy", legacy_metadata_filter), ("jsonb", build_metadata_filter)):
+        custom_pgvector.build_metadata_filter = builder
+        for name, filter in FILTERS.items():
+            samples, found = [], 0
+            for query in queries:
+                start = time.perf_counter()
+                found += len(store.similarity_search_with_score_by_vector(query, k=args.top_k, filter=filter))
+                samples.append(time.perf_counter() - start)
+            print(f"{mode:<7} {name:<26} p50={percentile(samples, 50):8.2f}ms  p99={percentile(samples, 99):8.2f}ms  "
+                  f"avg_hits={found / len(queries):.1f}")
+    custom_pgvector.build_metadata_filter = build_metadata_filter
+    store.delete_collection()
+
+
+if __name__ == '__main__':
+    main()
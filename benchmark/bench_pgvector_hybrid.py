@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+混合检索压测: 纯向量检索 vs 向量+关键词(pg_trgm)RRF融合检索的 recall@k 与延迟
+
+问答库模拟prepare类型知识库: 每条文档是一个包含产品名称的问题, 查询为同一产品的不同问法。
+使用 --model adapter 时调用配置的Embedding服务, 否则使用随机向量(仅关键词一路有效)。
+
+python -m benchmark.bench_pgvector_hybrid --namespace bench_hybrid --products 300 --top-k 4
+"""
+import argparse
+import time
+import uuid
+
+from benchmark.bench_utils import RandomEmbeddings, get_connection_string, percentile
+from models.embeddings.es_model_adapter import EmbeddingsModelAdapter
+from models.vectordatabase.custom.custom_pgvector import PGVector, DistanceStrategy
+
+DOCUMENT_TEMPLATES = ["{}怎么吃", "{}多少钱", "{}适合什么人群", "{}有什么功效"]
+QUERY_TEMPLATES = ["{}的吃法是什么", "请问{}价格", "哪些人适合用{}", "{}的作用"]
+
+
+def product_name(i: int) -> str:
+    return f"纽崔莱{i:03d}号营养素"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--namespace", default="bench_hybrid")
+    parser.add_argument("--products", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--model", choices=["random", "adapter"], default="random")
+    args = parser.parse_args()
+
+    embedding = EmbeddingsModelAdapter().get_model_instance() if args.model == "adapter" else RandomEmbeddings()
+    store = PGVector(
+        connection_string=get_connection_string(),
+        embedding_function=embedding,
+        collection_name=args.namespace,
+        distance_strategy=DistanceStrategy.COSINE,
+        pre_delete_collection=True,
+    )
+    if not store.supports_hybrid_search():
+        print("hybrid search is not ready (PGVECTOR_HYBRID_SEARCH, pg_trgm, index or locale), falls back to vector search")
+
+    texts, expected = [], []
+    for i in range(args.products):
+        for template in DOCUMENT_TEMPLATES:
+            texts.append(template.format(product_name(i)))
+    store.add_texts(texts=texts, metadatas=[{"source": "bench"} for _ in texts],
+                    ids=[uuid.uuid4().hex for _ in texts])
+    queries = []
+    for i in range(args.products):
+        for j, template in enumerate(QUERY_TEMPLATES):
+            queries.append(template.format(product_name(i)))
+            expected.append(DOCUMENT_TEMPLATES[j].format(product_name(i)))
+    vectors = embedding.embed_documents(queries)
+
+    searches = {
+        "vector": lambda q, v: store.similarity_search_with_score_by_vector(embedding=v, k=args.top_k),
+        "hybrid": lambda q, v: store.hybrid_search_with_score_by_vector(query=q, embedding=v, k=args.top_k),
+    }
+    for name, search in searches.items():
+        samples, hits = [], 0
+        for query, vector, answer in zip(queries, vectors, expected):
+            start = time.perf_counter()
+            docs = search(query, vector)
+            samples.append(time.perf_counter() - start)
+            hits += any(doc.page_content == answer for doc, _ in docs)
+        print(f"{name:<7} recall@{args.top_k}={hits / len(queries):.3f}  "
+              f"p50={percentile(samples, 50):8.2f}ms  p99={percentile(samples, 99):8.2f}ms")
+    store.delete_collection()
+
+
+if __name__ == '__main__':
+    main()
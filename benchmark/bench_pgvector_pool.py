@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+向量检索吞吐量压测: 每次检索新建连接 vs 共享连接池
+
+python -m benchmark.bench_pgvector_pool --namespace bench_pool --iterations 200 --threads 8
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlalchemy
+from sqlalchemy.pool import StaticPool
+
+from benchmark.bench_utils import RandomEmbeddings, get_connection_string, run_timed
+from models.vectordatabase.custom.custom_pgvector import PGVector, DistanceStrategy
+
+
+class LegacyPGVector(PGVector):
+    """
+    旧版行为: 每个实例新建engine和连接, 并执行建表DDL
+    """
+    def __post_init__(self) -> None:
+        self._conn = self.connect()
+        self.create_tables_if_not_exists()
+        self.create_collection()
+
+    def connect(self) -> sqlalchemy.engine.Engine:
+        return sqlalchemy.create_engine(self.connection_string, poolclass=StaticPool)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--namespace", default="bench_pool")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--top-k", type=int, default=2)
+    args = parser.parse_args()
+
+    connection_string = get_connection_string()
+    embedding = RandomEmbeddings()
+    texts = [f"benchmark document {i}" for i in range(200)]
+    PGVector.from_texts(
+        texts=texts,
+        embedding=embedding,
+        collection_name=args.namespace,
+        connection_string=connection_string,
+        pre_delete_collection=True,
+    )
+
+    def search(cls):
+        store = cls(
+            connection_string=connection_string,
+            embedding_function=embedding,
+            collection_name=args.namespace,
+            distance_strategy=DistanceStrategy.COSINE,
+        )
+        store.similarity_search_with_score(query="benchmark", k=args.top_k)
+        if cls is LegacyPGVector:
+            store._conn.dispose()
+
+    for cls in (LegacyPGVector, PGVector):
+        run_timed(f"{cls.__name__} serial", lambda: search(cls), args.iterations)
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            run_timed(
+                f"{cls.__name__} x{args.threads} threads",
+                lambda: list(executor.map(lambda _: search(cls), range(args.threads))),
+                max(1, args.iterations // args.threads),
+                ops_per_call=args.threads,
+            )
+
+
+if __name__ == '__main__':
+    main()
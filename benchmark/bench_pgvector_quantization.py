@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+量化索引压测(需pgvector 0.7+): 原精度 vs halfvec vs binary 索引的大小、检索延迟及召回率(相对精确检索)
+
+python -m benchmark.bench_pgvector_quantization --namespace bench_quant --rows 50000 --iterations 100
+python -m benchmark.bench_pgvector_quantization --modes none binary --rescore-factors 4 10 40
+"""
+import argparse
+import time
+import uuid
+from typing import List, Set
+
+import numpy as np
+import sqlalchemy
+from sqlalchemy.orm import Session
+
+from benchmark.bench_utils import RandomEmbeddings, get_connection_string, percentile
+from config.base_config import PGVECTOR_DIMENSIONS, PGVECTOR_INDEX_TYPE
+from models.vectordatabase.custom.custom_pgvector import PGVector, DistanceStrategy, EmbeddingStore
+from models.vectordatabase.custom.pgvector_quantize import QUANTIZATION_TYPES, QUANTIZATION_NONE
+
+
+def clustered_vectors(rows: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((200, PGVECTOR_DIMENSIONS), dtype=np.float32)
+    vectors = centers[rng.integers(0, 200, rows)] + 0.5 * rng.standard_normal((rows, PGVECTOR_DIMENSIONS), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(store: PGVector, query: List[float], k: int) -> Set[str]:
+    """
+    关闭索引扫描的精确检索结果, 作为召回率基准
+    """
+    with Session(store._conn) as session:
+        session.execute(sqlalchemy.text("SET LOCAL enable_indexscan = off"))
+        rows = (
+            session.query(EmbeddingStore.document)
+            .filter(EmbeddingStore.collection_id == store.get_collection_uuid())
+            .order_by(EmbeddingStore.embedding.cosine_distance(query))
+            .limit(k)
+            .all()
+        )
+    return {row.document for row in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--namespace", default="bench_quant")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--index-type", default=PGVECTOR_INDEX_TYPE)
+    parser.add_argument("--modes", nargs="+", default=list(QUANTIZATION_TYPES), choices=QUANTIZATION_TYPES)
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[2, 4, 10])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    store = PGVector(
+        connection_string=get_connection_string(),
+        embedding_function=RandomEmbeddings(),
+        collection_name=args.namespace,
+        distance_strategy=DistanceStrategy.COSINE,
+        pre_delete_collection=True,
+    )
+    store.bulk_add_embeddings(
+        texts=[f"benchmark document {i}" for i in range(args.rows)],
+        embeddings=clustered_vectors(args.rows, rng).tolist(),
+        metadatas=[{} for _ in range(args.rows)],
+        ids=[uuid.uuid4().hex for _ in range(args.rows)],
+    )
+    queries = clustered_vectors(args.iterations, rng).tolist()
+    expected = [exact_top_k(store, query, args.top_k) for query in queries]
+
+    try:
+        for mode in args.modes:
+            store.quantization = mode
+            start = time.perf_counter()
+            index_name = store.create_index(index_type=args.index_type)
+            build = time.perf_counter() - start
+            size = next(s["size_bytes"] for s in store.get_index_status() if s["index_name"] == index_name)
+            print(f"{mode:<8} index={index_name} size={size / 1024 / 1024:8.1f}MB build={build:8.2f}s")
+            factors = [1] if mode == QUANTIZATION_NONE else args.rescore_factors
+            for factor in factors:
+                samples, recall = [], 0.0
+                for query, exact in zip(queries, expected):
+                    start = time.perf_counter()
+                    found = store.similarity_search_with_score_by_vector(query, k=args.top_k, rescore_factor=factor)
+                    samples.append(time.perf_counter() - start)
+                    recall += len({doc.page_content for doc, _ in found} & exact) / len(exact)
+                print(f"{mode:<8} rescore_factor={factor:<4} p50={percentile(samples, 50):8.2f}ms  "
+                      f"p99={percentile(samples, 99):8.2f}ms  recall@{args.top_k}={recall / len(queries):.3f}")
+            store.drop_index()
+    finally:
+        store.delete_collection()
+
+
+if __name__ == '__main__':
+    main()
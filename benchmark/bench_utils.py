@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import random
+import time
+from typing import Callable, List
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+from config.base_config import *
+from models.vectordatabase.custom.custom_pgvector import PGVector
+
+
+def get_connection_string() -> str:
+    """
+    根据配置获取向量库连接串
+    :return: 连接串
+    """
+    return PGVector.connection_string_from_db_params(
+        driver=PGVECTOR_DRIVER,
+        host=PGVECTOR_HOST,
+        port=PGVECTOR_PORT,
+        database=PGVECTOR_DATABASE,
+        user=PGVECTOR_USER,
+        password=PGVECTOR_PASSWORD
+    )
+
+
+class RandomEmbeddings(Embeddings):
+    """
+    压测用的随机稀疏值模型, 不依赖Embedding服务
+    """
+    def __init__(self, dimensions: int = PGVECTOR_DIMENSIONS, seed: int = 7):
+        self.dimensions = dimensions
+        self.random = random.Random(seed)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [self.random.uniform(-1.0, 1.0) for _ in range(self.dimensions)]
+        norm = sum(v * v for v in vector) ** 0.5
+        return [v / norm for v in vector]
+
+
+def run_timed(name: str, func: Callable[[], None], iterations: int, ops_per_call: int = 1) -> float:
+    """
+    执行指定次数并打印吞吐量
+    :param name: 场景名称
+    :param func: 被测函数
+    :param iterations: 执行次数
+    :param ops_per_call: 每次执行包含的操作数
+    :return: 每秒操作数
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    ops = iterations * ops_per_call
+    rate = ops / elapsed if elapsed > 0 else float("inf")
+    print(f"{name:<40} ops={ops:<8} elapsed={elapsed:8.3f}s  {rate:12.1f} ops/s")
+    return rate
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """
+    计算耗时样本的百分位数
+    :param samples: 耗时样本, 单位秒
+    :param q: 百分位(0-100)
+    :return: 百分位耗时, 单位毫秒
+    """
+    return float(np.percentile(samples, q)) * 1000
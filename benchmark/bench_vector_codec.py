@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+向量编解码压测: 文本格式('[0.1,0.2,...]') vs pgvector二进制格式(float32缓冲区)
+
+python -m benchmark.bench_vector_codec --rows 2000
+python -m benchmark.bench_vector_codec --rows 2000 --db --namespace bench_codec
+"""
+import argparse
+import time
+import uuid
+
+import numpy as np
+from pgvector.sqlalchemy import Vector
+
+from benchmark.bench_utils import RandomEmbeddings, get_connection_string
+from config.base_config import PGVECTOR_DIMENSIONS
+from models.vectordatabase.custom.custom_pgvector import PGVector, DistanceStrategy
+from models.vectordatabase.custom.pgvector_binary import decode_vector, encode_vectors
+
+
+def report(name: str, rows: int, wall: float, cpu: float):
+    print(f"{name:<28} rows={rows:<7} rows/s={rows / wall:12.1f}  cpu/row={cpu / rows * 1e6:9.2f}us")
+
+
+def timed(func):
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = func()
+    return result, time.perf_counter() - wall, time.process_time() - cpu
+
+
+class TextPGVector(PGVector):
+    """
+    关闭二进制传输的对照组
+    """
+    def use_binary_transfer(self) -> bool:
+        return False
+
+
+def bench_codec(rows: int):
+    vectors = np.random.rand(rows, PGVECTOR_DIMENSIONS).astype(np.float32)
+    column_type = Vector(PGVECTOR_DIMENSIONS)
+    bind = column_type.bind_processor(None)
+    result = column_type.result_processor(None, None)
+
+    texts, wall, cpu = timed(lambda: [bind(v.tolist()) for v in vectors])
+    report("text encode", rows, wall, cpu)
+    _, wall, cpu = timed(lambda: [result(t) for t in texts])
+    report("text decode", rows, wall, cpu)
+    binaries, wall, cpu = timed(lambda: encode_vectors(vectors))
+    report("binary encode", rows, wall, cpu)
+    _, wall, cpu = timed(lambda: [decode_vector(b) for b in binaries])
+    report("binary decode", rows, wall, cpu)
+
+
+def bench_db(rows: int, namespace: str):
+    connection_string = get_connection_string()
+    embedding = RandomEmbeddings()
+    texts = [f"benchmark document {i}" for i in range(rows)]
+    embeddings = embedding.embed_documents(texts)
+    for cls in (TextPGVector, PGVector):
+        store = cls(
+            connection_string=connection_string,
+            embedding_function=embedding,
+            collection_name=namespace,
+            distance_strategy=DistanceStrategy.COSINE,
+            pre_delete_collection=True,
+        )
+        ids = [uuid.uuid4().hex for _ in texts]
+        _, wall, cpu = timed(lambda: store.bulk_add_embeddings(
+            texts=texts, embeddings=embeddings, metadatas=[{} for _ in texts], ids=ids))
+        report(f"{cls.__name__} insert", rows, wall, cpu)
+        _, wall, cpu = timed(lambda: store.query_embeddings(ids=ids, columns=["custom_id", "embedding"]))
+        report(f"{cls.__name__} read", rows, wall, cpu)
+    store.delete_collection()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--db", action="store_true", help="同时压测向量库写入与读取")
+    parser.add_argument("--namespace", default="bench_codec")
+    args = parser.parse_args()
+    bench_codec(args.rows)
+    if args.db:
+        bench_db(args.rows, args.namespace)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+本地替身Embedding服务(联调及压测用), 接口与Amway Embedding服务一致:
+    逐条: {"content_chunk": "..."}       -> {"embeddings": [...]}
+    批量: {"content_chunks": ["...", ...]} -> {"embeddings": [[...], ...]}
+相同文本返回相同向量; --no-batch 模拟不支持批量请求的旧版服务(批量请求返回422), --fail-rate 模拟随机的500错误
+
+python -m benchmark.stub_embedding_server --port 8003 --latency-ms 20
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+
+import numpy as np
+
+from config.base_config import PGVECTOR_DIMENSIONS
+
+
+def stub_vector(text: str, dimensions: int) -> List[float]:
+    """
+    按文本哈希生成确定的单位向量
+    """
+    seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class StubEmbeddingHandler(BaseHTTPRequestHandler):
+    dimensions: int = PGVECTOR_DIMENSIONS
+    latency: float = 0.0
+    per_chunk_latency: float = 0.0
+    batch: bool = True
+    fail_rate: float = 0.0
+    stats: dict = {}
+    stats_lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        with self.stats_lock:
+            self.stats["requests"] += 1
+            self.stats["chunks"] += len(body.get("content_chunks") or [body.get("content_chunk")])
+        if random.random() < self.fail_rate:
+            self._reply(500, {"detail": "stub failure"})
+        elif "content_chunks" in body and self.batch:
+            chunks = body["content_chunks"]
+            time.sleep(self.latency + self.per_chunk_latency * len(chunks))
+            self._reply(200, {"embeddings": [stub_vector(chunk, self.dimensions) for chunk in chunks]})
+        elif "content_chunk" in body:
+            time.sleep(self.latency + self.per_chunk_latency)
+            self._reply(200, {"embeddings": stub_vector(body["content_chunk"], self.dimensions)})
+        else:
+            self._reply(422, {"detail": "content_chunk is required"})
+
+    def _reply(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(
+        port: int = 0,
+        dimensions: int = PGVECTOR_DIMENSIONS,
+        latency_ms: float = 0.0,
+        per_chunk_ms: float = 0.0,
+        batch: bool = True,
+        fail_rate: float = 0.0,
+) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    在后台线程启动替身服务
+    :param port: 端口, 0为随机端口
+    :param dimensions: 向量维度
+    :param latency_ms: 每次请求的固定耗时(模拟网络往返及调度)
+    :param per_chunk_ms: 每个Chunk的推理耗时
+    :param batch: 是否支持批量请求
+    :param fail_rate: 请求随机失败(返回500)的比例
+    :return: 服务对象及接口地址, 服务对象的stats记录收到的请求数及Chunk数
+    """
+    handler = type("Handler", (StubEmbeddingHandler,), {
+        "dimensions": dimensions,
+        "latency": latency_ms / 1000,
+        "per_chunk_latency": per_chunk_ms / 1000,
+        "batch": batch,
+        "fail_rate": fail_rate,
+        "stats": {"requests": 0, "chunks": 0},
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.stats = handler.stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/embeddings"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8003)
+    parser.add_argument("--dimensions", type=int, default=PGVECTOR_DIMENSIONS)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--per-chunk-ms", type=float, default=1.0)
+    parser.add_argument("--no-batch", action="store_true")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server, url = start_server(args.port, args.dimensions, args.latency_ms, args.per_chunk_ms,
+                               not args.no_batch, args.fail_rate)
+    print(f"stub embedding server listening on {url}, batch={not args.no_batch}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+import json
 import os
 
 # 底座大模型
@@ -11,9 +12,14 @@ OPENAI_OUTPUT_TOKEN_LENGTH = 1024
 OPENAI_MODEL_NAME = "gpt-3.5-turbo"
 
 # 向量配置
+# 向量库类型: Postgres[pgvector] Local[本地文件存储, 无需Postgres]
 VECTOR_DATABASE_TYPE = os.environ.get("VECTOR_DATABASE_TYPE") or "Postgres"
 VECTOR_EMBEDDINGS_MODEL = os.environ.get("VECTOR_EMBEDDINGS_MODEL") or "OpenAI"
 VECTOR_EMBEDDINGS_MODEL_TYPE = os.environ.get("VECTOR_EMBEDDINGS_MODEL_TYPE") or "text-embedding-ada-002"
+# 向量化去重(内容哈希 -> 向量, 存储于Postgres): 是否开启、批量查询/写入数量、模型版本(模型升级后修改, 不再复用旧向量)
+EMBEDDING_DEDUP_ENABLED = os.environ.get("EMBEDDING_DEDUP_ENABLED") != 'False'
+EMBEDDING_DEDUP_BATCH_SIZE = int(os.environ.get("EMBEDDING_DEDUP_BATCH_SIZE") or 500)
+EMBEDDING_DEDUP_MODEL_VERSION = os.environ.get("EMBEDDING_DEDUP_MODEL_VERSION") or "1"
 
 # Pinecone配置
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY")
@@ -28,6 +34,39 @@ PGVECTOR_DATABASE = "bespin_chat_qa"
 PGVECTOR_USER = "bespin_chat_qa"
 PGVECTOR_PASSWORD = "nDqeQ-vixYl1"
 PGVECTOR_DIMENSIONS = 1024
+# Postgres连接池配置: 常驻连接数、溢出连接数、连接回收时间(秒)、获取连接超时时间(秒)
+PGVECTOR_POOL_SIZE = int(os.environ.get("PGVECTOR_POOL_SIZE") or 10)
+PGVECTOR_POOL_MAX_OVERFLOW = int(os.environ.get("PGVECTOR_POOL_MAX_OVERFLOW") or 20)
+PGVECTOR_POOL_RECYCLE = int(os.environ.get("PGVECTOR_POOL_RECYCLE") or 1800)
+PGVECTOR_POOL_TIMEOUT = int(os.environ.get("PGVECTOR_POOL_TIMEOUT") or 30)
+# 向量数据批量写入开关及每批写入行数
+PGVECTOR_BULK_INSERT = os.environ.get("PGVECTOR_BULK_INSERT") != 'False'
+PGVECTOR_INSERT_BATCH_SIZE = int(os.environ.get("PGVECTOR_INSERT_BATCH_SIZE") or 200)
+# 向量数据批量删除时每批删除行数
+PGVECTOR_DELETE_BATCH_SIZE = int(os.environ.get("PGVECTOR_DELETE_BATCH_SIZE") or 1000)
+# 向量索引配置: 索引类型[hnsw][ivfflat]、HNSW建索引参数
+PGVECTOR_INDEX_TYPE = os.environ.get("PGVECTOR_INDEX_TYPE") or "hnsw"
+PGVECTOR_HNSW_M = 16
+PGVECTOR_HNSW_EF_CONSTRUCTION = 64
+# 向量检索召回参数: HNSW候选集大小(不低于匹配数的倍数)、IVFFlat扫描列表数
+PGVECTOR_HNSW_EF_SEARCH = 40
+PGVECTOR_HNSW_EF_SEARCH_FACTOR = 4
+PGVECTOR_IVFFLAT_PROBES = 10
+# 向量表按知识库分区存储开关(开启前需执行迁移: python -m models.vectordatabase.custom.pgvector_partition)
+PGVECTOR_PARTITIONED = os.environ.get("PGVECTOR_PARTITIONED") == 'True'
+# 向量数据二进制传输开关(仅psycopg2驱动生效): 写入使用二进制COPY, 读取使用vector_send
+PGVECTOR_BINARY_TRANSFER = os.environ.get("PGVECTOR_BINARY_TRANSFER") != 'False'
+# 向量索引量化存储(需pgvector 0.7+): none[原精度] halfvec[半精度] binary[二值化]; 检索时按量化距离多取候选(匹配数的倍数)再按原精度向量重排
+# 切换后需重建索引(/vector/index action=create), 新索引就绪后可删除原精度索引
+PGVECTOR_QUANTIZATION = os.environ.get("PGVECTOR_QUANTIZATION") or "none"
+PGVECTOR_RESCORE_FACTOR = int(os.environ.get("PGVECTOR_RESCORE_FACTOR") or 4)
+# 混合检索开关(默认关闭, 需pg_trgm扩展), 开启前需执行迁移创建文档内容的三元组索引: python -m models.vectordatabase.custom.pgvector_hybrid
+# pg_trgm按数据库LC_CTYPE切分单词, C locale下中文不产生三元组, 需使用UTF-8 locale(如zh_CN.UTF-8)的数据库, 否则自动回退为向量检索
+PGVECTOR_HYBRID_SEARCH = os.environ.get("PGVECTOR_HYBRID_SEARCH") == 'True'
+# 混合检索参数: RRF融合常数、每路召回候选数(匹配数的倍数)、三元组相似度阈值
+PGVECTOR_HYBRID_RRF_K = 60
+PGVECTOR_HYBRID_CANDIDATE_FACTOR = 10
+PGVECTOR_TRGM_SIMILARITY_THRESHOLD = 0.1
 
 # Mysql配置
 MYSQL_HOST = "10.140.208.169"
@@ -51,6 +90,45 @@ SPLIT_CHUNK_OVERLAP = 5
 VECTOR_SEARCH_TOP_K = 2
 # 语义搜索阈值
 VECTOR_SEARCH_SCORE = 0.3
+# 语义搜索模式: vector[向量检索] hybrid[向量+关键词混合检索]
+VECTOR_SEARCH_MODE = os.environ.get("VECTOR_SEARCH_MODE") or "vector"
+# 按机器人标识覆盖的检索配置, 如: {"bot_id": {"search_mode": "hybrid"}}
+VECTOR_SEARCH_BOT_CONFIG = json.loads(os.environ.get("VECTOR_SEARCH_BOT_CONFIG") or "{}")
+# 语义搜索MMR重排(去除重叠、重复的Chunk): 相关性权重(0~1, 为空时不重排)、候选数量(匹配数的倍数), 可按机器人覆盖
+VECTOR_SEARCH_MMR_LAMBDA = float(os.environ["VECTOR_SEARCH_MMR_LAMBDA"]) if os.environ.get("VECTOR_SEARCH_MMR_LAMBDA") else None
+VECTOR_SEARCH_MMR_FETCH_FACTOR = int(os.environ.get("VECTOR_SEARCH_MMR_FETCH_FACTOR") or 4)
+# 语义搜索结果缓存: 开关、总大小上限(字节)、有效期(秒); 命名空间数据变更时自动失效
+VECTOR_SEARCH_CACHE_ENABLED = os.environ.get("VECTOR_SEARCH_CACHE_ENABLED") != 'False'
+VECTOR_SEARCH_CACHE_MAX_BYTES = int(os.environ.get("VECTOR_SEARCH_CACHE_MAX_BYTES") or 64 * 1024 * 1024)
+VECTOR_SEARCH_CACHE_TTL = int(os.environ.get("VECTOR_SEARCH_CACHE_TTL") or 300)
+# 预设问答类命名空间的内存镜像(精确检索): 开关、可镜像的最大向量数、快照目录
+VECTOR_MIRROR_ENABLED = os.environ.get("VECTOR_MIRROR_ENABLED") == 'True'
+VECTOR_MIRROR_MAX_ROWS = int(os.environ.get("VECTOR_MIRROR_MAX_ROWS") or 20000)
+VECTOR_MIRROR_PATH = os.environ.get("VECTOR_MIRROR_PATH") or os.path.join(CONTENT_PATH, "vector_mirror")
+# 本地向量库(VECTOR_DATABASE_TYPE='Local')配置: 数据目录、启用IVF索引的最小向量数、IVF聚类数(0为按数据量开方)、检索扫描的聚类数
+VECTOR_LOCAL_PATH = os.environ.get("VECTOR_LOCAL_PATH") or os.path.join(CONTENT_PATH, "vector_local")
+VECTOR_LOCAL_IVF_MIN_ROWS = int(os.environ.get("VECTOR_LOCAL_IVF_MIN_ROWS") or 10000)
+VECTOR_LOCAL_IVF_LISTS = int(os.environ.get("VECTOR_LOCAL_IVF_LISTS") or 0)
+VECTOR_LOCAL_IVF_PROBES = int(os.environ.get("VECTOR_LOCAL_IVF_PROBES") or 10)
+# 本地向量库后台合并条件: 段数量上限、已删除向量占比上限
+VECTOR_LOCAL_COMPACT_SEGMENTS = 16
+VECTOR_LOCAL_COMPACT_DELETED_RATIO = 0.2
+# 知识库快照(Parquet/Arrow IPC)导出导入: 文件目录、每批的向量数量
+VECTOR_SNAPSHOT_PATH = os.environ.get("VECTOR_SNAPSHOT_PATH") or os.path.join(CONTENT_PATH, "vector_snapshot")
+VECTOR_SNAPSHOT_BATCH_SIZE = int(os.environ.get("VECTOR_SNAPSHOT_BATCH_SIZE") or 5000)
+# 本地持久化向量缓存(SQLite, 按模型版本及文本哈希): 是否开启、文件路径、容量上限(字节, 超出后按最近访问淘汰)
+EMBEDDING_CACHE_ENABLED = os.environ.get("EMBEDDING_CACHE_ENABLED") != 'False'
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH") or os.path.join(CONTENT_PATH, "embedding_cache.db")
+EMBEDDING_CACHE_MAX_BYTES = int(os.environ.get("EMBEDDING_CACHE_MAX_BYTES") or 1024 * 1024 * 1024)
+# 查询向量化微批处理(合并并发的embed_query为一次批量请求): 是否开启、首个查询的最长等待毫秒数、单批最大查询数、在途批量请求数上限
+EMBEDDING_QUERY_BATCH_ENABLED = os.environ.get("EMBEDDING_QUERY_BATCH_ENABLED") != 'False'
+EMBEDDING_QUERY_BATCH_MAX_WAIT_MS = float(os.environ.get("EMBEDDING_QUERY_BATCH_MAX_WAIT_MS") or 5)
+EMBEDDING_QUERY_BATCH_MAX_SIZE = int(os.environ.get("EMBEDDING_QUERY_BATCH_MAX_SIZE") or 32)
+EMBEDDING_QUERY_BATCH_MAX_IN_FLIGHT = int(os.environ.get("EMBEDDING_QUERY_BATCH_MAX_IN_FLIGHT") or 4)
+# 大模型及向量化服务的HTTP连接池(进程内共享, keep-alive): 缓存连接池的主机数、单个主机的最大连接数、连接用尽时是否阻塞等待
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS") or 10)
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE") or 20)
+HTTP_POOL_BLOCK = os.environ.get("HTTP_POOL_BLOCK") == 'True'
 # 长程记忆配置信息
 MEMORY_LIMIT_SIZE = 2
 # 文件向量化定时任务间隔频率,单位秒
@@ -1,7 +1,7 @@
 import uuid
 from typing import List, Dict
 from loguru import logger
-import requests
+from framework.util.http_session import get_http_session
 import json
 from framework.business_code import ERROR_10901, ERROR_10902
 from framework.business_except import BusinessException
@@ -52,7 +52,7 @@ class BaidubceClient:
             }
             payload = ""
             logger.info("###BaidubceClient get_access_token request INFO, request_id={}, url={}, body={}.", self.request_id, self.access_token_url, payload)
-            response = requests.post(url=self.access_token_url, data=payload, headers=headers)
+            response = get_http_session().post(url=self.access_token_url, data=payload, headers=headers)
             logger.info("###BaidubceClient get_access_token request INFO, request_id={}, response={}.", self.request_id, response.text)
             if "error" in response.text:
                 logger.error("###BaidubceClient get_access_token request ERROR, request_id={}, code={}, message={}.", self.request_id, ERROR_10901, response.text)
@@ -87,7 +87,7 @@ class BaidubceClient:
                 "penalty_score": self.penalty_score,
             }
             logger.info("###BaidubceClient chat request INFO, request_id={}, url={}, ques={}, body={}.", self.request_id, self.chat_url, ques, body)
-            response = requests.post(url=self.chat_url, data=json.dumps(body), headers=headers)
+            response = get_http_session().post(url=self.chat_url, data=json.dumps(body), headers=headers)
             response_json = response.json()
             logger.info("###BaidubceClient chat request INFO, request_id={}, response={}.", self.request_id, response_json)
             # 千帆业务异常
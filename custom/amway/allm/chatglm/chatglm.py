@@ -1,5 +1,5 @@
 from typing import Any, List, Mapping, Optional
-import requests
+from framework.util.http_session import get_http_session
 from loguru import logger
 from langchain.callbacks.manager import CallbackManagerForLLMRun
 from langchain.llms.base import LLM
@@ -41,7 +41,7 @@ class ChatGlmAI(LLM):
         json = {"prompt": prompt, **self._default_params, **kwargs}
         logger.info("#############Request Amway ChatGLM2 LLMs INFO, url={}, headers={}, json={}.",
                     self.url, headers, json)
-        response = requests.post(
+        response = get_http_session().post(
             url=self.url,
             headers=headers,
             json=json,
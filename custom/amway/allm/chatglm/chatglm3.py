@@ -1,5 +1,5 @@
 from typing import Any, List, Mapping, Optional
-import requests
+from framework.util.http_session import get_http_session
 from loguru import logger
 from langchain.callbacks.manager import CallbackManagerForLLMRun
 from langchain.llms.base import LLM
@@ -39,9 +39,11 @@ class ChatGlm3AI(LLM):
         headers = {
             "Content-Type": "application/json"
         }
+        # 历史聊天记录优先取调用参数, 共享的模型实例不保存请求状态
+        history = kwargs.pop("history", self.history)
         messages = []
-        if self.history and len(self.history) > 0:
-            for h in self.history[::-1]:
+        if history and len(history) > 0:
+            for h in history[::-1]:
                 messages.append({
                     "role": "user",
                     "content": h[0]
@@ -57,7 +59,7 @@ class ChatGlm3AI(LLM):
 
         json = {"prompt": prompt, "messages": messages, **self._default_params, **kwargs}
         logger.info("#############Request Amway ChatGLM3 LLMs INFO, url={}, headers={}, json={}.", self.url, headers, json)
-        response = requests.post(
+        response = get_http_session().post(
             url=self.url,
             headers=headers,
             json=json,
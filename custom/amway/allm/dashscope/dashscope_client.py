@@ -1,7 +1,7 @@
 import uuid
 from typing import List
 from loguru import logger
-import requests
+from framework.util.http_session import get_http_session
 from custom.amway.amway_config import BAIDUBCE_SECURE_ANSWER
 from service.model.chat_history_model import ChatHistoryModel
 
@@ -61,7 +61,7 @@ class DashScopeClient:
             },
         }
         logger.info("#############Request DashScope LLMs INFO, request_id={}, url={}, headers={}, json={}.", self.request_id, self.url, headers, json)
-        response = requests.post(url=self.url, headers=headers, json=json)
+        response = get_http_session().post(url=self.url, headers=headers, json=json)
         response_json = response.json()
         logger.info("#############Request DashScope LLMs INFO, request_id={}, httpstatus={}, response={}.", self.request_id, response.status_code, response_json)
 
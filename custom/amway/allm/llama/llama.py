@@ -1,7 +1,7 @@
 """Wrapper around MOSS APIs."""
 import traceback
 from typing import Any, List, Mapping, Optional
-import requests
+from framework.util.http_session import get_http_session
 from loguru import logger
 from langchain.callbacks.manager import CallbackManagerForLLMRun
 from langchain.llms.base import LLM
@@ -54,7 +54,7 @@ class LLamaAI(LLM):
         }
         logger.info("###Request LLamaAI INFO, url={}, headers={}, json={}.", self.url, headers, json)
         try:
-            response = requests.post(
+            response = get_http_session().post(
                 url=self.url,
                 headers=headers,
                 json=json,
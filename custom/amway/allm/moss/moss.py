@@ -1,7 +1,7 @@
 """Wrapper around MOSS APIs."""
 from typing import Any, Dict, List, Mapping, Optional
 
-import requests
+from framework.util.http_session import get_http_session
 from loguru import logger
 from pydantic import Extra, root_validator
 
@@ -122,7 +122,7 @@ class Moss(LLM):
         json = {"prompt": prompt, **self._default_params, **kwargs}
         logger.info("#############Request Amway LLMs INFO, url={}, headers={}, json={}.",
                     self.moss_api_url, headers, json)
-        response = requests.post(
+        response = get_http_session().post(
             url=self.moss_api_url,
             headers=headers,
             json=json,
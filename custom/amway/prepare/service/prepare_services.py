@@ -153,7 +153,8 @@ class NamespacePrepareService:
                 vector_client = get_instance_client()
                 # 查询向量数据
                 ids_model = str(namespaceFileModel.vector_ids).split(',') if namespaceFileModel.vector_ids else []
-                vector_data_list = vector_client.query_data(namespace=namespaceModel.namespace, ids=ids_model)
+                vector_data_list = vector_client.query_data(
+                    namespace=namespaceModel.namespace, ids=ids_model, columns=["custom_id", "document"])
                 ids_array = [i.custom_id for i in vector_data_list if i.document not in ques_list]
                 del_array = [i.custom_id for i in vector_data_list if i.custom_id not in ids_array]
                 # 删除向量数据
@@ -231,7 +232,8 @@ class NamespacePrepareService:
             ques_list = [q.question for q in self.param.update_list]
             # 查询向量数据
             vector_client = get_instance_client()
-            vector_data_list = vector_client.query_data(namespace=namespaceModel.namespace, ids=ids_model)
+            vector_data_list = vector_client.query_data(
+                namespace=namespaceModel.namespace, ids=ids_model, columns=["custom_id", "document"])
             que_update_list = [i.document for i in vector_data_list if i.document in ques_list]
             ids_delete_list = [i.custom_id for i in vector_data_list if i.document in ques_list]
             ids_update_list = [i.custom_id for i in vector_data_list if i.custom_id not in ids_delete_list]
@@ -78,37 +78,47 @@ class SpeechText(BaseComposeBot):
             raise BusinessException(ERROR_10301.code, ERROR_10301.message)
         logger.info("SpeechText INFO, request_id={}, Current style namespace info: {}.", self.request_id, styleNamespaceModel)
 
-        # 业务背景知识库中的相关信息
-        bus_ques_docs: list
+        # 一次批量搜索业务背景、风格背景知识库中的相关信息
+        vector_client = get_instance_client()
+        embedding = EmbeddingsModelAdapter().get_model_instance()
         try:
-            bus_ques_docs = get_instance_client().search_data(
-                ques=self.ques,
-                embedding=EmbeddingsModelAdapter().get_model_instance(),
-                namespace=busNamespaceModel.namespace,
+            ques_docs_dict = vector_client.search_data_batch(
+                queries=[self.ques],
+                embedding=embedding,
+                namespaces=[busNamespaceModel.namespace, styleNamespaceModel.namespace],
                 search_top_k=chatBotModel.vector_top_k,
             )
+            bus_ques_docs = ques_docs_dict[busNamespaceModel.namespace][0]
+            style_ques_docs = ques_docs_dict[styleNamespaceModel.namespace][0]
         except Exception as err:
-            logger.error("SpeechText ERROR, [{}]查询业务背景的向量库文档操作失败, request_id={}, message={}.", ERROR_10202, self.request_id, err)
-            raise BusinessException(ERROR_10202.code, ERROR_10202.message)
+            # 批量搜索失败时逐个知识库搜索, 以区分业务背景、风格背景的错误码
+            logger.warning("SpeechText WARN, 批量查询向量库文档失败, 逐个知识库重试, request_id={}, message={}.", self.request_id, err)
+            try:
+                bus_ques_docs = vector_client.search_data(
+                    ques=self.ques,
+                    embedding=embedding,
+                    namespace=busNamespaceModel.namespace,
+                    search_top_k=chatBotModel.vector_top_k,
+                )
+            except Exception as err:
+                logger.error("SpeechText ERROR, [{}]查询业务背景的向量库文档操作失败, request_id={}, message={}.", ERROR_10202, self.request_id, err)
+                raise BusinessException(ERROR_10202.code, ERROR_10202.message)
+            try:
+                style_ques_docs = vector_client.search_data(
+                    ques=self.ques,
+                    embedding=embedding,
+                    namespace=styleNamespaceModel.namespace,
+                    search_top_k=chatBotModel.vector_top_k,
+                )
+            except Exception as err:
+                logger.error("SpeechText ERROR, [{}]查询风格背景的向量库文档操作失败, request_id={}, message={}.", ERROR_10203, self.request_id, err)
+                raise BusinessException(ERROR_10203.code, ERROR_10203.message)
         logger.info("SpeechText INFO, search business vector, request_id={}, vector_top_k=【{}】, bus_ques_docs.length=【{}】",
                     self.request_id, chatBotModel.vector_top_k, len(bus_ques_docs))
         if not bus_ques_docs and len(bus_ques_docs) == 0:
             logger.error("SpeechText ERROR, [{}]查询业务背景的向量库文档不能为空, request_id={}.", ERROR_10204, self.request_id)
             raise BusinessException(ERROR_10204.code, ERROR_10204.message)
-
-        # 业务背景知识库中的相关信息
-        style_ques_docs: list
-        try:
-            style_ques_docs = get_instance_client().search_data(
-                ques=self.ques,
-                embedding=EmbeddingsModelAdapter().get_model_instance(),
-                namespace=styleNamespaceModel.namespace,
-                search_top_k=chatBotModel.vector_top_k,
-            )
-        except Exception as err:
-            logger.error("SpeechText ERROR, [{}]查询风格背景的向量库文档操作失败, request_id={}, message={}.", ERROR_10203, self.request_id, err)
-            raise BusinessException(ERROR_10203.code, ERROR_10203.message)
-        logger.info("SpeechText INFO, search style vector, request_id={}, vector_top_k=【{}】, bus_ques_docs.length=【{}】",
+        logger.info("SpeechText INFO, search style vector, request_id={}, vector_top_k=【{}】, style_ques_docs.length=【{}】",
                     self.request_id, chatBotModel.vector_top_k, len(style_ques_docs))
         if not style_ques_docs and len(style_ques_docs) == 0:
             logger.error("SpeechText ERROR, [{}]查询风格背景的向量库文档不能为空, request_id={}.", ERROR_10205, self.request_id)
@@ -38,6 +38,11 @@ ERROR_10207 = BusinessCode(10207, "指定文件所属知识库标识不匹配")
 ERROR_10208 = BusinessCode(10208, "文件加载异常，参数不全")
 ERROR_10209 = BusinessCode(10209, "知识库文件标识不能为空")
 ERROR_10210 = BusinessCode(10210, "未查询到知识库文件信息")
+ERROR_10211 = BusinessCode(10211, "复制知识库向量数据失败")
+ERROR_10212 = BusinessCode(10212, "保存复制的知识库信息失败")
+ERROR_10213 = BusinessCode(10213, "未查询到知识库快照文件")
+ERROR_10214 = BusinessCode(10214, "目标知识库已存在向量数据")
+ERROR_10215 = BusinessCode(10215, "导入知识库快照失败")
 '''
 演讲稿模块
 '''
@@ -0,0 +1,33 @@
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.base_config import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_POOL_BLOCK
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    获取进程内共享的HTTP会话: 按主机维护keep-alive连接池, 大模型及向量化服务的请求复用连接, 避免每次请求重新建立TCP连接, 不保存Cookie
+    :return: HTTP会话
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    pool_block=HTTP_POOL_BLOCK,
+                )
+                session = requests.Session()
+                # 会话为全部上游服务及用户共享, 不保存响应设置的Cookie, 避免带入其他请求
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
@@ -1,10 +1,12 @@
-from typing import List, Any
+from typing import Any, Dict, List, Optional
 from langchain.base_language import BaseLanguageModel
+from langchain.callbacks.manager import AsyncCallbackManagerForChainRun, CallbackManagerForChainRun
 from langchain.chains.combine_documents.base import BaseCombineDocumentsChain
 from langchain.chains.question_answering import load_qa_chain
 from loguru import logger
 from langchain import LLMChain, PromptTemplate
 from langchain.memory import ConversationBufferMemory
+from langchain.schema import LLMResult
 from custom.amway.allm.chatglm.chatglm import ChatGlmAI
 from custom.amway.amway_config import AMWAY_ENABLED
 from custom.amway.amway_custom import get_memory
@@ -20,6 +22,39 @@ from content.prompt_template_chat import (
 from service.model.chat_history_model import ChatHistoryModel
 
 
+class HistoryLLMChain(LLMChain):
+    """
+    调用大模型时传入历史聊天记录的聊天链: 当前版本的LLMChain不转发调用参数, 历史聊天记录随链(每次请求创建)传入, 共享的大模型实例不携带历史聊天记录
+    """
+    history: Optional[List[List[str]]] = None
+
+    def generate(
+            self,
+            input_list: List[Dict[str, Any]],
+            run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> LLMResult:
+        prompts, stop = self.prep_prompts(input_list, run_manager=run_manager)
+        return self.llm.generate_prompt(
+            prompts, stop, callbacks=run_manager.get_child() if run_manager else None, **self._llm_kwargs()
+        )
+
+    async def agenerate(
+            self,
+            input_list: List[Dict[str, Any]],
+            run_manager: Optional[AsyncCallbackManagerForChainRun] = None,
+    ) -> LLMResult:
+        prompts, stop = await self.aprep_prompts(input_list, run_manager=run_manager)
+        return await self.llm.agenerate_prompt(
+            prompts, stop, callbacks=run_manager.get_child() if run_manager else None, **self._llm_kwargs()
+        )
+
+    def _llm_kwargs(self) -> Dict[str, Any]:
+        # 仅支持history参数的大模型(如ChatGLM、DashScope)传入, 其他大模型会将未知参数发送至接口
+        if self.history and "history" in getattr(self.llm, "__fields__", {}):
+            return {"history": self.history}
+        return {}
+
+
 class ChainModel:
     """
     链式模型
@@ -127,14 +162,15 @@ class ChainModel:
         :param history: 历史聊天记录
         :return: 聊天链实例对象
         """
-        llm = llm if llm else LLMsAdapter().get_model_instance(history=history)
+        llm = llm if llm else LLMsAdapter().get_model_instance()
         if isinstance(llm, ChatGlmAI) or isinstance(llm, DashScopeAI):
             memory, chat_glm_history = cls.init_memory()
-        return LLMChain(
+        return HistoryLLMChain(
             llm=llm,
             prompt=prompt_template,
             verbose=verbose,
             memory=memory,
+            history=history,
         )
 
     @classmethod
@@ -145,6 +181,7 @@ class ChainModel:
             prompt_variables: List[str] = None,
             prefix_prompt_variables: List[str] = None,
             llm: BaseLanguageModel = LLMsAdapter().get_model_instance(),
+            llm_history: List[List[str]] = None,
             **kwargs: Any,
     ) -> BaseCombineDocumentsChain:
         """
@@ -154,6 +191,7 @@ class ChainModel:
         :param prefix_prompt: 提示词前缀信息
         :param prefix_prompt_variables: 提示词前缀占位符
         :param llm: 大模型对象
+        :param llm_history: 调用大模型时传入的历史聊天记录(仅支持history参数的大模型生效)
         :param kwargs: 扩展参数
         :return: 聊天链实例对象
         """
@@ -178,13 +216,13 @@ class ChainModel:
             template=prefix_prompt,
         )
         # 创建链式问答对象
-        return load_qa_chain(
+        return cls.bind_history(load_qa_chain(
             llm=llm,
             chain_type='refine',
             question_prompt=question_prompt,
             refine_prompt=refine_prompt,
             verbose=True,
-        )
+        ), history=llm_history)
 
     @classmethod
     def get_instance_with_stuff(
@@ -193,6 +231,7 @@ class ChainModel:
             prompt_variables: List[str] = None,
             history: List[ChatHistoryModel] = None,
             llm: BaseLanguageModel = LLMsAdapter().get_model_instance(),
+            llm_history: List[List[str]] = None,
             **kwargs: Any,
     ) -> BaseCombineDocumentsChain:
         """
@@ -201,6 +240,7 @@ class ChainModel:
         :param prompt_variables: 提示词占位符
         :param history: 历史聊天记录
         :param llm: 大模型实例对象
+        :param llm_history: 调用大模型时传入的历史聊天记录(仅支持history参数的大模型生效)
         :param kwargs: 扩展参数
         :return: 聊天链实例对象
         """
@@ -218,13 +258,33 @@ class ChainModel:
             memory = cls.init_memory()[0]
         else:
             memory = cls.init_memory(history=history)[0]
-        return load_qa_chain(
+        return cls.bind_history(load_qa_chain(
             llm=llm,
             chain_type='stuff',
             prompt=prompt_template,
             memory=memory,
             verbose=True,
-        )
+        ), history=llm_history)
+
+    @staticmethod
+    def bind_history(
+            chain: BaseCombineDocumentsChain,
+            history: List[List[str]] = None,
+    ) -> BaseCombineDocumentsChain:
+        """
+        将文档问答链内部的LLMChain替换为调用时传入历史聊天记录的HistoryLLMChain
+        :param chain: 文档问答链
+        :param history: 历史聊天记录
+        :return: 文档问答链
+        """
+        if not history:
+            return chain
+        for name in ("llm_chain", "initial_llm_chain", "refine_llm_chain"):
+            llm_chain = getattr(chain, name, None)
+            if isinstance(llm_chain, LLMChain):
+                fields = {field: getattr(llm_chain, field) for field in LLMChain.__fields__}
+                setattr(chain, name, HistoryLLMChain(**fields, history=history))
+        return chain
 
     @staticmethod
     def init_memory(
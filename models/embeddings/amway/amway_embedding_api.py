@@ -1,14 +1,33 @@
 """Wrapper around MosaicML APIs."""
-import time
-from typing import Any, Dict, List, Mapping, Optional
+import json
+from typing import Any, Dict, Iterator, List, Mapping, Optional
 
 import requests
 from loguru import logger
-from pydantic import BaseModel, Extra, root_validator
+from pydantic import BaseModel, Extra, PrivateAttr, root_validator
 
 from langchain.embeddings.base import Embeddings
 from langchain.utils import get_from_dict_or_env
+from framework.util.http_session import get_http_session
 from models.embeddings.amway.amway_embedding_config import *
+from models.embeddings.embedding_executor import EmbeddingExecutor, TokenBucket
+
+# 服务端不支持批量请求时的响应状态码
+BATCH_UNSUPPORTED_STATUS = (400, 404, 405, 415, 422)
+
+
+class BatchNotSupportedError(ValueError):
+    """The embedding endpoint does not accept the list payload."""
+
+
+# 进程内共享: 定时任务的文件向量化及在线问答的问题向量化共用限流及在途请求上限
+_rate_limiter = TokenBucket(rate=RATE_LIMIT, capacity=RATE_BURST)
+_executor = EmbeddingExecutor(
+    max_in_flight=MAX_IN_FLIGHT,
+    max_retries=MAX_RETRIES,
+    backoff=RETRY_BACKOFF,
+    backoff_max=RETRY_BACKOFF_MAX,
+)
 
 
 class AmwayApiEmbeddings(BaseModel, Embeddings):
@@ -33,6 +52,14 @@ class AmwayApiEmbeddings(BaseModel, Embeddings):
     model_name: Optional[str] = DEFAULT_MODEL_NAME
     """Model name to use."""
 
+    batch_size: int = BATCH_SIZE
+    """Max chunks per request; 1 disables batch requests."""
+
+    batch_max_bytes: int = BATCH_MAX_BYTES
+    """Max request body size of a batch request."""
+
+    _batch_supported: Optional[bool] = PrivateAttr(default=None)
+
     class Config:
         """Configuration for this pydantic object."""
 
@@ -63,29 +90,112 @@ class AmwayApiEmbeddings(BaseModel, Embeddings):
             self,
             input: List[str]
     ) -> List[List[float]]:
-        result_list = []
-        temp = 0
-        total = 0
-        for i in input:
+        """Embed all chunks, running the requests concurrently.
+
+        Every request unit is retried by the shared executor and the results
+        are reassembled in input order. A unit that still fails raises, so a
+        chunk is never dropped and texts stay aligned with their vectors.
+        """
+        if self.batch_size <= 1 or self._batch_supported is False:
+            units = [[content] for content in input]
+        else:
+            units = list(self._split_batches(input))
+        return _executor.map(self._embed_unit, units)
+
+    def _embed_unit(
+            self,
+            contents: List[str]
+    ) -> List[List[float]]:
+        if self.batch_size > 1 and self._batch_supported is not False:
             try:
-                total = total + 1
-                if temp == 1000:
-                    logger.info("embeddings request sleep 3s ....")
-                    temp = 0
-                    time.sleep(3)
-                embeddings = self._embed_single(content=i, total=total)
-            except Exception as err:
-                print(err)
-                continue
-            temp = temp + 1
-            result_list.append(embeddings)
-        return result_list
+                embeddings = self._embed_batch(contents=contents)
+                self._batch_supported = True
+                return embeddings
+            except BatchNotSupportedError as err:
+                logger.warning("embeddings batch request not supported, fallback to single request: {}", err)
+                self._batch_supported = False
+        return [self._embed_single(content=content, total=i + 1) for i, content in enumerate(contents)]
+
+    def _split_batches(
+            self,
+            input: List[str]
+    ) -> Iterator[List[str]]:
+        """Group chunks by `batch_size` and `batch_max_bytes`; a chunk larger
+        than the byte limit is sent alone."""
+        batch, size = [], 0
+        for content in input:
+            content_size = len(json.dumps(content, ensure_ascii=False).encode("utf-8")) + 2
+            if batch and (len(batch) >= self.batch_size or size + content_size > self.batch_max_bytes):
+                yield batch
+                batch, size = [], 0
+            batch.append(content)
+            size += content_size
+        if batch:
+            yield batch
+
+    def _embed_batch(
+            self,
+            contents: List[str],
+    ) -> List[List[float]]:
+        """Embed several chunks in one request.
+
+        The batch contract is `{"content_chunks": [...]}` answered with
+        `{"embeddings": [[...], ...]}` in the same order. An endpoint that
+        only knows `content_chunk` rejects the payload with one of
+        `BATCH_UNSUPPORTED_STATUS` or answers with a single vector, which
+        raises `BatchNotSupportedError`. Any other failure, such as a 5xx or
+        429 with a JSON error body, raises `ValueError` and is retried.
+        """
+        _rate_limiter.acquire()
+        headers = {
+            "Content-Type": "application/json",
+        }
+        payload = {
+            "content_chunks": contents,
+        }
+        read_timeout = min(
+            HTTP_REQUEST_READ_TIMEOUT + HTTP_REQUEST_BATCH_READ_TIMEOUT_PER_CHUNK * (len(contents) - 1),
+            HTTP_REQUEST_BATCH_READ_TIMEOUT_MAX,
+        )
+        try:
+            response = get_http_session().post(
+                self.amway_embeddings_api_url,
+                headers=headers,
+                json=payload,
+                timeout=(HTTP_REQUEST_CONN_TIMEOUT, read_timeout)
+            )
+            logger.info("#############Request Amway Embeddings INFO, url={}, batch={}, response={}.",
+                        self.amway_embeddings_api_url, len(contents), response)
+        except requests.exceptions.RequestException as e:
+            raise ValueError(f"Error raised by embedding inference endpoint: {e}")
+
+        if response.status_code in BATCH_UNSUPPORTED_STATUS:
+            raise BatchNotSupportedError(f"status={response.status_code}, response={response.text[:200]}")
+        if not response.ok:
+            raise ValueError(f"Error raised by inference API: status={response.status_code}, "
+                             f"response={response.text[:200]}")
+        try:
+            parsed_response = response.json()
+        except requests.exceptions.JSONDecodeError as e:
+            raise ValueError(
+                f"Error raised by inference API: {e}.\nResponse: {response.text}"
+            )
+        embeddings = parsed_response.get("embeddings") if isinstance(parsed_response, dict) else None
+        if isinstance(embeddings, list) and embeddings \
+                and all(isinstance(e, (int, float)) and not isinstance(e, bool) for e in embeddings):
+            raise BatchNotSupportedError(f"Single vector answered to a batch request, dimensions={len(embeddings)}")
+        if not isinstance(embeddings, list) or not all(isinstance(e, list) for e in embeddings):
+            raise ValueError(f"Unexpected batch response: {str(parsed_response)[:200]}")
+        if len(embeddings) != len(contents):
+            raise ValueError(f"Batch response size mismatch, chunks={len(contents)}, embeddings={len(embeddings)}")
+        return embeddings
 
     def _embed_single(
             self,
             content: str,
             total: int,
     ) -> List[float]:
+        _rate_limiter.acquire()
         # HTTP headers for authorization
         headers = {
             # "Authorization": f"{self.amway_embeddings_api_key}",
@@ -98,7 +208,7 @@ class AmwayApiEmbeddings(BaseModel, Embeddings):
             # "model_name": self.model_name,
             }
         try:
-            response = requests.post(
+            response = get_http_session().post(
                 self.amway_embeddings_api_url,
                 headers=headers,
                 json=payload,
@@ -9,3 +9,19 @@ DEFAULT_MODEL_URL = "http://10.143.33.239:8003/embeddings"
 
 HTTP_REQUEST_CONN_TIMEOUT = 3
 HTTP_REQUEST_READ_TIMEOUT = 5
+# 批量请求的读超时: 在单条请求读超时的基础上按每多一个Chunk递增(秒), 不超过上限(秒)
+HTTP_REQUEST_BATCH_READ_TIMEOUT_PER_CHUNK = 1
+HTTP_REQUEST_BATCH_READ_TIMEOUT_MAX = 60
+
+# 批量请求: 单次请求的最大Chunk数量(1为逐条请求)、最大请求体字节数, 服务端不支持批量时自动回退为逐条请求
+BATCH_SIZE = int(os.environ.get("AMWAY_EMBEDDING_BATCH_SIZE") or 32)
+BATCH_MAX_BYTES = int(os.environ.get("AMWAY_EMBEDDING_BATCH_MAX_BYTES") or 256 * 1024)
+# 并发请求: 同时在途的请求数量上限
+MAX_IN_FLIGHT = int(os.environ.get("AMWAY_EMBEDDING_MAX_IN_FLIGHT") or 4)
+# 令牌桶限流(进程内共享, 含定时任务及在线问答): 每秒请求数、突发请求数
+RATE_LIMIT = float(os.environ.get("AMWAY_EMBEDDING_RATE_LIMIT") or 20)
+RATE_BURST = int(os.environ.get("AMWAY_EMBEDDING_RATE_BURST") or 10)
+# 失败重试: 重试次数、指数退避的初始及最大等待秒数(带随机抖动)
+MAX_RETRIES = int(os.environ.get("AMWAY_EMBEDDING_MAX_RETRIES") or 3)
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_MAX = 8
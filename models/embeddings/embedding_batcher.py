@@ -0,0 +1,161 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from langchain.embeddings.base import Embeddings
+from loguru import logger
+
+from config.base_config import (
+    EMBEDDING_QUERY_BATCH_ENABLED,
+    EMBEDDING_QUERY_BATCH_MAX_WAIT_MS,
+    EMBEDDING_QUERY_BATCH_MAX_SIZE,
+    EMBEDDING_QUERY_BATCH_MAX_IN_FLIGHT,
+)
+
+
+class QueryBatcher:
+    """
+    跨请求的查询向量化微批处理: 收集并发的embed_query调用, 凑满批大小或等待超时后合并为一次批量请求, 再分别返回各调用方的结果
+    """
+
+    def __init__(
+            self,
+            embedding: Embeddings,
+            max_wait_ms: float = EMBEDDING_QUERY_BATCH_MAX_WAIT_MS,
+            max_batch_size: int = EMBEDDING_QUERY_BATCH_MAX_SIZE,
+            max_in_flight: int = EMBEDDING_QUERY_BATCH_MAX_IN_FLIGHT,
+    ):
+        """
+        构造函数
+        :param embedding: 实际的Embeddings模型, 使用其embed_documents发送批量请求
+        :param max_wait_ms: 首个查询入队后最多等待的毫秒数
+        :param max_batch_size: 单批最多合并的查询数
+        :param max_in_flight: 同时在途的批量请求数上限
+        """
+        self.embedding = embedding
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self._queue: List[Tuple[str, Future]] = []
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="embedding-query")
+        self._worker = None
+        self._metrics = {"queries": 0, "batches": 0, "texts": 0, "errors": 0}
+
+    def submit(self, text: str) -> Future:
+        """
+        提交一条查询文本
+        :param text: 查询文本
+        :return: 向量的Future
+        """
+        future = Future()
+        with self._cond:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-query-batcher", daemon=True)
+                self._worker.start()
+            self._queue.append((text, future))
+            self._metrics["queries"] += 1
+            self._cond.notify()
+        return future
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                # 首个查询入队后开始计时, 凑满一批或超时即发送
+                deadline = time.monotonic() + self.max_wait
+                while len(self._queue) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[:self.max_batch_size]
+                del self._queue[:self.max_batch_size]
+            self._pool.submit(self._flush, batch)
+
+    def _flush(self, batch: List[Tuple[str, Future]]) -> None:
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = dict(zip(texts, self.embedding.embed_documents(texts)))
+            if len(vectors) != len(texts):
+                raise ValueError(f"向量化结果数量不一致, texts={len(texts)}, vectors={len(vectors)}")
+        except Exception as err:
+            logger.error("######QueryBatcher flush ERROR, size={}, err={}", len(batch), err)
+            with self._cond:
+                self._metrics["errors"] += 1
+            for _, future in batch:
+                future.set_exception(err)
+            return
+        with self._cond:
+            self._metrics["batches"] += 1
+            self._metrics["texts"] += len(texts)
+        for text, future in batch:
+            future.set_result(vectors[text])
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        微批处理统计信息
+        :return: 查询数、批次数、实际请求的文本数、失败批次数、平均批大小
+        """
+        with self._cond:
+            metrics = dict(self._metrics)
+        metrics["avg_batch_size"] = metrics["texts"] / metrics["batches"] if metrics["batches"] else 0.0
+        return metrics
+
+
+class MicroBatchEmbeddings(Embeddings):
+    """
+    查询向量化经微批处理合并发送的Embeddings包装, 文档向量化直接透传
+    """
+
+    def __init__(
+            self,
+            embedding: Embeddings,
+            batcher: QueryBatcher,
+    ):
+        """
+        构造函数
+        :param embedding: 实际的Embeddings模型
+        :param batcher: 查询微批处理器
+        """
+        self.embedding = embedding
+        self.batcher = batcher
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embedding.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.batcher.submit(text).result()
+
+
+_query_batchers: Dict[str, QueryBatcher] = {}
+_query_batchers_lock = threading.Lock()
+
+
+def get_query_batcher(
+        model: str,
+        embedding: Embeddings,
+) -> QueryBatcher:
+    """
+    获取进程内按模型共享的查询微批处理器, 首次获取时以传入的模型实例创建
+    :param model: 模型版本标识
+    :param embedding: 实际的Embeddings模型
+    :return: 查询微批处理器, 未开启微批处理时为None
+    """
+    if not EMBEDDING_QUERY_BATCH_ENABLED:
+        return None
+    with _query_batchers_lock:
+        if model not in _query_batchers:
+            _query_batchers[model] = QueryBatcher(embedding=embedding)
+        return _query_batchers[model]
+
+
+def query_batcher_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    全部查询微批处理器的统计信息
+    :return: 模型版本标识 -> 统计信息
+    """
+    with _query_batchers_lock:
+        batchers = dict(_query_batchers)
+    return {model: batcher.stats() for model, batcher in batchers.items()}
@@ -0,0 +1,241 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+from loguru import logger
+
+from config.base_config import (
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_BYTES,
+)
+from models.embeddings.embedding_hash import content_hash
+
+# 单条缓存的固定开销估算(键、索引、行头), 单位字节
+ENTRY_OVERHEAD_BYTES = 128
+# 批量查询时单条SQL的参数数量上限(SQLite默认999)
+LOOKUP_BATCH_SIZE = 500
+# 淘汰时清理至容量上限的比例, 避免每次写入都触发淘汰
+EVICT_TARGET_RATIO = 0.9
+# 命中时的访问时间先记录在内存中, 累计条数或距上次写回的秒数达到阈值时(及写入缓存时)批量写回
+ACCESS_FLUSH_ROWS = 1000
+ACCESS_FLUSH_INTERVAL = 60
+
+
+class EmbeddingCache:
+    """
+    本地持久化向量缓存(SQLite): 键为 模型版本标识 + 文本sha256, 值为float32向量, 超过容量上限时按最近访问时间淘汰
+    """
+
+    def __init__(
+            self,
+            path: str = EMBEDDING_CACHE_PATH,
+            max_bytes: int = EMBEDDING_CACHE_MAX_BYTES,
+    ):
+        """
+        构造函数
+        :param path: SQLite文件路径
+        :param max_bytes: 容量上限(字节)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._bytes = 0
+        self._accessed: Dict[Tuple[str, str], float] = {}
+        self._accessed_flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                "model TEXT NOT NULL, content_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "size INTEGER NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (model, content_hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_embedding_cache_accessed ON embedding_cache (accessed)")
+            conn.commit()
+            self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM embedding_cache").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get_many(
+            self,
+            model: str,
+            hashes: Sequence[str],
+    ) -> Dict[str, List[float]]:
+        """
+        批量查询缓存, 命中的条目刷新访问时间(在内存中累计后批量写回)
+        :param model: 模型版本标识
+        :param hashes: 文本哈希列表
+        :return: 命中的 文本哈希 -> 向量
+        """
+        hashes = list(dict.fromkeys(hashes))
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            for offset in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+                batch = hashes[offset:offset + LOOKUP_BATCH_SIZE]
+                rows = conn.execute(
+                    f"SELECT content_hash, vector FROM embedding_cache "
+                    f"WHERE model = ? AND content_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch],
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32).tolist()
+            if found:
+                now = time.time()
+                for key in found:
+                    self._accessed[(model, key)] = now
+                if len(self._accessed) >= ACCESS_FLUSH_ROWS \
+                        or time.monotonic() - self._accessed_flushed_at >= ACCESS_FLUSH_INTERVAL:
+                    self._flush_accessed(conn)
+                    conn.commit()
+            self._metrics["hits"] += len(found)
+            self._metrics["misses"] += len(hashes) - len(found)
+        return found
+
+    def put_many(
+            self,
+            model: str,
+            vectors: Dict[str, List[float]],
+    ) -> None:
+        """
+        批量写入缓存, 超过容量上限时淘汰最久未访问的条目
+        :param model: 模型版本标识
+        :param vectors: 文本哈希 -> 向量
+        :return: None
+        """
+        now = time.time()
+        rows = []
+        for key, vector in vectors.items():
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((model, key, blob, len(blob) + ENTRY_OVERHEAD_BYTES, now))
+        with self._lock:
+            conn = self._connect()
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO embedding_cache (model, content_hash, vector, size, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            written = conn.total_changes - before
+            # 与写入同一事务写回访问时间, 淘汰按最新的访问时间进行
+            self._flush_accessed(conn)
+            conn.commit()
+            self._metrics["writes"] += written
+            self._bytes += written * (rows[0][3] if rows else 0)
+            if self._bytes > self.max_bytes:
+                self._evict(conn)
+
+    def _flush_accessed(self, conn: sqlite3.Connection) -> None:
+        if self._accessed:
+            conn.executemany(
+                "UPDATE embedding_cache SET accessed = ? WHERE model = ? AND content_hash = ?",
+                [(accessed, model, key) for (model, key), accessed in self._accessed.items()],
+            )
+            self._accessed.clear()
+        self._accessed_flushed_at = time.monotonic()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM embedding_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            self._bytes = total
+            return
+        # 按访问时间顺序累计, 找到需淘汰的最晚访问时间
+        threshold, freed = None, 0
+        for accessed, size in conn.execute("SELECT accessed, size FROM embedding_cache ORDER BY accessed"):
+            threshold, freed = accessed, freed + size
+            if total - freed <= target:
+                break
+        evicted = conn.execute("DELETE FROM embedding_cache WHERE accessed <= ?", (threshold,)).rowcount
+        conn.commit()
+        self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM embedding_cache").fetchone()[0]
+        self._metrics["evictions"] += evicted
+        logger.info("######EmbeddingCache evict INFO, evicted={}, bytes={}.", evicted, self._bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        缓存统计信息
+        :return: 命中、未命中、写入、淘汰次数, 命中率, 条数及字节数
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["entries"] = self._connect().execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+            metrics["bytes"] = self._bytes
+            metrics["max_bytes"] = self.max_bytes
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics["hit_rate"] = metrics["hits"] / lookups if lookups else 0.0
+        return metrics
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._flush_accessed(self._conn)
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    带本地持久化缓存的Embeddings包装: 批量查询缓存, 只将未命中的文本发送至向量化服务
+    """
+
+    def __init__(
+            self,
+            embedding: Embeddings,
+            cache: EmbeddingCache,
+            model: str,
+    ):
+        """
+        构造函数
+        :param embedding: 实际的Embeddings模型
+        :param cache: 向量缓存
+        :param model: 模型版本标识
+        """
+        self.embedding = embedding
+        self.cache = cache
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [content_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model, hashes)
+        misses = list(dict.fromkeys(key for key in hashes if key not in vectors))
+        if misses:
+            texts_by_hash = dict(zip(hashes, texts))
+            embedded = self.embedding.embed_documents([texts_by_hash[key] for key in misses])
+            if len(embedded) != len(misses):
+                raise ValueError(f"向量化结果数量不一致, texts={len(misses)}, vectors={len(embedded)}")
+            embedded = dict(zip(misses, embedded))
+            self.cache.put_many(self.model, embedded)
+            vectors.update(embedded)
+        return [vectors[key] for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = content_hash(text)
+        vector = self.cache.get_many(self.model, [key]).get(key)
+        if vector is None:
+            vector = self.embedding.embed_query(text)
+            self.cache.put_many(self.model, {key: vector})
+        return vector
+
+
+_embedding_cache = EmbeddingCache()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    获取进程内的本地向量缓存
+    :return: 向量缓存, 未开启缓存时为None
+    """
+    return _embedding_cache if EMBEDDING_CACHE_ENABLED else None
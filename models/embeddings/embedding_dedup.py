@@ -0,0 +1,181 @@
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import sqlalchemy
+from langchain.embeddings.base import Embeddings
+from loguru import logger
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import insert
+
+from config.base_config import (
+    PGVECTOR_DRIVER,
+    PGVECTOR_HOST,
+    PGVECTOR_PORT,
+    PGVECTOR_DATABASE,
+    PGVECTOR_USER,
+    PGVECTOR_PASSWORD,
+    PGVECTOR_DIMENSIONS,
+    EMBEDDING_DEDUP_ENABLED,
+    EMBEDDING_DEDUP_BATCH_SIZE,
+)
+from models.embeddings.embedding_hash import content_hash
+from models.vectordatabase.custom.custom_pgvector import PGVector, get_engine
+
+_metadata = sqlalchemy.MetaData()
+
+embedding_dedup_table = sqlalchemy.Table(
+    "langchain_pg_embedding_dedup",
+    _metadata,
+    sqlalchemy.Column("model", sqlalchemy.String(255), primary_key=True),
+    sqlalchemy.Column("content_hash", sqlalchemy.String(64), primary_key=True),
+    sqlalchemy.Column("embedding", Vector(PGVECTOR_DIMENSIONS), nullable=False),
+    sqlalchemy.Column("created_at", sqlalchemy.DateTime, server_default=sqlalchemy.func.now()),
+)
+
+
+class EmbeddingDedupStore:
+    """
+    内容哈希 -> 向量 的去重存储(Postgres), 按模型版本隔离, 跨文件、跨知识库复用已向量化的Chunk
+    """
+
+    def __init__(
+            self,
+            connection_string: str,
+            batch_size: int = EMBEDDING_DEDUP_BATCH_SIZE,
+    ):
+        """
+        构造函数
+        :param connection_string: Postgres连接串
+        :param batch_size: 单次批量查询、写入的数量
+        """
+        self.connection_string = connection_string
+        self.batch_size = batch_size
+        self._created = False
+        self._lock = threading.Lock()
+
+    def _engine(self) -> sqlalchemy.engine.Engine:
+        engine = get_engine(self.connection_string)
+        if not self._created:
+            with self._lock:
+                if not self._created:
+                    _metadata.create_all(engine)
+                    self._created = True
+        return engine
+
+    def lookup(
+            self,
+            model: str,
+            hashes: Sequence[str],
+    ) -> Dict[str, List[float]]:
+        """
+        批量查询已存储的向量
+        :param model: 模型版本标识
+        :param hashes: 内容哈希列表
+        :return: 命中的 内容哈希 -> 向量
+        """
+        found = {}
+        hashes = list(hashes)
+        with self._engine().connect() as conn:
+            for offset in range(0, len(hashes), self.batch_size):
+                rows = conn.execute(
+                    sqlalchemy.select(embedding_dedup_table.c.content_hash, embedding_dedup_table.c.embedding)
+                    .where(embedding_dedup_table.c.model == model)
+                    .where(embedding_dedup_table.c.content_hash.in_(hashes[offset:offset + self.batch_size]))
+                )
+                for row in rows:
+                    found[row.content_hash] = [float(value) for value in row.embedding]
+        return found
+
+    def save(
+            self,
+            model: str,
+            vectors: Dict[str, List[float]],
+    ) -> None:
+        """
+        批量写入向量, 已存在的哈希忽略
+        :param model: 模型版本标识
+        :param vectors: 内容哈希 -> 向量
+        :return: None
+        """
+        items = list(vectors.items())
+        with self._engine().begin() as conn:
+            for offset in range(0, len(items), self.batch_size):
+                conn.execute(
+                    insert(embedding_dedup_table)
+                    .values([
+                        {"model": model, "content_hash": key, "embedding": vector}
+                        for key, vector in items[offset:offset + self.batch_size]
+                    ])
+                    .on_conflict_do_nothing(index_elements=["model", "content_hash"])
+                )
+
+
+class DedupEmbeddings(Embeddings):
+    """
+    带内容哈希去重的Embeddings包装: 先批量查询去重存储, 只将未命中的Chunk发送至向量化服务
+    """
+
+    def __init__(
+            self,
+            embedding: Embeddings,
+            store: EmbeddingDedupStore,
+            model: str,
+    ):
+        """
+        构造函数
+        :param embedding: 实际的Embeddings模型
+        :param store: 去重存储
+        :param model: 模型版本标识, 模型或版本变更后不复用旧向量
+        """
+        self.embedding = embedding
+        self.store = store
+        self.model = model
+        self.stats = {"total": 0, "unique": 0, "hits": 0, "embedded": 0, "dedup_ratio": 0.0}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [content_hash(text) for text in texts]
+        unique = dict(zip(hashes, texts))
+        vectors = self.store.lookup(self.model, list(unique)) if unique else {}
+        misses = [key for key in unique if key not in vectors]
+        if misses:
+            embedded = self.embedding.embed_documents([unique[key] for key in misses])
+            if len(embedded) != len(misses):
+                raise ValueError(f"向量化结果数量不一致, texts={len(misses)}, vectors={len(embedded)}")
+            embedded = dict(zip(misses, embedded))
+            self.store.save(self.model, embedded)
+            vectors.update(embedded)
+        self._record(total=len(texts), unique=len(unique), embedded=len(misses))
+        return [vectors[key] for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedding.embed_query(text)
+
+    def _record(self, total: int, unique: int, embedded: int) -> None:
+        stats = self.stats
+        stats["total"] += total
+        stats["unique"] += unique
+        stats["hits"] += unique - embedded
+        stats["embedded"] += embedded
+        stats["dedup_ratio"] = round(1 - stats["embedded"] / stats["total"], 4) if stats["total"] else 0.0
+        logger.info("######DedupEmbeddings embed_documents INFO, model={}, total={}, unique={}, embedded={}.",
+                    self.model, total, unique, embedded)
+
+
+_embedding_dedup_store = EmbeddingDedupStore(
+    connection_string=PGVector.connection_string_from_db_params(
+        driver=PGVECTOR_DRIVER,
+        host=PGVECTOR_HOST,
+        port=PGVECTOR_PORT,
+        database=PGVECTOR_DATABASE,
+        user=PGVECTOR_USER,
+        password=PGVECTOR_PASSWORD,
+    )
+)
+
+
+def get_embedding_dedup_store() -> Optional[EmbeddingDedupStore]:
+    """
+    获取进程内的向量去重存储
+    :return: 去重存储, 未开启去重时为None
+    """
+    return _embedding_dedup_store if EMBEDDING_DEDUP_ENABLED else None
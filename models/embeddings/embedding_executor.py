@@ -0,0 +1,135 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Sequence, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class TokenBucket:
+    """
+    令牌桶限流器(线程安全): 按固定速率补充令牌, 允许不超过容量的突发请求
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            capacity: int,
+    ):
+        """
+        构造函数
+        :param rate: 每秒补充的令牌数, 小于等于0时不限流
+        :param capacity: 令牌桶容量(突发请求数)
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        获取令牌, 令牌不足时阻塞等待
+        :param tokens: 令牌数
+        :return: 等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class EmbeddingExecutor:
+    """
+    向量化请求执行器: 线程池并发执行, 失败按指数退避加随机抖动重试, 结果按提交顺序拼装
+    在途请求数由信号量限制, 含在调用方线程执行的单个单元, 进程内全部请求合计不超过上限
+    重试耗尽时抛出异常, 不丢弃任何失败的Chunk, 保证文本与向量一一对应
+    """
+
+    def __init__(
+            self,
+            max_in_flight: int,
+            max_retries: int,
+            backoff: float,
+            backoff_max: float,
+    ):
+        """
+        构造函数
+        :param max_in_flight: 在途请求数上限
+        :param max_retries: 单个请求的重试次数
+        :param backoff: 首次重试的退避秒数
+        :param backoff_max: 退避秒数上限
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="embedding")
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+
+    def map(
+            self,
+            func: Callable[[T], List[R]],
+            units: Sequence[T],
+    ) -> List[R]:
+        """
+        并发执行全部请求单元, 按单元顺序拼装结果; 单个单元时在当前线程执行
+        :param func: 请求函数, 返回该单元的结果列表
+        :param units: 请求单元
+        :return: 拼装后的结果
+        """
+        if len(units) == 1:
+            return list(self.call(func, units[0]))
+        futures = [self._pool.submit(self.call, func, unit) for unit in units]
+        results = []
+        try:
+            for future in futures:
+                results.extend(future.result())
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return results
+
+    def call(
+            self,
+            func: Callable[[T], R],
+            unit: T,
+    ) -> R:
+        """
+        执行单个请求单元, 失败时重试; 每次请求占用一个在途名额, 退避等待时释放
+        :param func: 请求函数
+        :param unit: 请求单元
+        :return: 请求结果
+        """
+        attempt = 0
+        while True:
+            try:
+                with self._in_flight:
+                    return func(unit)
+            except Exception as err:
+                if attempt >= self.max_retries:
+                    raise ValueError(f"Embedding request failed after {attempt + 1} attempts: {err}") from err
+                # Full jitter: 在[0, 退避上限]内随机等待, 避免并发请求同时重试
+                delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+                logger.warning("######EmbeddingExecutor retry INFO, attempt={}, delay={:.2f}s, err={}",
+                               attempt + 1, delay, err)
+                time.sleep(delay)
+                attempt += 1
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
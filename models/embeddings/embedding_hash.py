@@ -0,0 +1,10 @@
+import hashlib
+
+
+def content_hash(text: str) -> str:
+    """
+    计算文本内容的哈希值, 向量去重存储及本地向量缓存的键
+    :param text: 文本
+    :return: sha256十六进制字符串
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
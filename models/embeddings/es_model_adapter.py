@@ -1,11 +1,20 @@
 # -*- coding: utf-8 -*-
+import threading
+from typing import Dict
 
 from config.base_config import *
+from langchain.embeddings.base import Embeddings
 from langchain.embeddings.openai import OpenAIEmbeddings
 from loguru import logger
 
 from framework.business_except import BusinessException
 from models.embeddings.amway.amway_embedding_api import AmwayApiEmbeddings
+from models.embeddings.embedding_batcher import MicroBatchEmbeddings, get_query_batcher
+from models.embeddings.embedding_cache import CachedEmbeddings, get_embedding_cache
+
+# 进程内共享的Embeddings模型实例, 按模型版本标识缓存
+_embedding_instances: Dict[str, Embeddings] = {}
+_embedding_instances_lock = threading.Lock()
 
 
 class EmbeddingsModelAdapter:
@@ -22,7 +31,28 @@ class EmbeddingsModelAdapter:
             model_type: str = default_model_type
     ):
         """
-        获取Embeddings稀疏值模型实例
+        获取Embeddings稀疏值模型实例: 复用进程内共享的实例, 按配置包装查询微批处理及本地向量缓存
+        :param model: 模型
+        :param model_type: 数据集类型
+        :return: 模型实例
+        """
+        model_version = self.get_model_version(model=model, model_type=model_type)
+        with _embedding_instances_lock:
+            embedding = _embedding_instances.get(model_version)
+            if embedding is None:
+                embedding = self.__create_model_instance(model=model, model_type=model_type)
+                if embedding is None:
+                    return None
+                _embedding_instances[model_version] = embedding
+        return embedding
+
+    def __create_model_instance(
+            self,
+            model: str,
+            model_type: str
+    ) -> Embeddings:
+        """
+        创建Embeddings稀疏值模型实例
         :param model: 模型
         :param model_type: 数据集类型
         :return: 模型实例
@@ -30,9 +60,9 @@ class EmbeddingsModelAdapter:
         try:
             if model == "OpenAI":
                 if model_type == "text-embedding-ada-002":
-                    return OpenAIEmbeddings(openai_api_key=self.openai_api_key)
+                    return self.__wrap(OpenAIEmbeddings(openai_api_key=self.openai_api_key), model, model_type)
             elif model == "AmwayMoss":
-                return AmwayApiEmbeddings()
+                return self.__wrap(AmwayApiEmbeddings(), model, model_type)
             else:
                 """
                 TODO 其他类型的embeddings model
@@ -40,3 +70,34 @@ class EmbeddingsModelAdapter:
         except Exception as err:
             logger.error("######[10100]EmbeddingsModelAdapter model[{}] invoke error: {}", model, err)
             raise BusinessException(10100, "Embedding对象初始化失败！")
+
+    def __wrap(
+            self,
+            embedding: Embeddings,
+            model: str,
+            model_type: str
+    ) -> Embeddings:
+        # 缓存在外层: 命中缓存的查询无需进入微批处理等待
+        model_version = self.get_model_version(model=model, model_type=model_type)
+        query_batcher = get_query_batcher(model=model_version, embedding=embedding)
+        if query_batcher:
+            embedding = MicroBatchEmbeddings(embedding=embedding, batcher=query_batcher)
+        embedding_cache = get_embedding_cache()
+        if embedding_cache:
+            embedding = CachedEmbeddings(embedding=embedding, cache=embedding_cache, model=model_version)
+        return embedding
+
+    def get_model_version(
+            self,
+            model: str = default_model,
+            model_type: str = default_model_type
+    ) -> str:
+        """
+        获取Embeddings模型版本标识, 用于向量化去重存储的隔离
+        :param model: 模型
+        :param model_type: 数据集类型
+        :return: 模型版本标识
+        """
+        if model == "AmwayMoss":
+            model_type = AmwayApiEmbeddings.__fields__["model_name"].default
+        return f"{model}:{model_type}:{EMBEDDING_DEDUP_MODEL_VERSION}"
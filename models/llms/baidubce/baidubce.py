@@ -1,5 +1,5 @@
 from typing import Any, List, Mapping, Optional, Dict
-import requests
+from framework.util.http_session import get_http_session
 import json
 from loguru import logger
 from langchain.callbacks.manager import CallbackManagerForLLMRun
@@ -41,7 +41,7 @@ class BaidubceAI(LLM):
         }
         payload = ""
         logger.info("###BaidubceAI get_access_token request INFO, url={}, body={}.", self.access_token_url, payload)
-        response = requests.post(url=self.access_token_url, data=payload, headers=headers)
+        response = get_http_session().post(url=self.access_token_url, data=payload, headers=headers)
         logger.info("###BaidubceAI get_access_token request INFO, response={}.", response.text)
         if "error" in response.text:
             logger.error("###BaidubceAI get_access_token request ERROR, code={}, message={}.", ERROR_10901, response.text)
@@ -59,7 +59,7 @@ class BaidubceAI(LLM):
             "penalty_score": self.penalty_score,
         }
         logger.info("###BaidubceAI chat request INFO, url={}, ques={}, body={}.", chat_url, prompt, body)
-        response = requests.post(url=chat_url, data=json.dumps(body), headers=headers)
+        response = get_http_session().post(url=chat_url, data=json.dumps(body), headers=headers)
         response_json = response.json()
         logger.info("###BaidubceAI chat request INFO, response={}.", response_json)
         # 千帆业务异常
@@ -85,9 +85,11 @@ class BaidubceAI(LLM):
                 retry = v
                 break
 
+        # 历史聊天记录优先取调用参数, 共享的模型实例不保存请求状态
+        history = kwargs.get("history", self.history)
         messages = []
-        if self.history and len(self.history) > 0 and retry:
-            for h in self.history[::-1]:
+        if history and len(history) > 0 and retry:
+            for h in history[::-1]:
                 messages.append({
                     "role": "user",
                     "content": h[0]
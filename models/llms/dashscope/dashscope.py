@@ -1,5 +1,5 @@
 from typing import Any, List, Mapping, Optional
-import requests
+from framework.util.http_session import get_http_session
 from loguru import logger
 from langchain.callbacks.manager import CallbackManagerForLLMRun
 from langchain.llms.base import LLM
@@ -39,9 +39,11 @@ class DashScopeAI(LLM):
                 retry = v
                 break
 
+        # 历史聊天记录优先取调用参数, 共享的模型实例不保存请求状态
+        history = kwargs.get("history", self.history)
         messages = []
-        if self.history and len(self.history) > 0:
-            for h in self.history:
+        if history and len(history) > 0:
+            for h in history:
                 messages.append({
                     "role": "user",
                     "content": h[0],
@@ -64,7 +66,7 @@ class DashScopeAI(LLM):
             },
         }
         logger.info("#############Request DashScope LLMs INFO, url={}, headers={}, json={}.", self.url, headers, json)
-        response = requests.post(url=self.url, headers=headers, json=json)
+        response = get_http_session().post(url=self.url, headers=headers, json=json)
         response_json = response.json()
         logger.info("#############Request DashScope LLMs INFO, httpstatus={}, response={}.", response.status_code, response_json)
 
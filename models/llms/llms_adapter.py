@@ -1,4 +1,5 @@
-from typing import List
+import threading
+from typing import Dict
 
 from langchain.base_language import BaseLanguageModel
 from langchain.chat_models import ChatOpenAI
@@ -17,6 +18,10 @@ from custom.amway.amway_config import (
     AI_BC_MODEL_BASE_URL,
 )
 
+# 进程内共享的大模型实例, 按模型标识缓存(模型参数均来自配置)
+_llm_instances: Dict[str, BaseLanguageModel] = {}
+_llm_instances_lock = threading.Lock()
+
 
 class LLMsAdapter:
     """
@@ -33,12 +38,24 @@ class LLMsAdapter:
         """
         self.model = model
 
-    def get_model_instance(
-            self,
-            history: List[List[str]] = None
-    ) -> BaseLanguageModel:
+    def get_model_instance(self) -> BaseLanguageModel:
+        """
+        获取指定的大语言模型实例: 复用进程内共享的实例(HTTP连接池随之复用)
+        共享实例不携带历史聊天记录, 历史聊天记录在调用时以history参数传入, 如llm(prompt, history=history)
+        :return: 模型实例
+        """
+        with _llm_instances_lock:
+            llm = _llm_instances.get(self.model)
+            if llm is None:
+                llm = self.__create_model_instance()
+                if llm is None:
+                    return None
+                _llm_instances[self.model] = llm
+        return llm
+
+    def __create_model_instance(self) -> BaseLanguageModel:
         """
-        获取指定的大语言模型实例
+        创建指定的大语言模型实例
         :return: 模型实例
         """
         if self.model == "OpenAI":
@@ -61,13 +78,13 @@ class LLMsAdapter:
         elif self.model == "Moss":
             return Moss()
         elif self.model == "ChatGLM":
-            return ChatGlmAI(history=history)
+            return ChatGlmAI()
         elif self.model == "ChatGLM3":
-            return ChatGlm3AI(history=history)
+            return ChatGlm3AI()
         elif self.model == "Baidubce":
-            return BaidubceAI(history=history)
+            return BaidubceAI()
         elif self.model == "DashScope":
-            return DashScopeAI(history=history)
+            return DashScopeAI()
         else:
             """
             TODO 其他类型的LLMs
@@ -1,14 +1,37 @@
+import hashlib
 from abc import ABC, abstractmethod
-from typing import (Dict, Any, List, Tuple)
+from typing import (Dict, Any, Iterable, List, Sequence, Tuple)
 from langchain.docstore.document import Document
 from langchain.embeddings.base import Embeddings
-from models.vectordatabase.custom.custom_pgvector import EmbeddingStore
+
+
+def uuid_fingerprint(uuids: Iterable[Any]) -> str:
+    """
+    计算向量数据的指纹: uuid文本升序以逗号拼接后的md5
+    :param uuids: 向量数据的uuid
+    :return: 指纹
+    """
+    return hashlib.md5(",".join(sorted(str(value) for value in uuids)).encode("utf-8")).hexdigest()
 
 
 class BaseVectorClient(ABC):
     """
     向量库客户端
     """
+    def init_client(self) -> None:
+        """
+        初始化客户端(如建立连接池、初始化表结构), 应用启动时调用一次
+        :return: None
+        """
+        pass
+
+    def close_client(self) -> None:
+        """
+        释放客户端资源(如关闭连接池), 应用关闭时调用
+        :return: None
+        """
+        pass
+
     @abstractmethod
     def delete_data(
             self,
@@ -23,7 +46,7 @@ class BaseVectorClient(ABC):
         :param ids: 向量标识
         :param delete_all: 是否全部删除
         :param kwargs: 扩展参数
-        :return: 未删除成功的ids
+        :return: 删除结果, deleted为删除的向量数量
         """
         pass
 
@@ -32,15 +55,45 @@ class BaseVectorClient(ABC):
             self,
             namespace: str = None,
             ids: list[str] = None,
-    ) -> List[EmbeddingStore]:
+            columns: Sequence[str] = None,
+            limit: int = None,
+            after: str = None,
+            stream: bool = False,
+    ) -> Iterable[Any]:
         """
-        删除向量数据
+        查询向量数据
         :param namespace: 命名空间标识
-        :param ids: 向量标识
-        :return: 未删除成功的ids
+        :param ids: 向量标识, 为空时查询命名空间的全部数据
+        :param columns: 查询列(uuid, collection_id, custom_id, document, cmetadata, embedding), 为空时不含向量列
+        :param limit: 分页大小, 按custom_id排序
+        :param after: 上一页最后一条数据的custom_id
+        :param stream: 是否以游标流式返回
+        :return: 向量数据行(按列名属性访问)
         """
         pass
 
+    def count_data(
+            self,
+            namespace: str
+    ) -> int:
+        """
+        统计命名空间的向量数量
+        :param namespace: 命名空间标识
+        :return: 向量数量
+        """
+        return sum(1 for _ in self.query_data(namespace=namespace, columns=["custom_id"], stream=True))
+
+    def fingerprint_data(
+            self,
+            namespace: str
+    ) -> str:
+        """
+        计算命名空间向量数据的指纹(见uuid_fingerprint), 每次写入的数据都有新的uuid, 数据有任何写入或删除时指纹改变
+        :param namespace: 命名空间标识
+        :return: 指纹
+        """
+        return uuid_fingerprint(row.uuid for row in self.query_data(namespace=namespace, columns=["uuid"], stream=True))
+
     @abstractmethod
     def insert_data(
             self,
@@ -56,23 +109,136 @@ class BaseVectorClient(ABC):
         """
         pass
 
+    def insert_vectors(
+            self,
+            namespace: str,
+            ids: List[str],
+            documents: List[str],
+            metadatas: List[dict],
+            vectors: Any,
+    ) -> int:
+        """
+        添加已向量化的数据(不调用向量化服务), 用于快照导入等批量写入场景
+        :param namespace: 命名空间标识
+        :param ids: 向量标识
+        :param documents: 文档内容
+        :param metadatas: 元数据
+        :param vectors: 向量集合
+        :return: 写入的向量数量
+        """
+        raise NotImplementedError(f"{self.get_vector_database_type()}向量库不支持批量写入向量")
+
     @abstractmethod
     def search_data(
             self,
             ques: str,
             embedding: Embeddings,
             namespace: str,
-            search_top_k: int) -> List[Tuple[Document, float]]:
+            search_top_k: int,
+            **kwargs) -> List[Tuple[Document, float]]:
         """
         搜索向量数据
         :param ques: 问题
         :param embedding: 稀疏值类型
         :param namespace: 命名空间标识
         :param search_top_k: top数
+        :param kwargs: 扩展参数, max_distance为距离阈值(超过阈值的文档不返回),
+            exact_match_first为存在完全匹配(距离为0)的文档时仅返回完全匹配的文档,
+            filter为元数据过滤条件(支持$eq、$in、$exists、$gt、$gte、$lt、$lte),
+            search_mode为检索模式(vector[向量检索] hybrid[向量+关键词混合检索]),
+            mmr_lambda为MMR重排的相关性权重(为空时不重排, 仅向量检索模式生效), fetch_k为MMR重排的候选数量
         :return: Chunk文档集合
         """
         pass
 
+    def search_data_batch(
+            self,
+            queries: Sequence[str],
+            embedding: Embeddings,
+            namespaces: Sequence[str],
+            search_top_k: int,
+            **kwargs) -> Dict[str, List[List[Tuple[Document, float]]]]:
+        """
+        批量搜索向量数据, 多个问题在多个命名空间中搜索
+        :param queries: 问题列表
+        :param embedding: 稀疏值类型
+        :param namespaces: 命名空间标识列表
+        :param search_top_k: 每个问题在每个命名空间中的top数
+        :param kwargs: 扩展参数
+        :return: 按命名空间分组的Chunk文档集合, 每组与问题列表顺序一一对应
+        """
+        return {
+            namespace: [
+                self.search_data(ques=ques, embedding=embedding, namespace=namespace,
+                                 search_top_k=search_top_k, **kwargs)
+                for ques in queries
+            ]
+            for namespace in namespaces
+        }
+
+    def clone_data(
+            self,
+            source_namespace: str,
+            target_namespace: str
+    ) -> Dict[str, str]:
+        """
+        复制命名空间的全部向量数据至新命名空间(不重新向量化)
+        :param source_namespace: 源命名空间标识
+        :param target_namespace: 目标命名空间标识, 不能已存在
+        :return: 源向量标识 -> 新向量标识
+        """
+        raise NotImplementedError(f"{self.get_vector_database_type()}向量库不支持命名空间复制")
+
+    def create_index(
+            self,
+            namespace: str,
+            index_type: str = None,
+            **kwargs
+    ) -> str:
+        """
+        创建命名空间的向量索引
+        :param namespace: 命名空间标识
+        :param index_type: 索引类型
+        :param kwargs: 索引构建参数
+        :return: 索引名称
+        """
+        raise NotImplementedError(f"{self.get_vector_database_type()}向量库不支持索引管理")
+
+    def rebuild_index(
+            self,
+            namespace: str
+    ) -> List[str]:
+        """
+        重建命名空间的向量索引
+        :param namespace: 命名空间标识
+        :return: 索引名称列表
+        """
+        raise NotImplementedError(f"{self.get_vector_database_type()}向量库不支持索引管理")
+
+    def drop_index(
+            self,
+            namespace: str,
+            index_type: str = None
+    ) -> List[str]:
+        """
+        删除命名空间的向量索引
+        :param namespace: 命名空间标识
+        :param index_type: 索引类型, 为空时删除全部
+        :return: 索引名称列表
+        """
+        raise NotImplementedError(f"{self.get_vector_database_type()}向量库不支持索引管理")
+
+    def get_index_status(
+            self,
+            namespace: str
+    ) -> List[Dict[str, Any]]:
+        """
+        查询命名空间的向量索引状态
+        :param namespace: 命名空间标识
+        :return: 索引状态列表
+        """
+        return []
+
     @abstractmethod
     def get_vector_database_type(self) -> str:
         """
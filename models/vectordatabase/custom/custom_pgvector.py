@@ -1,18 +1,58 @@
 from __future__ import annotations
 from loguru import logger
 import enum
+import json
 import logging
+import threading
+import time
 import uuid
 import sqlalchemy
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, Union
 from pgvector.sqlalchemy import Vector
-from sqlalchemy.dialects.postgresql import JSON, UUID
+from sqlalchemy.dialects.postgresql import ARRAY, JSON, JSONB, UUID
 from sqlalchemy.orm import Session, declarative_base, relationship
 from langchain.docstore.document import Document
 from langchain.embeddings.base import Embeddings
 from langchain.utils import get_from_dict_or_env
 from langchain.vectorstores.base import VectorStore
-from config.base_config import PGVECTOR_DIMENSIONS
+from config.base_config import (
+    PGVECTOR_DIMENSIONS,
+    PGVECTOR_POOL_SIZE,
+    PGVECTOR_POOL_MAX_OVERFLOW,
+    PGVECTOR_POOL_RECYCLE,
+    PGVECTOR_POOL_TIMEOUT,
+    PGVECTOR_BULK_INSERT,
+    PGVECTOR_INSERT_BATCH_SIZE,
+    PGVECTOR_DELETE_BATCH_SIZE,
+    PGVECTOR_INDEX_TYPE,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_PARTITIONED,
+    PGVECTOR_BINARY_TRANSFER,
+    PGVECTOR_HYBRID_SEARCH,
+    PGVECTOR_HYBRID_RRF_K,
+    PGVECTOR_HYBRID_CANDIDATE_FACTOR,
+    PGVECTOR_TRGM_SIMILARITY_THRESHOLD,
+    PGVECTOR_QUANTIZATION,
+    PGVECTOR_RESCORE_FACTOR,
+)
+from models.vectordatabase.custom.pgvector_binary import (
+    build_copy_buffer,
+    encode_json,
+    encode_text,
+    encode_vectors,
+    select_binary_vector,
+)
+from models.vectordatabase.custom.pgvector_filter import build_metadata_filter
+from models.vectordatabase.mmr import maximal_marginal_relevance
+from models.vectordatabase.custom.pgvector_quantize import (
+    MIN_PGVECTOR_VERSION,
+    QUANTIZATION_NONE,
+    check_quantization,
+    index_expression,
+    parse_version,
+    quantized_distance,
+)
 
 Base = declarative_base()  # type: Any
 
@@ -78,7 +118,7 @@ class EmbeddingStore(BaseModel):
     collection = relationship(CollectionStore, back_populates="embeddings")
     embedding: Vector = sqlalchemy.Column(Vector(ADA_TOKEN_COUNT))
     document = sqlalchemy.Column(sqlalchemy.String, nullable=True)
-    cmetadata = sqlalchemy.Column(JSON, nullable=True)
+    cmetadata = sqlalchemy.Column(JSONB, nullable=True)
     custom_id = sqlalchemy.Column(sqlalchemy.String, nullable=True)
 
     @classmethod
@@ -103,6 +143,297 @@ class DistanceStrategy(str, enum.Enum):
 
 DEFAULT_DISTANCE_STRATEGY = DistanceStrategy.EUCLIDEAN
 
+DEFAULT_QUERY_COLUMNS = ("uuid", "collection_id", "custom_id", "document", "cmetadata")
+STREAM_BUFFER_SIZE = 500
+
+INDEX_TYPES = ("hnsw", "ivfflat")
+HNSW_MAX_EF_SEARCH = 1000
+_INDEX_OPERATOR_CLASSES = {
+    DistanceStrategy.EUCLIDEAN: "vector_l2_ops",
+    DistanceStrategy.COSINE: "vector_cosine_ops",
+    DistanceStrategy.MAX_INNER_PRODUCT: "vector_ip_ops",
+}
+_DISTANCE_OPERATORS = {
+    DistanceStrategy.EUCLIDEAN: "<->",
+    DistanceStrategy.COSINE: "<=>",
+    DistanceStrategy.MAX_INNER_PRODUCT: "<#>",
+}
+_DISTANCE_METHODS = {
+    DistanceStrategy.EUCLIDEAN: "l2_distance",
+    DistanceStrategy.COSINE: "cosine_distance",
+    DistanceStrategy.MAX_INNER_PRODUCT: "max_inner_product",
+}
+
+METADATA_INDEX_NAME = "ix_pg_emb_cmetadata_gin"
+DOCUMENT_TRGM_INDEX_NAME = "ix_pg_emb_document_trgm"
+TRGM_CJK_PROBE = "知识库"
+SEARCH_MODE_VECTOR = "vector"
+SEARCH_MODE_HYBRID = "hybrid"
+
+_ENGINES: Dict[str, sqlalchemy.engine.Engine] = {}
+_ENGINES_LOCK = threading.Lock()
+_HYBRID_SEARCH_SUPPORT: Dict[str, bool] = {}
+
+
+def get_engine(connection_string: str) -> sqlalchemy.engine.Engine:
+    """Return the process-wide pooled engine for a connection string.
+
+    The engine is built lazily on first use with a bounded connection pool,
+    and the tables are created once at that moment instead of on every
+    `PGVector` instantiation. Indexes are only built here on a table this
+    call created; existing tables are migrated by
+    `python -m models.vectordatabase.custom.pgvector_metadata` and
+    `python -m models.vectordatabase.custom.pgvector_hybrid`.
+    """
+    engine = _ENGINES.get(connection_string)
+    if engine is not None:
+        return engine
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(connection_string)
+        if engine is None:
+            engine = sqlalchemy.create_engine(
+                connection_string,
+                pool_size=PGVECTOR_POOL_SIZE,
+                max_overflow=PGVECTOR_POOL_MAX_OVERFLOW,
+                pool_recycle=PGVECTOR_POOL_RECYCLE,
+                pool_timeout=PGVECTOR_POOL_TIMEOUT,
+                pool_pre_ping=True,
+            )
+            with engine.begin() as conn:
+                created = conn.execute(
+                    sqlalchemy.text("SELECT to_regclass(:name)"), {"name": EmbeddingStore.__tablename__}
+                ).scalar() is None
+                if PGVECTOR_PARTITIONED:
+                    create_partitioned_embedding_table(conn)
+                Base.metadata.create_all(conn)
+                if created:
+                    create_metadata_index(conn)
+                if PGVECTOR_HYBRID_SEARCH:
+                    if created:
+                        create_document_trgm_index(conn)
+                    _HYBRID_SEARCH_SUPPORT[connection_string] = check_hybrid_search(conn)
+            _ENGINES[connection_string] = engine
+    return engine
+
+
+def dispose_engines() -> None:
+    """Close every pooled connection, e.g. on application shutdown."""
+    with _ENGINES_LOCK:
+        for engine in _ENGINES.values():
+            engine.dispose()
+        _ENGINES.clear()
+
+
+def migrate_metadata_to_jsonb(conn: sqlalchemy.engine.Connection) -> bool:
+    """Convert `cmetadata` of a table created before it became JSONB.
+
+    This rewrites the table under an ACCESS EXCLUSIVE lock, so it is only
+    run from the `pgvector_metadata` migration, never at startup.
+
+    Returns:
+        True if the column was converted.
+    """
+    table_name = EmbeddingStore.__tablename__
+    conn.execute(sqlalchemy.text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": METADATA_INDEX_NAME})
+    data_type = conn.execute(
+        sqlalchemy.text(
+            "SELECT data_type FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table AND column_name = 'cmetadata'"
+        ),
+        {"table": table_name},
+    ).scalar()
+    if data_type != "json":
+        return False
+    conn.execute(sqlalchemy.text(
+        f"ALTER TABLE {table_name} ALTER COLUMN cmetadata TYPE jsonb USING cmetadata::jsonb"
+    ))
+    logger.info("######PGvector metadata INFO, {}.cmetadata converted to jsonb.", table_name)
+    return True
+
+
+def create_metadata_index(conn: sqlalchemy.engine.Connection, concurrently: bool = False) -> None:
+    """Create the `jsonb_path_ops` GIN index on `cmetadata`.
+
+    It serves the `@>`, `@?` and `@@` predicates produced by
+    `build_metadata_filter`. With `concurrently` the connection has to be
+    in autocommit mode; writes are not blocked while the index builds.
+    """
+    create_table_index(conn, METADATA_INDEX_NAME, "USING gin (cmetadata jsonb_path_ops)", concurrently)
+
+
+def create_table_index(
+    conn: sqlalchemy.engine.Connection,
+    index_name: str,
+    definition: str,
+    concurrently: bool = False,
+) -> None:
+    """Create an index on the embedding table unless a valid one exists.
+
+    An invalid index left by an interrupted concurrent build is dropped and
+    built again. A partitioned table cannot be indexed concurrently, so
+    each partition is then indexed concurrently and attached to an index
+    created on the parent only, which becomes valid once all are attached.
+    """
+    table_name = EmbeddingStore.__tablename__
+    if _index_is_valid(conn, index_name, concurrently):
+        return
+    partitions = conn.execute(
+        sqlalchemy.text("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = to_regclass(:name)"),
+        {"name": table_name},
+    ).scalars().all()
+    if not concurrently or not partitions:
+        conn.execute(sqlalchemy.text(
+            f"CREATE INDEX{' CONCURRENTLY' if concurrently else ''} IF NOT EXISTS {index_name} ON {table_name} {definition}"
+        ))
+    else:
+        conn.execute(sqlalchemy.text(f"CREATE INDEX IF NOT EXISTS {index_name} ON ONLY {table_name} {definition}"))
+        for partition_name in partitions:
+            partition_index = f"{index_name}_{partition_name.rsplit('_', 1)[-1]}"
+            if not _index_is_valid(conn, partition_index, concurrently):
+                conn.execute(sqlalchemy.text(
+                    f"CREATE INDEX CONCURRENTLY {partition_index} ON {partition_name} {definition}"
+                ))
+            conn.execute(sqlalchemy.text(f"ALTER INDEX {index_name} ATTACH PARTITION {partition_index}"))
+    logger.info("######PGvector index INFO, created index={}, concurrently={}.", index_name, concurrently)
+
+
+def _index_is_valid(conn: sqlalchemy.engine.Connection, index_name: str, concurrently: bool) -> bool:
+    """True if the index exists and is valid; an invalid one is dropped."""
+    valid = conn.execute(
+        sqlalchemy.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": index_name},
+    ).scalar()
+    if valid is False:
+        partitioned = conn.execute(
+            sqlalchemy.text("SELECT relkind = 'I' FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": index_name},
+        ).scalar()
+        if partitioned:
+            # A partitioned parent index turns valid once every partition's index is attached.
+            return False
+        conn.execute(sqlalchemy.text(f"DROP INDEX{' CONCURRENTLY' if concurrently else ''} {index_name}"))
+    return bool(valid)
+
+
+def create_document_trgm_index(conn: sqlalchemy.engine.Connection, concurrently: bool = False) -> bool:
+    """Create the `pg_trgm` GIN index on `document` used by hybrid search.
+
+    With `concurrently` the connection has to be in autocommit mode.
+
+    Returns:
+        False when the extension cannot be installed, e.g. for lack of
+        privileges, or when the database locale extracts no trigrams from
+        Chinese text (see `check_hybrid_search`); no index is built then.
+    """
+    try:
+        if conn.in_transaction():
+            with conn.begin_nested():
+                conn.execute(sqlalchemy.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        else:
+            conn.execute(sqlalchemy.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except sqlalchemy.exc.DBAPIError as err:
+        logger.warning("######PGvector hybrid WARN, pg_trgm is not available, hybrid search disabled: {}", err)
+        return False
+    if not _trgm_splits_cjk(conn):
+        return False
+    create_table_index(conn, DOCUMENT_TRGM_INDEX_NAME, "USING gin (document gin_trgm_ops)", concurrently)
+    return True
+
+
+def check_hybrid_search(conn: sqlalchemy.engine.Connection) -> bool:
+    """Whether hybrid search can run: `pg_trgm` is installed, the document
+    index is valid and the database locale splits Chinese into trigrams.
+
+    Only reads the catalogs, so it is cheap enough for engine startup.
+    """
+    installed = conn.execute(
+        sqlalchemy.text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+    ).scalar()
+    if not installed:
+        logger.warning("######PGvector hybrid WARN, pg_trgm is not installed, hybrid search disabled.")
+        return False
+    valid = conn.execute(
+        sqlalchemy.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": DOCUMENT_TRGM_INDEX_NAME},
+    ).scalar()
+    if not valid:
+        logger.warning(
+            "######PGvector hybrid WARN, index={} is missing or invalid, hybrid search disabled; "
+            "run python -m models.vectordatabase.custom.pgvector_hybrid.", DOCUMENT_TRGM_INDEX_NAME
+        )
+        return False
+    return _trgm_splits_cjk(conn)
+
+
+def _trgm_splits_cjk(conn: sqlalchemy.engine.Connection) -> bool:
+    """pg_trgm only extracts trigrams from characters the database LC_CTYPE
+    classifies as alphanumeric. Under the C locale CJK characters are not,
+    so Chinese documents get no trigrams and lexical recall is lost."""
+    trigrams = conn.execute(sqlalchemy.text("SELECT show_trgm(:probe)"), {"probe": TRGM_CJK_PROBE}).scalar()
+    if trigrams:
+        return True
+    ctype = conn.execute(sqlalchemy.text("SELECT datctype FROM pg_database WHERE datname = current_database()")).scalar()
+    logger.warning(
+        "######PGvector hybrid WARN, LC_CTYPE={} extracts no trigrams from Chinese text, hybrid search disabled; "
+        "use a database with a UTF-8 locale such as zh_CN.UTF-8.", ctype
+    )
+    return False
+
+
+def get_partition_name(collection_uuid: uuid.UUID) -> str:
+    return f"{EmbeddingStore.__tablename__}_p_{collection_uuid.hex}"
+
+
+def create_partitioned_embedding_table(
+    conn: sqlalchemy.engine.Connection,
+    table_name: str = EmbeddingStore.__tablename__,
+) -> None:
+    """Create the embedding table list-partitioned by collection_id.
+
+    Columns follow the `EmbeddingStore` model; the primary key has to
+    include the partition key, so it becomes (collection_id, uuid).
+    """
+    CollectionStore.__table__.create(conn, checkfirst=True)
+    columns = ", ".join(
+        f"{column.name} {column.type.compile(dialect=conn.dialect)}"
+        for column in EmbeddingStore.__table__.columns
+    )
+    conn.execute(sqlalchemy.text(
+        f"CREATE TABLE IF NOT EXISTS {table_name} ({columns}, "
+        f"PRIMARY KEY (collection_id, uuid), "
+        f"FOREIGN KEY (collection_id) REFERENCES {CollectionStore.__tablename__} (uuid) ON DELETE CASCADE) "
+        f"PARTITION BY LIST (collection_id)"
+    ))
+
+
+def create_partition(conn: sqlalchemy.engine.Connection, collection_uuid: uuid.UUID) -> str:
+    partition_name = get_partition_name(collection_uuid)
+    conn.execute(sqlalchemy.text(
+        f"CREATE TABLE IF NOT EXISTS {partition_name} "
+        f"PARTITION OF {EmbeddingStore.__tablename__} FOR VALUES IN ('{collection_uuid}')"
+    ))
+    return partition_name
+
+
+def drop_partition(conn: sqlalchemy.engine.Connection, collection_uuid: uuid.UUID) -> int:
+    """Detach and drop a collection's partition.
+
+    Returns:
+        Number of rows the partition held.
+    """
+    partition_name = get_partition_name(collection_uuid)
+    exists = conn.execute(sqlalchemy.text("SELECT to_regclass(:name)"), {"name": partition_name}).scalar()
+    if not exists:
+        return 0
+    rows = conn.execute(sqlalchemy.text(f"SELECT count(*) FROM {partition_name}")).scalar()
+    conn.execute(sqlalchemy.text(f"ALTER TABLE {EmbeddingStore.__tablename__} DETACH PARTITION {partition_name}"))
+    conn.execute(sqlalchemy.text(f"DROP TABLE {partition_name}"))
+    return rows
+
+
+_COLLECTION_UUIDS: Dict[Tuple[str, str], uuid.UUID] = {}
+_COLLECTION_UUIDS_LOCK = threading.Lock()
+
 
 class PGVector(VectorStore):
     """
@@ -120,6 +451,8 @@ class PGVector(VectorStore):
     - `pre_delete_collection` if True, will delete the collection if it exists.
         (default: False)
         - Useful for testing.
+    - `quantization` is the ANN index storage: `none`, `halfvec` or `binary`,
+        see `pgvector_quantize`. (default: PGVECTOR_QUANTIZATION)
     """
 
     def __init__(
@@ -131,6 +464,7 @@ class PGVector(VectorStore):
         distance_strategy: DistanceStrategy = DEFAULT_DISTANCE_STRATEGY,
         pre_delete_collection: bool = False,
         logger: Optional[logging.Logger] = None,
+        quantization: Optional[str] = None,
     ) -> None:
         self.connection_string = connection_string
         self.embedding_function = embedding_function
@@ -139,6 +473,8 @@ class PGVector(VectorStore):
         self.distance_strategy = distance_strategy
         self.pre_delete_collection = pre_delete_collection
         self.logger = logger or logging.getLogger(__name__)
+        self.quantization = quantization or PGVECTOR_QUANTIZATION
+        check_quantization(self.quantization)
         self.__post_init__()
 
     def __post_init__(
@@ -146,16 +482,15 @@ class PGVector(VectorStore):
     ) -> None:
         """
         Initialize the store.
+        The tables are created once by `get_engine`, sessions borrow
+        connections from the shared pool.
         """
         self._conn = self.connect()
         # self.create_vector_extension()
-        self.create_tables_if_not_exists()
         self.create_collection()
 
-    def connect(self) -> sqlalchemy.engine.Connection:
-        engine = sqlalchemy.create_engine(self.connection_string)
-        conn = engine.connect()
-        return conn
+    def connect(self) -> sqlalchemy.engine.Engine:
+        return get_engine(self.connection_string)
 
     def create_vector_extension(self) -> None:
         try:
@@ -167,33 +502,146 @@ class PGVector(VectorStore):
             self.logger.exception(e)
 
     def create_tables_if_not_exists(self) -> None:
-        with self._conn.begin():
-            Base.metadata.create_all(self._conn)
+        with self._conn.begin() as conn:
+            Base.metadata.create_all(conn)
 
     def drop_tables(self) -> None:
-        with self._conn.begin():
-            Base.metadata.drop_all(self._conn)
+        with self._conn.begin() as conn:
+            Base.metadata.drop_all(conn)
 
     def create_collection(self) -> None:
         if self.pre_delete_collection:
             self.delete_collection()
+        if self._collection_cache_key() in _COLLECTION_UUIDS:
+            return
         with Session(self._conn) as session:
-            CollectionStore.get_or_create(
+            collection, _ = CollectionStore.get_or_create(
                 session, self.collection_name, cmetadata=self.collection_metadata
             )
+            collection_uuid = collection.uuid
+        if PGVECTOR_PARTITIONED:
+            with self._conn.begin() as conn:
+                create_partition(conn, collection_uuid)
+        self._cache_collection_uuid(collection_uuid)
+
+    def delete_collection(self, batch_size: int = PGVECTOR_DELETE_BATCH_SIZE) -> int:
+        """Purge the collection's embeddings in server-side batches, then
+        delete the collection row itself.
 
-    def delete_collection(self) -> None:
+        Each batch is its own short transaction, so no embedding row is
+        loaded into the session and locks are held briefly. With the
+        partitioned layout the collection's partition is detached and
+        dropped instead.
+
+        Returns:
+            Number of deleted embeddings.
+        """
         self.logger.debug("Trying to delete collection")
+        self.invalidate_collection_uuid()
+        try:
+            collection_uuid = self.get_collection_uuid()
+        except ValueError:
+            self.logger.warning("Collection not found")
+            return 0
+        table = EmbeddingStore.__table__
+        total = 0
+        try:
+            while not PGVECTOR_PARTITIONED:
+                batch_uuids = (
+                    sqlalchemy.select(table.c.uuid)
+                    .where(table.c.collection_id == collection_uuid)
+                    .limit(batch_size)
+                    .scalar_subquery()
+                )
+                with self._conn.begin() as conn:
+                    deleted = conn.execute(table.delete().where(table.c.uuid.in_(batch_uuids))).rowcount
+                total += deleted
+                if deleted < batch_size:
+                    break
+            collection_table = CollectionStore.__table__
+            with self._conn.begin() as conn:
+                if PGVECTOR_PARTITIONED:
+                    total = drop_partition(conn, collection_uuid)
+                conn.execute(collection_table.delete().where(collection_table.c.uuid == collection_uuid))
+        finally:
+            self.invalidate_collection_uuid()
+        logger.info("######PGvector INFO, delete collection={}, embeddings={}.", self.collection_name, total)
+        return total
+
+    def clone_collection(self, target_name: str) -> Dict[str, str]:
+        """Copy the collection's embeddings into a new collection server-side.
+
+        The target collection row and all embeddings are written in one
+        transaction with `INSERT ... SELECT`, generating new `uuid`s and
+        `custom_id`s in the database, so no vector leaves the server and
+        nothing is re-embedded. ANN indexes are not copied; build them on the
+        target with `create_index` if needed.
+
+        Args:
+            target_name: Name of the new collection, which must not exist.
+
+        Returns:
+            Mapping of source `custom_id` to the new `custom_id`.
+        """
+        source_uuid = self.get_collection_uuid()
+        collection_table = CollectionStore.__table__
+        target_uuid = uuid.uuid4()
+        with self._conn.begin() as conn:
+            existing = conn.execute(
+                sqlalchemy.select(collection_table.c.uuid).where(collection_table.c.name == target_name)
+            ).first()
+            if existing:
+                raise ValueError(f"Collection already exists: {target_name}")
+            cmetadata = conn.execute(
+                sqlalchemy.select(collection_table.c.cmetadata).where(collection_table.c.uuid == source_uuid)
+            ).scalar()
+            conn.execute(collection_table.insert().values(uuid=target_uuid, name=target_name, cmetadata=cmetadata))
+            if PGVECTOR_PARTITIONED:
+                create_partition(conn, target_uuid)
+            rows = conn.execute(
+                sqlalchemy.text(
+                    f"WITH source AS MATERIALIZED ("
+                    f"SELECT custom_id AS source_id, replace(gen_random_uuid()::text, '-', '') AS target_id, "
+                    f"embedding, document, cmetadata "
+                    f"FROM {EmbeddingStore.__tablename__} WHERE collection_id = :source_uuid"
+                    f"), copied AS ("
+                    f"INSERT INTO {EmbeddingStore.__tablename__} "
+                    f"(uuid, collection_id, embedding, document, cmetadata, custom_id) "
+                    f"SELECT gen_random_uuid(), :target_uuid, embedding, document, cmetadata, target_id FROM source"
+                    f") SELECT source_id, target_id FROM source"
+                ),
+                {"source_uuid": source_uuid, "target_uuid": target_uuid},
+            ).fetchall()
+        logger.info("######PGvector INFO, clone collection={}, target={}, embeddings={}.",
+                    self.collection_name, target_name, len(rows))
+        return {row.source_id: row.target_id for row in rows if row.source_id is not None}
+
+    def get_collection(self, session: Session) -> Optional["CollectionStore"]:
+        return CollectionStore.get_by_name(session, self.collection_name)
+
+    def get_collection_uuid(self) -> uuid.UUID:
+        """Return the collection uuid, looking it up only on a cache miss."""
+        collection_uuid = _COLLECTION_UUIDS.get(self._collection_cache_key())
+        if collection_uuid is not None:
+            return collection_uuid
         with Session(self._conn) as session:
             collection = self.get_collection(session)
             if not collection:
-                self.logger.warning("Collection not found")
-                return
-            session.delete(collection)
-            session.commit()
+                raise ValueError("Collection not found")
+            collection_uuid = collection.uuid
+        self._cache_collection_uuid(collection_uuid)
+        return collection_uuid
 
-    def get_collection(self, session: Session) -> Optional["CollectionStore"]:
-        return CollectionStore.get_by_name(session, self.collection_name)
+    def invalidate_collection_uuid(self) -> None:
+        with _COLLECTION_UUIDS_LOCK:
+            _COLLECTION_UUIDS.pop(self._collection_cache_key(), None)
+
+    def _cache_collection_uuid(self, collection_uuid: uuid.UUID) -> None:
+        with _COLLECTION_UUIDS_LOCK:
+            _COLLECTION_UUIDS[self._collection_cache_key()] = collection_uuid
+
+    def _collection_cache_key(self) -> Tuple[str, str]:
+        return self.connection_string, self.collection_name
 
     @classmethod
     def __from(
@@ -233,21 +681,92 @@ class PGVector(VectorStore):
     def delete_embeddings(
             self,
             ids: List[str],
-    ) -> None:
-        with Session(self._conn) as session:
-            for vector_id in ids:
-                embedding_store = EmbeddingStore.get_by_custom_id(custom_id=vector_id, session=session)
-                if not embedding_store:
-                    raise ValueError("Embedding not found")
-                session.delete(embedding_store)
-            session.commit()
+            batch_size: int = PGVECTOR_DELETE_BATCH_SIZE,
+    ) -> int:
+        """Delete embeddings by custom id with set-based
+        `DELETE ... WHERE collection_id = ? AND custom_id = ANY(?)` statements,
+        chunked by `batch_size` ids, in one transaction.
+
+        Returns:
+            Number of deleted embeddings.
+        """
+        if not ids:
+            return 0
+        collection_uuid = self.get_collection_uuid()
+        table = EmbeddingStore.__table__
+        total = 0
+        with self._conn.begin() as conn:
+            for i in range(0, len(ids), batch_size):
+                chunk = list(ids[i:i + batch_size])
+                total += conn.execute(
+                    table.delete()
+                    .where(table.c.collection_id == collection_uuid)
+                    .where(table.c.custom_id == sqlalchemy.any_(
+                        sqlalchemy.literal(chunk, type_=ARRAY(sqlalchemy.String))
+                    ))
+                ).rowcount
+        if total < len(ids):
+            logger.warning("######PGvector WARN, delete embeddings requested={}, deleted={}, collection={}.",
+                           len(ids), total, self.collection_name)
+        return total
 
     def query_embeddings(
             self,
-            ids: List[str],
-    ) -> List[EmbeddingStore]:
-        with Session(self._conn) as session:
-            return EmbeddingStore.get_list_by_custom_id(session=session, ids=ids)
+            ids: Optional[List[str]] = None,
+            columns: Sequence[str] = DEFAULT_QUERY_COLUMNS,
+            limit: Optional[int] = None,
+            after: Optional[str] = None,
+            stream: bool = False,
+    ) -> Union[List[sqlalchemy.engine.Row], Iterator[sqlalchemy.engine.Row]]:
+        """Query the collection's embeddings with a column projection.
+
+        Args:
+            ids: Custom ids to fetch, all of the collection's rows if None.
+            columns: `EmbeddingStore` columns to select. The default leaves
+                out `embedding`, so no vector is transferred unless asked for;
+                when selected it is decoded to a float32 `np.ndarray`.
+            limit: Page size for keyset pagination, ordered by custom_id.
+            after: Return only rows whose custom_id sorts after this one,
+                i.e. the last custom_id of the previous page.
+            stream: Return an iterator reading through a server-side cursor
+                instead of a list; the connection is held until exhausted.
+
+        Returns:
+            Rows with attribute access per selected column.
+        """
+        table = EmbeddingStore.__table__
+        unknown = [name for name in columns if name not in table.c]
+        if unknown:
+            raise ValueError(f"Unknown embedding columns: {unknown}")
+        binary = self.use_binary_transfer()
+        statement = (
+            sqlalchemy.select(*[
+                select_binary_vector(table.c[name]) if name == "embedding" and binary else table.c[name]
+                for name in columns
+            ])
+            .where(table.c.collection_id == self.get_collection_uuid())
+        )
+        if ids is not None:
+            statement = statement.where(table.c.custom_id == sqlalchemy.any_(
+                sqlalchemy.literal(list(ids), type_=ARRAY(sqlalchemy.String))
+            ))
+        if after is not None:
+            statement = statement.where(table.c.custom_id > after)
+        if limit is not None or after is not None:
+            statement = statement.order_by(table.c.custom_id)
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        if stream:
+            return self._stream_rows(statement)
+        with self._conn.connect() as conn:
+            return conn.execute(statement).all()
+
+    def _stream_rows(self, statement: sqlalchemy.sql.Select) -> Iterator[sqlalchemy.engine.Row]:
+        with self._conn.connect() as conn:
+            result = conn.execution_options(stream_results=True, max_row_buffer=STREAM_BUFFER_SIZE).execute(statement)
+            for row in result:
+                yield row
 
     def add_embeddings(
         self,
@@ -263,32 +782,120 @@ class PGVector(VectorStore):
             texts: Iterable of strings to add to the vectorstore.
             embeddings: List of list of embedding vectors.
             metadatas: List of metadatas associated with the texts.
-            kwargs: vectorstore specific parameters
+            kwargs: vectorstore specific parameters, `bulk` and `batch_size`
+                override PGVECTOR_BULK_INSERT and PGVECTOR_INSERT_BATCH_SIZE.
         """
-        logger.info("######PGvector INFO, get session before... mark={}", ids[0])
+        if kwargs.get("bulk", PGVECTOR_BULK_INSERT):
+            self.bulk_add_embeddings(
+                texts=texts,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=ids,
+                batch_size=kwargs.get("batch_size") or PGVECTOR_INSERT_BATCH_SIZE,
+            )
+            return
+
+        collection_uuid = self.get_collection_uuid()
         with Session(self._conn) as session:
-            logger.info("######PGvector INFO, get session after... mark={}", ids[0])
-            collection = self.get_collection(session)
-            logger.info("######PGvector INFO, get collection after... mark={}", ids[0])
-            if not collection:
-                logger.info("######PGvector INFO, get collection is empty... mark={}", ids[0])
-                raise ValueError("Collection not found")
             for text, metadata, embedding, id in zip(texts, metadatas, embeddings, ids):
-                logger.info("######PGvector INFO, add embedding step 1... mark={}, id={}", ids[0], id)
                 embedding_store = EmbeddingStore(
+                    collection_id=collection_uuid,
                     embedding=embedding,
                     document=text,
                     cmetadata=metadata,
                     custom_id=id,
                 )
-                logger.info("######PGvector INFO, add embedding step 2... mark={}, id={}", ids[0], id)
-                collection.embeddings.append(embedding_store)
-                logger.info("######PGvector INFO, add embedding step 3... mark={}, id={}", ids[0], id)
                 session.add(embedding_store)
-                logger.info("######PGvector INFO, add embedding step 4... mark={}, id={}", ids[0], id)
-            logger.info("######PGvector INFO, commit step 1... mark={}.", ids[0])
-            session.commit()
-            logger.info("######PGvector INFO, commit step 2... mark={}.", ids[0])
+            self._commit_or_invalidate(session)
+        logger.info("######PGvector INFO, add embeddings rows={}, collection={}.", len(ids), self.collection_name)
+
+    def bulk_add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[dict],
+        ids: List[str],
+        batch_size: int = PGVECTOR_INSERT_BATCH_SIZE,
+    ) -> int:
+        """Add embeddings in batches, with binary `COPY ... FROM STDIN` on
+        psycopg2 (see `PGVECTOR_BINARY_TRANSFER`) and multi-row INSERT
+        statements otherwise.
+
+        Rows are written straight to the embedding table in one transaction,
+        the `collection.embeddings` relationship is never loaded.
+
+        Returns:
+            Number of inserted rows.
+        """
+        collection_uuid = self.get_collection_uuid()
+        table = EmbeddingStore.__table__
+        use_copy = self.use_binary_transfer()
+        rows = list(zip(texts, metadatas, embeddings, ids))
+        start = time.perf_counter()
+        try:
+            with self._conn.begin() as conn:
+                for offset in range(0, len(rows), batch_size):
+                    batch = rows[offset:offset + batch_size]
+                    if use_copy:
+                        self._copy_embeddings(conn, collection_uuid, batch)
+                        continue
+                    conn.execute(table.insert().values([
+                        {
+                            "uuid": uuid.uuid4(),
+                            "collection_id": collection_uuid,
+                            "embedding": embedding,
+                            "document": text,
+                            "cmetadata": metadata,
+                            "custom_id": id,
+                        }
+                        for text, metadata, embedding, id in batch
+                    ]))
+        except Exception as err:
+            if isinstance(err, sqlalchemy.exc.IntegrityError) or getattr(err, "pgcode", None) == "23503":
+                self.invalidate_collection_uuid()
+            raise
+        total = len(rows)
+        elapsed = time.perf_counter() - start
+        logger.info("######PGvector INFO, bulk insert rows={}, batch_size={}, mode={}, elapsed={:.3f}s, "
+                    "rows/sec={:.1f}, collection={}.", total, batch_size, "copy" if use_copy else "insert",
+                    elapsed, total / elapsed if elapsed > 0 else 0.0, self.collection_name)
+        return total
+
+    def use_binary_transfer(self) -> bool:
+        return PGVECTOR_BINARY_TRANSFER and self._conn.dialect.driver == "psycopg2"
+
+    @staticmethod
+    def _copy_embeddings(
+        conn: sqlalchemy.engine.Connection,
+        collection_uuid: uuid.UUID,
+        rows: List[Tuple[str, dict, List[float], str]],
+    ) -> None:
+        """Stream (text, metadata, embedding, custom_id) rows through a
+        binary COPY, vectors encoded from a float32 buffer."""
+        jsonb = isinstance(EmbeddingStore.__table__.c.cmetadata.type, JSONB)
+        vectors = encode_vectors([embedding for _, _, embedding, _ in rows])
+        collection_bytes = collection_uuid.bytes
+        buffer = build_copy_buffer(
+            (
+                uuid.uuid4().bytes,
+                collection_bytes,
+                vector,
+                encode_text(text),
+                encode_json(json.dumps(metadata) if metadata is not None else None, jsonb=jsonb),
+                encode_text(id),
+            )
+            for (text, metadata, _, id), vector in zip(rows, vectors)
+        )
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {EmbeddingStore.__tablename__} "
+                f"(uuid, collection_id, embedding, document, cmetadata, custom_id) "
+                f"FROM STDIN WITH (FORMAT BINARY)",
+                buffer,
+            )
+        finally:
+            cursor.close()
 
     def add_texts(
         self,
@@ -307,31 +914,27 @@ class PGVector(VectorStore):
         Returns:
             List of ids from adding the texts into the vectorstore.
         """
+        texts = list(texts)
         if ids is None:
             ids = [str(uuid.uuid1()) for _ in texts]
 
-        embeddings = self.embedding_function.embed_documents(list(texts))
+        embeddings = self.embedding_function.embed_documents(texts)
 
         if not metadatas:
             metadatas = [{} for _ in texts]
 
-        with Session(self._conn) as session:
-            collection = self.get_collection(session)
-            if not collection:
-                raise ValueError("Collection not found")
-            for text, metadata, embedding, id in zip(texts, metadatas, embeddings, ids):
-                embedding_store = EmbeddingStore(
-                    embedding=embedding,
-                    document=text,
-                    cmetadata=metadata,
-                    custom_id=id,
-                )
-                collection.embeddings.append(embedding_store)
-                session.add(embedding_store)
-            session.commit()
-
+        self.add_embeddings(texts=texts, embeddings=embeddings, metadatas=metadatas, ids=ids, **kwargs)
         return ids
 
+    def _commit_or_invalidate(self, session: Session) -> None:
+        """Commit, dropping the cached collection uuid if the collection was
+        deleted behind our back (foreign key violation)."""
+        try:
+            session.commit()
+        except sqlalchemy.exc.IntegrityError:
+            self.invalidate_collection_uuid()
+            raise
+
     def similarity_search(
         self,
         query: str,
@@ -361,6 +964,7 @@ class PGVector(VectorStore):
         query: str,
         k: int = 4,
         filter: Optional[dict] = None,
+        **kwargs: Any,
     ) -> List[Tuple[Document, float]]:
         """Return docs most similar to query.
 
@@ -368,13 +972,15 @@ class PGVector(VectorStore):
             query: Text to look up documents similar to.
             k: Number of Documents to return. Defaults to 4.
             filter (Optional[Dict[str, str]]): Filter by metadata. Defaults to None.
+            kwargs: search parameters passed to
+                `similarity_search_with_score_by_vector`.
 
         Returns:
             List of Documents most similar to the query and score for each
         """
         embedding = self.embedding_function.embed_query(query)
         docs = self.similarity_search_with_score_by_vector(
-            embedding=embedding, k=k, filter=filter
+            embedding=embedding, k=k, filter=filter, **kwargs
         )
         return docs
 
@@ -383,54 +989,111 @@ class PGVector(VectorStore):
         embedding: List[float],
         k: int = 4,
         filter: Optional[dict] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        max_distance: Optional[float] = None,
+        exact_match_first: bool = False,
+        rescore_factor: Optional[int] = None,
+        fetch_k: Optional[int] = None,
+        mmr_lambda: Optional[float] = None,
     ) -> List[Tuple[Document, float]]:
-        with Session(self._conn) as session:
-            collection = self.get_collection(session)
-            if not collection:
-                raise ValueError("Collection not found")
-
-            filter_by = EmbeddingStore.collection_id == collection.uuid
+        """Return docs most similar to embedding vector and their distance.
 
-            if filter is not None:
-                filter_clauses = []
-                for key, value in filter.items():
-                    IN = "in"
-                    if isinstance(value, dict) and IN in map(str.lower, value):
-                        value_case_insensitive = {
-                            k.lower(): v for k, v in value.items()
-                        }
-                        filter_by_metadata = EmbeddingStore.cmetadata[key].astext.in_(
-                            value_case_insensitive[IN]
-                        )
-                        filter_clauses.append(filter_by_metadata)
-                    else:
-                        filter_by_metadata = EmbeddingStore.cmetadata[
-                            key
-                        ].astext == str(value)
-                        filter_clauses.append(filter_by_metadata)
-
-                filter_by = sqlalchemy.and_(filter_by, *filter_clauses)
-
-            results: List[QueryResult] = (
-                session.query(
-                    EmbeddingStore,
-                    self.distance_strategy(embedding).label("distance"),  # type: ignore
+        Args:
+            embedding: Embedding to look up documents similar to.
+            k: Number of Documents to return. Defaults to 4.
+            filter (Optional[Dict[str, Any]]): Filter by metadata, see
+                `build_metadata_filter` for the operators. Defaults to None.
+            ef_search: `hnsw.ef_search` for this query, the size of the HNSW
+                candidate list (higher recall, slower). Defaults to the server setting.
+            probes: `ivfflat.probes` for this query, the number of IVFFlat
+                lists scanned. Defaults to the server setting.
+            max_distance: Drop the top-k rows farther than this distance.
+            exact_match_first: If any of the top-k rows has distance 0, return
+                only those rows.
+            rescore_factor: With a quantized index, fetch k times this many
+                candidates and re-rank them by full-precision distance.
+                Defaults to PGVECTOR_RESCORE_FACTOR.
+            fetch_k: Candidates fetched for MMR re-ranking, at least k.
+            mmr_lambda: Enables max-marginal-relevance re-ranking: the
+                top `fetch_k` rows are fetched with their vectors and k of
+                them are picked, trading relevance (1) for diversity (0).
+
+        Both thresholds are applied in SQL on top of the ordered top-k, so the
+        ANN scan still stops after k rows and only qualifying rows are fetched.
+        With MMR they apply to the `fetch_k` candidates before re-ranking.
+
+        An ANN index scan applies the metadata filter to its candidate list
+        only, so a selective filter can leave fewer than k rows. When the
+        top-k before the distance thresholds is short, a count bounded by k
+        checks whether more rows match the filter; only then is the search
+        repeated without index scans, letting the metadata GIN index select
+        the rows and ranking them exactly.
+        """
+        collection_uuid = self.get_collection_uuid()
+        use_mmr = mmr_lambda is not None
+        limit = max(k, fetch_k or k) if use_mmr else k
+        candidates = self._rescore_candidates(limit, rescore_factor)
+        if candidates or use_mmr:
+            ef_search = min(max(ef_search or 0, candidates, limit), HNSW_MAX_EF_SEARCH)
+        with Session(self._conn) as session:
+            self._set_search_params(session, ef_search=ef_search, probes=probes)
+            filter_by = EmbeddingStore.collection_id == collection_uuid
+            metadata_filter = build_metadata_filter(EmbeddingStore.cmetadata, filter)
+            if metadata_filter is not None:
+                filter_by = sqlalchemy.and_(filter_by, metadata_filter)
+
+            if candidates:
+                candidate_rows = (
+                    session.query(EmbeddingStore.document, EmbeddingStore.cmetadata, EmbeddingStore.embedding)
+                    .filter(filter_by)
+                    .order_by(self._quantized_distance(EmbeddingStore.embedding, embedding))
+                    .limit(candidates)
+                    .subquery("candidates")
                 )
-                .filter(filter_by)
-                .order_by(sqlalchemy.asc("distance"))
-                .join(
-                    CollectionStore,
-                    EmbeddingStore.collection_id == CollectionStore.uuid,
+                columns = [
+                    candidate_rows.c.document,
+                    candidate_rows.c.cmetadata,
+                    self._distance(candidate_rows.c.embedding, embedding).label("distance"),
+                ]
+                if use_mmr:
+                    columns.append(self._select_embedding(candidate_rows.c.embedding))
+                query = session.query(*columns).order_by(sqlalchemy.asc("distance")).limit(limit)
+            else:
+                columns = [
+                    EmbeddingStore.document,
+                    EmbeddingStore.cmetadata,
+                    self.distance_strategy(embedding).label("distance"),  # type: ignore
+                ]
+                if use_mmr:
+                    columns.append(self._select_embedding(EmbeddingStore.embedding))
+                query = session.query(*columns).filter(filter_by).order_by(sqlalchemy.asc("distance")).limit(limit)
+            thresholds = max_distance is not None or exact_match_first
+            if thresholds:
+                query = self._filter_by_distance(
+                    session, query, max_distance=max_distance, exact_match_first=exact_match_first
                 )
-                .limit(k)
-                .all()
-            )
+            results, candidate_count = self._fetch_ranked(query, thresholds)
+            if metadata_filter is not None and candidate_count < limit:
+                matching = session.query(sqlalchemy.func.count()).select_from(
+                    session.query(EmbeddingStore.uuid).filter(filter_by).limit(limit).subquery("matching")
+                ).scalar()
+                if matching > candidate_count:
+                    logger.warning(
+                        "######PGVector similarity_search fallback INFO, collection={}, candidates={}, matching={}, "
+                        "re-running without index scans.", self.collection_name, candidate_count, matching
+                    )
+                    session.execute(sqlalchemy.text("SET LOCAL enable_indexscan = off"))
+                    results, _ = self._fetch_ranked(query, thresholds)
+        if use_mmr:
+            selected = maximal_marginal_relevance(embedding, [result.embedding for result in results], k, mmr_lambda)
+            results = [results[index] for index in selected]
 
         docs = [
             (
                 Document(
-                    page_content=result.EmbeddingStore.document,
-                    metadata=result.EmbeddingStore.cmetadata,
+                    page_content=result.document,
+                    metadata=result.cmetadata,
                 ),
                 result.distance if self.embedding_function is not None else None,
             )
@@ -438,6 +1101,495 @@ class PGVector(VectorStore):
         ]
         return docs
 
+    def similarity_search_batch_with_score_by_vector(
+        self,
+        embeddings: Sequence[List[float]],
+        k: int = 4,
+        collection_uuids: Optional[Sequence[uuid.UUID]] = None,
+        filter: Optional[dict] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        rescore_factor: Optional[int] = None,
+    ) -> List[List[List[Tuple[Document, float]]]]:
+        """Return docs most similar to each embedding vector, in one round trip.
+
+        The query vectors are sent once as an array and unnested in a CTE; each
+        collection contributes a `LATERAL` top-k subquery per query vector,
+        with the collection id as a constant so per-collection partial
+        indexes and partitions still apply.
+
+        Args:
+            embeddings: Embeddings to look up documents similar to.
+            k: Number of Documents to return per query and collection.
+            collection_uuids: Collections to search. Defaults to this collection.
+            filter (Optional[Dict[str, Any]]): Filter by metadata. Defaults to None.
+            ef_search: `hnsw.ef_search` for this query.
+            probes: `ivfflat.probes` for this query.
+            rescore_factor: Candidate over-fetch with a quantized index.
+
+        Returns:
+            Results indexed by collection, then by query, in the given order.
+        """
+        if collection_uuids is None:
+            collection_uuids = [self.get_collection_uuid()]
+        results: List[List[List[Tuple[Document, float]]]] = [
+            [[] for _ in embeddings] for _ in collection_uuids
+        ]
+        if not embeddings or not collection_uuids:
+            return results
+
+        table = EmbeddingStore.__table__
+        vector_type = EmbeddingStore.__table__.c.embedding.type
+        query_vectors = sqlalchemy.cast(
+            sqlalchemy.literal(
+                [vector_type.bind_processor(None)(embedding) for embedding in embeddings],
+                ARRAY(sqlalchemy.String),
+            ),
+            ARRAY(vector_type),
+        )
+        unnested = (
+            sqlalchemy.func.unnest(query_vectors)
+            .table_valued("vector", with_ordinality="ordinality")
+            .render_derived()
+        )
+        queries = sqlalchemy.select(unnested.c.vector, unnested.c.ordinality).cte("queries")
+        metadata_filter = build_metadata_filter(table.c.cmetadata, filter)
+        candidates = self._rescore_candidates(k, rescore_factor)
+        if candidates:
+            ef_search = min(max(ef_search or 0, candidates), HNSW_MAX_EF_SEARCH)
+        selects = []
+        for index, collection_uuid in enumerate(collection_uuids):
+            if candidates:
+                candidate_rows = (
+                    sqlalchemy.select(table.c.document, table.c.cmetadata, table.c.embedding)
+                    .where(table.c.collection_id == collection_uuid)
+                    .where(metadata_filter if metadata_filter is not None else sqlalchemy.true())
+                    .order_by(self._quantized_distance(table.c.embedding, queries.c.vector))
+                    .limit(candidates)
+                    .correlate(queries)
+                    .subquery(f"candidates_{index}")
+                )
+                nearest = sqlalchemy.select(
+                    candidate_rows.c.document,
+                    candidate_rows.c.cmetadata,
+                    self._distance(candidate_rows.c.embedding, queries.c.vector).label("distance"),
+                )
+            else:
+                nearest = (
+                    sqlalchemy.select(
+                        table.c.document,
+                        table.c.cmetadata,
+                        self.distance_strategy(queries.c.vector).label("distance"),
+                    )
+                    .where(table.c.collection_id == collection_uuid)
+                    .where(metadata_filter if metadata_filter is not None else sqlalchemy.true())
+                )
+            nearest = nearest.order_by(sqlalchemy.asc("distance")).limit(k).lateral(f"nearest_{index}")
+            selects.append(
+                sqlalchemy.select(
+                    sqlalchemy.literal(index).label("collection_index"),
+                    queries.c.ordinality,
+                    nearest.c.document,
+                    nearest.c.cmetadata,
+                    nearest.c.distance,
+                ).select_from(queries.join(nearest, sqlalchemy.true()))
+            )
+        statement = sqlalchemy.union_all(*selects)
+
+        with Session(self._conn) as session:
+            self._set_search_params(session, ef_search=ef_search, probes=probes)
+            rows = session.execute(statement).all()
+        for row in sorted(rows, key=lambda r: (r.collection_index, r.ordinality, r.distance)):
+            results[row.collection_index][row.ordinality - 1].append(
+                (
+                    Document(page_content=row.document, metadata=row.cmetadata),
+                    row.distance if self.embedding_function is not None else None,
+                )
+            )
+        return results
+
+    def supports_hybrid_search(self) -> bool:
+        return _HYBRID_SEARCH_SUPPORT.get(self.connection_string, False)
+
+    def hybrid_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        """Return docs matching the query by meaning or by wording.
+
+        Args:
+            query: Text to look up documents similar to.
+            k: Number of Documents to return. Defaults to 4.
+            filter (Optional[Dict[str, Any]]): Filter by metadata. Defaults to None.
+            kwargs: search parameters passed to
+                `hybrid_search_with_score_by_vector`.
+        """
+        embedding = self.embedding_function.embed_query(query)
+        return self.hybrid_search_with_score_by_vector(
+            query=query, embedding=embedding, k=k, filter=filter, **kwargs
+        )
+
+    def hybrid_search_with_score_by_vector(
+        self,
+        query: str,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[dict] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        max_distance: Optional[float] = None,
+        exact_match_first: bool = False,
+        rrf_k: int = PGVECTOR_HYBRID_RRF_K,
+        candidates: Optional[int] = None,
+    ) -> List[Tuple[Document, float]]:
+        """Fuse vector and trigram search with reciprocal-rank fusion.
+
+        One statement ranks the nearest `candidates` rows by vector distance
+        and the `candidates` rows whose `document` is most trigram-similar to
+        the query (`%` served by the `pg_trgm` GIN index), then orders their
+        union by `1 / (rrf_k + rank)` summed over both lists. Without
+        `pg_trgm` this is a plain vector search.
+
+        Returns:
+            Documents in fused order with their vector distance, so the
+            thresholds keep their meaning. `max_distance` only drops rows
+            that did not match lexically; `exact_match_first` is applied as
+            in `similarity_search_with_score_by_vector`.
+        """
+        if not self.supports_hybrid_search():
+            return self.similarity_search_with_score_by_vector(
+                embedding=embedding, k=k, filter=filter, ef_search=ef_search, probes=probes,
+                max_distance=max_distance, exact_match_first=exact_match_first,
+            )
+        candidates = candidates or k * PGVECTOR_HYBRID_CANDIDATE_FACTOR
+        collection_uuid = self.get_collection_uuid()
+        table = EmbeddingStore.__table__
+        where = [table.c.collection_id == collection_uuid]
+        metadata_filter = build_metadata_filter(table.c.cmetadata, filter)
+        if metadata_filter is not None:
+            where.append(metadata_filter)
+        distance = self.distance_strategy(embedding)
+
+        vector_hits = (
+            sqlalchemy.select(table.c.uuid, distance.label("distance"))
+            .where(*where)
+            .order_by(sqlalchemy.asc("distance"))
+            .limit(candidates)
+            .subquery("vector_hits")
+        )
+        vector_ranks = sqlalchemy.select(
+            vector_hits.c.uuid,
+            sqlalchemy.func.row_number().over(order_by=vector_hits.c.distance).label("rank"),
+        ).subquery("vector_ranks")
+        lexical_hits = (
+            sqlalchemy.select(table.c.uuid, sqlalchemy.func.similarity(table.c.document, query).label("similarity"))
+            .where(*where, table.c.document.op("%")(query))
+            .order_by(sqlalchemy.desc("similarity"))
+            .limit(candidates)
+            .subquery("lexical_hits")
+        )
+        lexical_ranks = sqlalchemy.select(
+            lexical_hits.c.uuid,
+            sqlalchemy.func.row_number().over(order_by=lexical_hits.c.similarity.desc()).label("rank"),
+        ).subquery("lexical_ranks")
+        fused = (
+            sqlalchemy.select(
+                sqlalchemy.func.coalesce(vector_ranks.c.uuid, lexical_ranks.c.uuid).label("uuid"),
+                (
+                    sqlalchemy.func.coalesce(1.0 / (rrf_k + vector_ranks.c.rank), 0)
+                    + sqlalchemy.func.coalesce(1.0 / (rrf_k + lexical_ranks.c.rank), 0)
+                ).label("score"),
+                lexical_ranks.c.rank.isnot(None).label("lexical"),
+            )
+            .select_from(
+                vector_ranks.join(lexical_ranks, vector_ranks.c.uuid == lexical_ranks.c.uuid, full=True)
+            )
+            .subquery("fused")
+        )
+        ranked = (
+            sqlalchemy.select(
+                table.c.document,
+                table.c.cmetadata,
+                distance.label("distance"),
+                fused.c.score,
+                fused.c.lexical,
+            )
+            .join_from(fused, table, sqlalchemy.and_(
+                table.c.uuid == fused.c.uuid, table.c.collection_id == collection_uuid
+            ))
+            .order_by(fused.c.score.desc(), sqlalchemy.asc("distance"))
+            .limit(k)
+            .subquery("ranked")
+        )
+        if exact_match_first:
+            ranked = sqlalchemy.select(
+                *ranked.c, sqlalchemy.func.min(ranked.c.distance).over().label("min_distance")
+            ).subquery("exact")
+        keep = sqlalchemy.true()
+        if max_distance is not None:
+            keep = sqlalchemy.or_(ranked.c.lexical, ranked.c.distance <= max_distance)
+        if exact_match_first:
+            keep = sqlalchemy.case((ranked.c.min_distance == 0, ranked.c.distance == 0), else_=keep)
+        statement = (
+            sqlalchemy.select(ranked.c.document, ranked.c.cmetadata, ranked.c.distance)
+            .where(keep)
+            .order_by(ranked.c.score.desc(), ranked.c.distance)
+        )
+
+        with Session(self._conn) as session:
+            self._set_search_params(
+                session,
+                ef_search=min(max(ef_search or 0, candidates), HNSW_MAX_EF_SEARCH),
+                probes=probes,
+                similarity_threshold=PGVECTOR_TRGM_SIMILARITY_THRESHOLD,
+            )
+            results = session.execute(statement).all()
+        return [
+            (
+                Document(page_content=result.document, metadata=result.cmetadata),
+                result.distance if self.embedding_function is not None else None,
+            )
+            for result in results
+        ]
+
+    @staticmethod
+    def _filter_by_distance(
+        session: Session,
+        query: sqlalchemy.orm.Query,
+        max_distance: Optional[float] = None,
+        exact_match_first: bool = False,
+    ) -> sqlalchemy.orm.Query:
+        """Wrap an ordered top-k query and filter its rows by distance.
+
+        The top-k is a CTE, scanned once; its row count before filtering is
+        returned as `candidate_count` on every row, and on a single row of
+        NULLs when no row passes the thresholds (see `_fetch_ranked`).
+        """
+        top_k = query.cte("top_k")
+        names = [column.name for column in top_k.c]
+        counts = sqlalchemy.select(sqlalchemy.func.count().label("candidate_count")).select_from(top_k).subquery("counts")
+        if exact_match_first:
+            top_k = (
+                sqlalchemy.select(
+                    *top_k.c, sqlalchemy.func.min(top_k.c.distance).over().label("min_distance")
+                )
+                .subquery("ranked")
+            )
+        columns = [top_k.c[name] for name in names]
+        clauses = []
+        if max_distance is not None:
+            clauses.append(top_k.c.distance <= max_distance)
+        if exact_match_first:
+            clauses = [
+                sqlalchemy.case(
+                    (top_k.c.min_distance == 0, top_k.c.distance == 0),
+                    else_=sqlalchemy.and_(sqlalchemy.true(), *clauses),
+                )
+            ]
+        filtered = sqlalchemy.select(*columns).where(*clauses).subquery("filtered")
+        return (
+            session.query(*[filtered.c[name] for name in names], counts.c.candidate_count)
+            .select_from(counts)
+            .outerjoin(filtered, sqlalchemy.true())
+            .order_by(filtered.c.distance)
+        )
+
+    @staticmethod
+    def _fetch_ranked(query: sqlalchemy.orm.Query, thresholds: bool) -> Tuple[List[Any], int]:
+        """Run a top-k query, returning its rows and the top-k size before
+        the distance thresholds of `_filter_by_distance`, if applied."""
+        rows = query.all()
+        if not thresholds:
+            return rows, len(rows)
+        candidate_count = rows[0].candidate_count if rows else 0
+        return [row for row in rows if row.distance is not None], candidate_count
+
+    def _select_embedding(self, column: sqlalchemy.sql.ColumnElement) -> sqlalchemy.sql.ColumnElement:
+        """Vector column as a NumPy array, in binary format when enabled."""
+        return select_binary_vector(column) if self.use_binary_transfer() else column.label("embedding")
+
+    def _rescore_candidates(self, k: int, rescore_factor: Optional[int] = None) -> int:
+        """Candidates fetched from a quantized index, 0 without quantization."""
+        if self.quantization == QUANTIZATION_NONE:
+            return 0
+        return k * max(1, rescore_factor or PGVECTOR_RESCORE_FACTOR)
+
+    def _distance(self, column: sqlalchemy.sql.ColumnElement, embedding: Any) -> sqlalchemy.sql.ColumnElement:
+        """Full-precision distance of `distance_strategy` on any vector column."""
+        return getattr(column, _DISTANCE_METHODS[self.distance_strategy])(embedding)
+
+    def _quantized_distance(self, column: sqlalchemy.sql.ColumnElement, embedding: Any) -> sqlalchemy.sql.ColumnElement:
+        return quantized_distance(
+            column, embedding, self.quantization, ADA_TOKEN_COUNT, _DISTANCE_OPERATORS[self.distance_strategy]
+        )
+
+    @staticmethod
+    def _set_search_params(
+        session: Session,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        similarity_threshold: Optional[float] = None,
+    ) -> None:
+        """Apply per-query search parameters to the session's transaction.
+
+        All of them are set by one `SELECT set_config(...)`, so a search
+        costs a single extra round trip however many parameters it sets.
+        """
+        settings = {}
+        if ef_search:
+            settings["hnsw.ef_search"] = str(int(ef_search))
+        if probes:
+            settings["ivfflat.probes"] = str(int(probes))
+        if similarity_threshold is not None:
+            settings["pg_trgm.similarity_threshold"] = str(similarity_threshold)
+        if not settings:
+            return
+        params = {}
+        calls = []
+        for index, (name, value) in enumerate(settings.items()):
+            params[f"name_{index}"], params[f"value_{index}"] = name, value
+            calls.append(f"set_config(:name_{index}, :value_{index}, true)")
+        session.execute(sqlalchemy.text(f"SELECT {', '.join(calls)}"), params)
+
+    def get_index_name(self, index_type: str, collection_uuid: uuid.UUID) -> str:
+        return f"ix_pg_emb_{index_type}_{collection_uuid.hex}"
+
+    def create_index(
+        self,
+        index_type: str = PGVECTOR_INDEX_TYPE,
+        m: int = PGVECTOR_HNSW_M,
+        ef_construction: int = PGVECTOR_HNSW_EF_CONSTRUCTION,
+        lists: Optional[int] = None,
+    ) -> str:
+        """Create an ANN index covering this collection only.
+
+        The index is a partial index (`WHERE collection_id = ...`), or an
+        index on the collection's partition with the partitioned layout,
+        built with the operator class matching `distance_strategy` and
+        created concurrently so searches and inserts are not blocked.
+        With `quantization` set, the index is built on the quantized
+        expression searches order by, under its own name, so the
+        full-precision index can be dropped once it is ready.
+
+        Args:
+            index_type: `hnsw` or `ivfflat`.
+            m: HNSW max connections per layer.
+            ef_construction: HNSW candidate list size while building.
+            lists: IVFFlat list count, defaults to rows / 1000 (at least 10)
+                up to 1M rows and sqrt(rows) above.
+
+        Returns:
+            Name of the index.
+        """
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {index_type}")
+        collection_uuid = self.get_collection_uuid()
+        index_name = self.get_index_name(index_type, collection_uuid)
+        if self.quantization != QUANTIZATION_NONE:
+            self._check_quantization_support()
+            index_name = self.get_index_name(f"{index_type}_{self.quantization}", collection_uuid)
+        if PGVECTOR_PARTITIONED:
+            target, where = get_partition_name(collection_uuid), ""
+        else:
+            target, where = EmbeddingStore.__tablename__, f" WHERE collection_id = '{collection_uuid}'"
+        operator_class = _INDEX_OPERATOR_CLASSES[self.distance_strategy]
+        if index_type == "hnsw":
+            with_params = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+        else:
+            if not lists:
+                rows = self.count_embeddings()
+                lists = max(10, rows // 1000) if rows <= 1000000 else int(rows ** 0.5)
+            with_params = f"lists = {int(lists)}"
+        statement = sqlalchemy.text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} "
+            f"ON {target} USING {index_type} "
+            f"({index_expression(self.quantization, ADA_TOKEN_COUNT, operator_class)}) "
+            f"WITH ({with_params}){where}"
+        )
+        with self._conn.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(statement)
+        logger.info("######PGvector INFO, create index={}, collection={}.", index_name, self.collection_name)
+        return index_name
+
+    def _check_quantization_support(self) -> None:
+        with self._conn.connect() as conn:
+            version = conn.execute(
+                sqlalchemy.text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            ).scalar()
+        if not version or parse_version(version) < MIN_PGVECTOR_VERSION:
+            raise ValueError(
+                f"Quantization {self.quantization} needs pgvector "
+                f"{'.'.join(map(str, MIN_PGVECTOR_VERSION))}+, found {version}"
+            )
+
+    def rebuild_index(self) -> List[str]:
+        """Rebuild this collection's ANN indexes concurrently, e.g. after a
+        large share of the rows changed (IVFFlat lists are not re-trained
+        on insert)."""
+        index_names = [status["index_name"] for status in self.get_index_status()]
+        with self._conn.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            for index_name in index_names:
+                conn.execute(sqlalchemy.text(f"REINDEX INDEX CONCURRENTLY {index_name}"))
+        return index_names
+
+    def drop_index(self, index_type: Optional[str] = None) -> List[str]:
+        """Drop this collection's ANN indexes, all of them or one type."""
+        index_names = [
+            status["index_name"] for status in self.get_index_status()
+            if index_type is None or status["index_type"] == index_type
+        ]
+        with self._conn.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            for index_name in index_names:
+                conn.execute(sqlalchemy.text(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}"))
+        return index_names
+
+    def get_index_status(self) -> List[Dict[str, Any]]:
+        """Return name, type, definition, validity, size and scan count of
+        this collection's ANN indexes."""
+        collection_uuid = self.get_collection_uuid()
+        statement = sqlalchemy.text(
+            "SELECT c.relname AS index_name, am.amname AS index_type, "
+            "pg_get_indexdef(i.indexrelid) AS definition, i.indisvalid AS is_valid, "
+            "pg_relation_size(i.indexrelid) AS size_bytes, s.idx_scan AS scans "
+            "FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "JOIN pg_am am ON am.oid = c.relam "
+            "LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = i.indexrelid "
+            "WHERE c.relname LIKE :pattern"
+        )
+        with self._conn.connect() as conn:
+            rows = conn.execute(statement, {"pattern": f"ix_pg_emb_%_{collection_uuid.hex}"}).mappings().all()
+        return [dict(row) for row in rows]
+
+    def count_embeddings(self) -> int:
+        collection_uuid = self.get_collection_uuid()
+        table = EmbeddingStore.__table__
+        with self._conn.connect() as conn:
+            return conn.execute(
+                sqlalchemy.select(sqlalchemy.func.count())
+                .select_from(table)
+                .where(table.c.collection_id == collection_uuid)
+            ).scalar()
+
+    def fingerprint_embeddings(self) -> str:
+        """Return the md5 of the comma-joined row uuids of the collection in
+        ascending order, matching `uuid_fingerprint` of the vector clients.
+        Rows are never updated in place, so any write changes it."""
+        collection_uuid = self.get_collection_uuid()
+        with self._conn.connect() as conn:
+            return conn.execute(
+                sqlalchemy.text(
+                    f"SELECT md5(coalesce(string_agg(uuid::text, ',' ORDER BY uuid), '')) "
+                    f"FROM {EmbeddingStore.__tablename__} WHERE collection_id = :collection_id"
+                ),
+                {"collection_id": collection_uuid},
+            ).scalar()
+
     def similarity_search_by_vector(
         self,
         embedding: List[float],
@@ -0,0 +1,673 @@
+"""
+Append-only local vector store with an IVF coarse quantizer, in NumPy.
+
+Each namespace is a directory:
+
+    manifest.json           segments, centroids and tombstone log in use
+    seg_000001.npy          float32 vectors of one insert, memory-mapped
+    seg_000001.json         custom ids, uuids, documents and metadata
+    seg_000001.lists.npy    IVF list of every row (only once trained)
+    ivf_000004.npy          IVF centroids (L2-normalized)
+    tomb_000004.log         rows (segment and row) deleted since the last compaction
+
+Files are never modified after they are written. The manifest is replaced
+atomically and names the current set, so a crash leaves the previous state
+readable. Deletes append to the tombstone log. Compaction merges the live
+rows into one segment, retrains the IVF centroids with spherical k-means
+and starts a new tombstone log; it runs in a background thread once
+segments pile up, too many rows are deleted, or the namespace grows large
+enough to need an IVF index.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.docstore.document import Document
+from loguru import logger
+
+from models.vectordatabase.custom.pgvector_filter import compile_metadata_filter
+from models.vectordatabase.mmr import maximal_marginal_relevance
+from models.vectordatabase.vector_mirror import EXACT_MATCH_EPSILON, normalize_rows
+
+MANIFEST_FILE = "manifest.json"
+QUERY_COLUMNS = ("uuid", "collection_id", "custom_id", "document", "cmetadata", "embedding")
+IVF_INDEX_TYPE = "ivf"
+# Rows scored per matrix product when assigning IVF lists.
+ASSIGN_CHUNK_ROWS = 65536
+# k-means trains on at most this many rows per list, like faiss.
+TRAIN_ROWS_PER_LIST = 256
+
+
+@lru_cache(maxsize=None)
+def _row_type(columns: Tuple[str, ...]) -> type:
+    unknown = set(columns) - set(QUERY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {sorted(unknown)}")
+    return namedtuple("EmbeddingRow", columns)
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Return the nearest centroid (cosine) of every vector."""
+    lists = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK_ROWS):
+        chunk = normalize_rows(vectors[start:start + ASSIGN_CHUNK_ROWS])
+        lists[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return lists
+
+
+def train_ivf(
+    vectors: np.ndarray,
+    lists: int,
+    iterations: int = 10,
+    seed: int = 0,
+) -> np.ndarray:
+    """Train `lists` L2-normalized centroids with spherical k-means.
+
+    Args:
+        vectors: Rows to cluster; a random sample is used for large inputs.
+        lists: Number of centroids, at most the number of rows.
+        iterations: Lloyd iterations.
+        seed: Seed for sampling and initialization.
+    """
+    rng = np.random.default_rng(seed)
+    lists = max(1, min(lists, len(vectors)))
+    sample_size = min(len(vectors), lists * TRAIN_ROWS_PER_LIST)
+    sample = rng.choice(len(vectors), sample_size, replace=False) if sample_size < len(vectors) else slice(None)
+    data = normalize_rows(vectors[sample])
+    centroids = data[rng.choice(len(data), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assigned = np.argmax(data @ centroids.T, axis=1)
+        order = np.argsort(assigned, kind="stable")
+        ordered = assigned[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        # Lists left empty keep their previous centroid.
+        centroids[ordered[starts]] = normalize_rows(np.add.reduceat(data[order], starts, axis=0))
+    return centroids
+
+
+class Segment:
+    """One immutable batch of rows; vectors are memory-mapped."""
+
+    def __init__(
+        self,
+        name: str,
+        vectors: np.ndarray,
+        ids: List[str],
+        uuids: List[str],
+        documents: List[str],
+        metadatas: List[dict],
+        lists: Optional[np.ndarray] = None,
+    ):
+        self.name = name
+        self.vectors = vectors
+        self.ids = ids
+        self.uuids = uuids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.lists = lists
+        norms = np.linalg.norm(vectors, axis=1) if len(vectors) else np.empty(0, dtype=np.float32)
+        self.inv_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        self.row_of = {custom_id: row for row, custom_id in enumerate(ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def write(
+        cls,
+        directory: str,
+        name: str,
+        vectors: np.ndarray,
+        ids: List[str],
+        uuids: List[str],
+        documents: List[str],
+        metadatas: List[dict],
+        lists: Optional[np.ndarray] = None,
+    ) -> "Segment":
+        np.save(os.path.join(directory, f"{name}.npy"), vectors)
+        if lists is not None:
+            np.save(os.path.join(directory, f"{name}.lists.npy"), lists)
+        with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": ids, "uuids": uuids, "documents": documents, "metadatas": metadatas},
+                      f, ensure_ascii=False, default=str)
+        return cls.load(directory, name, lists is not None)
+
+    @classmethod
+    def load(cls, directory: str, name: str, has_lists: bool) -> "Segment":
+        with open(os.path.join(directory, f"{name}.json"), "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        return cls(
+            name=name,
+            vectors=np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"),
+            ids=rows["ids"],
+            uuids=rows["uuids"],
+            documents=rows["documents"],
+            metadatas=rows["metadatas"],
+            lists=np.load(os.path.join(directory, f"{name}.lists.npy")) if has_lists else None,
+        )
+
+
+class StoreState:
+    """Segments, their live-row masks and the IVF centroids; replaced as a
+    whole on every change so searches never see a half-applied write."""
+
+    def __init__(
+        self,
+        segments: List[Segment],
+        live: List[np.ndarray],
+        centroids: Optional[np.ndarray] = None,
+    ):
+        self.segments = segments
+        self.live = live
+        self.centroids = centroids
+        self.total = sum(len(segment) for segment in segments)
+        self.live_count = int(sum(mask.sum() for mask in live))
+
+
+class LocalVectorStore:
+    """Vector store of one namespace backed by files in `directory`.
+
+    Writes are serialized by a lock; searches and queries read the current
+    `StoreState` without locking. Compaction does its heavy work outside the
+    lock, so writes are only held up while the manifest is swapped.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ivf_min_rows: int,
+        ivf_lists: int = 0,
+        probes: int = 10,
+        compact_segments: int = 16,
+        compact_deleted_ratio: float = 0.2,
+    ):
+        """
+        Args:
+            directory: Directory of the namespace; created on first insert.
+            ivf_min_rows: Live rows from which an IVF index is trained.
+            ivf_lists: IVF lists, 0 for sqrt(rows).
+            probes: Lists scanned per search by default.
+            compact_segments: Segment count that triggers compaction.
+            compact_deleted_ratio: Deleted row ratio that triggers compaction.
+        """
+        self.directory = directory
+        self.ivf_min_rows = ivf_min_rows
+        self.ivf_lists = ivf_lists
+        self.probes = probes
+        self.compact_segments = compact_segments
+        self.compact_deleted_ratio = compact_deleted_ratio
+        self._lock = threading.RLock()
+        self._compacting = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+        self._dropped = False
+        self._manifest = self._read_manifest()
+        self._state = self._load_state()
+
+    # -- read path ---------------------------------------------------------
+
+    def count(self) -> int:
+        return self._state.live_count
+
+    def search(
+        self,
+        embedding: Sequence[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        probes: Optional[int] = None,
+        max_distance: Optional[float] = None,
+        exact_match_first: bool = False,
+        fetch_k: Optional[int] = None,
+        mmr_lambda: Optional[float] = None,
+    ) -> List[Tuple[Document, float]]:
+        """Return the k nearest live rows by cosine distance.
+
+        With an IVF index only the `probes` lists nearest to the query are
+        scanned. A metadata filter is applied before scoring; if it leaves
+        fewer than k rows in the probed lists all lists are scanned, so
+        selective filters are still answered.
+
+        Args:
+            embedding: Query vector.
+            k: Number of Documents to return.
+            filter: Metadata filter, see `pgvector_filter`.
+            probes: Lists to scan, defaults to the store setting.
+            max_distance: Drop rows farther than this.
+            exact_match_first: When a row matches exactly (distance 0),
+                return only the exact matches.
+            fetch_k: Candidates fetched for MMR re-ranking, at least k.
+            mmr_lambda: Pick k of the `fetch_k` nearest rows by max marginal
+                relevance, trading relevance (1) for diversity (0).
+
+        Returns:
+            Documents and cosine distances, nearest first (in MMR pick order
+            with `mmr_lambda`).
+        """
+        state = self._state
+        predicate = compile_metadata_filter(filter)
+        if k <= 0 or state.live_count == 0:
+            return []
+        limit = k if mmr_lambda is None else max(k, fetch_k or k)
+        query = normalize_rows(embedding)[0]
+        probe_lists = None
+        if state.centroids is not None:
+            nprobe = max(1, min(probes or self.probes, len(state.centroids)))
+            probe_lists = np.argpartition(-(state.centroids @ query), nprobe - 1)[:nprobe]
+        hits = self._scan(state, query, limit, predicate, probe_lists)
+        if predicate is not None and probe_lists is not None and len(hits) < limit:
+            hits = self._scan(state, query, limit, predicate, None)
+        if not hits:
+            return []
+        hits.sort(key=lambda hit: -hit[0])
+        hits = hits[:limit]
+        distances = np.maximum(1.0 - np.array([hit[0] for hit in hits], dtype=np.float64), 0.0)
+        distances[distances < EXACT_MATCH_EPSILON] = 0.0
+        keep = np.ones(len(hits), dtype=bool)
+        if exact_match_first and distances[0] == 0.0:
+            keep = distances == 0.0
+        elif max_distance is not None:
+            keep = distances <= max_distance
+        hits = [(hit, float(distance)) for hit, distance, kept in zip(hits, distances, keep) if kept]
+        if mmr_lambda is not None:
+            selected = maximal_marginal_relevance(
+                query, [segment.vectors[row] for (_, segment, row), _ in hits], k, mmr_lambda
+            )
+            hits = [hits[index] for index in selected]
+        return [
+            (Document(page_content=segment.documents[row], metadata=dict(segment.metadatas[row] or {})), distance)
+            for (_, segment, row), distance in hits
+        ]
+
+    @staticmethod
+    def _scan(
+        state: StoreState,
+        query: np.ndarray,
+        k: int,
+        predicate: Any,
+        probe_lists: Optional[np.ndarray],
+    ) -> List[Tuple[float, Segment, int]]:
+        hits = []
+        for segment, live in zip(state.segments, state.live):
+            mask = live
+            if probe_lists is not None and segment.lists is not None:
+                mask = mask & np.isin(segment.lists, probe_lists)
+            rows = np.flatnonzero(mask)
+            if predicate is not None and len(rows):
+                rows = rows[np.fromiter((predicate(segment.metadatas[row]) for row in rows),
+                                        dtype=bool, count=len(rows))]
+            if not len(rows):
+                continue
+            if len(rows) * 2 > len(segment):
+                # Gathering most rows costs more than scoring the whole mapped matrix.
+                scores = ((segment.vectors @ query) * segment.inv_norms)[rows]
+            else:
+                scores = (segment.vectors[rows] @ query) * segment.inv_norms[rows]
+            if len(rows) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                rows, scores = rows[top], scores[top]
+            hits.extend((float(score), segment, int(row)) for score, row in zip(scores, rows))
+        return hits
+
+    def query(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        columns: Sequence[str] = QUERY_COLUMNS,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> List[Any]:
+        """Return live rows ordered by custom_id, like `PGVector.query_embeddings`.
+
+        Args:
+            ids: Custom ids to fetch; all rows when None.
+            columns: Subset of `QUERY_COLUMNS`.
+            limit: Page size.
+            after: Last custom_id of the previous page.
+        """
+        row_type = _row_type(tuple(columns))
+        state = self._state
+        refs = []
+        for segment, live in zip(state.segments, state.live):
+            if ids is None:
+                rows: Iterable[int] = np.flatnonzero(live)
+            else:
+                rows = [segment.row_of[i] for i in ids if i in segment.row_of and live[segment.row_of[i]]]
+            refs.extend((segment.ids[row], segment, row) for row in rows)
+        refs.sort(key=lambda ref: ref[0])
+        if after is not None:
+            refs = [ref for ref in refs if ref[0] > after]
+        if limit is not None:
+            refs = refs[:limit]
+        collection_id = self._manifest.get("collection_id")
+        values = {
+            "uuid": lambda s, r: s.uuids[r],
+            "collection_id": lambda s, r: collection_id,
+            "custom_id": lambda s, r: s.ids[r],
+            "document": lambda s, r: s.documents[r],
+            "cmetadata": lambda s, r: s.metadatas[r],
+            "embedding": lambda s, r: np.array(s.vectors[r]),
+        }
+        return [row_type(*(values[column](segment, row) for column in columns)) for _, segment, row in refs]
+
+    def status(self) -> Dict[str, Any]:
+        state = self._state
+        size_bytes = 0
+        for name in self._files(self._manifest):
+            try:
+                size_bytes += os.path.getsize(os.path.join(self.directory, name))
+            except OSError:
+                pass
+        return {
+            "index_name": self._manifest.get("centroids"),
+            "index_type": IVF_INDEX_TYPE,
+            "is_valid": state.centroids is not None,
+            "lists": 0 if state.centroids is None else len(state.centroids),
+            "rows": state.live_count,
+            "deleted_rows": state.total - state.live_count,
+            "segments": len(state.segments),
+            "size_bytes": size_bytes,
+        }
+
+    # -- write path --------------------------------------------------------
+
+    def add(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[dict],
+        vectors: Any,
+    ) -> List[str]:
+        """Append one segment holding the given rows.
+
+        Raises:
+            ValueError: If the counts or the vector dimension do not match.
+        """
+        vectors = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+        if vectors.ndim != 2 or not (len(ids) == len(documents) == len(metadatas) == len(vectors)):
+            raise ValueError(f"Mismatched rows: ids={len(ids)}, documents={len(documents)}, "
+                             f"metadatas={len(metadatas)}, vectors={vectors.shape}")
+        if not ids:
+            return []
+        with self._lock:
+            dimension = self._manifest.get("dimension")
+            if dimension and vectors.shape[1] != dimension:
+                raise ValueError(f"Expected {dimension} dimensions, got {vectors.shape[1]}")
+            os.makedirs(self.directory, exist_ok=True)
+            state = self._state
+            segment = Segment.write(
+                directory=self.directory,
+                name=self._next_name("seg"),
+                vectors=vectors,
+                ids=list(ids),
+                uuids=[str(uuid.uuid4()) for _ in ids],
+                documents=list(documents),
+                metadatas=[metadata or {} for metadata in metadatas],
+                lists=None if state.centroids is None else assign_lists(vectors, state.centroids),
+            )
+            self._manifest["dimension"] = int(vectors.shape[1])
+            self._manifest["segments"] = self._manifest["segments"] + [segment.name]
+            self._write_manifest()
+            self._state = StoreState(state.segments + [segment],
+                                     state.live + [np.ones(len(segment), dtype=bool)],
+                                     state.centroids)
+        self._maybe_compact()
+        return list(ids)
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """Tombstone the given custom ids and return how many were live.
+
+        Tombstones name the deleted row rather than its custom id, so an id
+        that is added again after a delete stays live.
+        """
+        with self._lock:
+            state = self._state
+            live = list(state.live)
+            deleted = []
+            for custom_id in dict.fromkeys(ids):
+                for index, segment in enumerate(state.segments):
+                    row = segment.row_of.get(custom_id)
+                    if row is None or not live[index][row]:
+                        continue
+                    if live[index] is state.live[index]:
+                        live[index] = live[index].copy()
+                    live[index][row] = False
+                    deleted.append((segment.name, row))
+                    break
+            if deleted:
+                with open(os.path.join(self.directory, self._manifest["tombstones"]), "a", encoding="utf-8") as f:
+                    f.writelines(f"{name}\t{row}\n" for name, row in deleted)
+                self._state = StoreState(state.segments, live, state.centroids)
+        self._maybe_compact()
+        return len(deleted)
+
+    def drop(self) -> int:
+        """Delete the namespace directory and return the live rows it held."""
+        with self._lock:
+            deleted = self._state.live_count
+            self._dropped = True
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._manifest = self._empty_manifest()
+            self._state = StoreState([], [])
+        return deleted
+
+    def compact(self, train: Optional[bool] = None, lists: Optional[int] = None) -> None:
+        """Merge live rows into one segment and retrain the IVF index.
+
+        The merged segment and the centroids are built without holding the
+        write lock; it is taken again only to fold in the rows added or
+        deleted meanwhile and to swap the manifest.
+
+        Args:
+            train: Train IVF centroids regardless of `ivf_min_rows` (True),
+                drop them (False), or decide from the row count (None).
+            lists: IVF lists for this training, defaults to the store setting.
+        """
+        with self._compacting:
+            with self._lock:
+                if self._dropped or not self._manifest["segments"]:
+                    return
+                if train is not None:
+                    self._manifest["ivf"] = train
+                state = self._state
+                ivf = self._manifest["ivf"]
+                dimension = self._manifest["dimension"]
+                merged_name = self._next_name("seg")
+                centroids_name = self._next_name("ivf")
+            segments = [(segment, np.flatnonzero(live)) for segment, live in zip(state.segments, state.live)]
+            vectors = np.concatenate([segment.vectors[rows] for segment, rows in segments]) \
+                if state.live_count else np.empty((0, dimension), dtype=np.float32)
+            centroids = assigned = None
+            if state.live_count and ivf is not False and (ivf or state.live_count >= self.ivf_min_rows):
+                centroids = train_ivf(vectors, lists or self.ivf_lists or int(np.sqrt(state.live_count)))
+                assigned = assign_lists(vectors, centroids)
+            merged = []
+            if state.live_count:
+                merged = [Segment.write(
+                    directory=self.directory,
+                    name=merged_name,
+                    vectors=vectors,
+                    ids=[segment.ids[row] for segment, rows in segments for row in rows],
+                    uuids=[segment.uuids[row] for segment, rows in segments for row in rows],
+                    documents=[segment.documents[row] for segment, rows in segments for row in rows],
+                    metadatas=[segment.metadatas[row] for segment, rows in segments for row in rows],
+                    lists=assigned,
+                )]
+            if centroids is not None:
+                np.save(os.path.join(self.directory, f"{centroids_name}.npy"), centroids)
+            with self._lock:
+                if self._dropped:
+                    return
+                current = self._state
+                live = [np.concatenate([current.live[index][rows] for index, (_, rows) in enumerate(segments)])] \
+                    if merged else []
+                # Segments appended meanwhile were assigned to the old centroids.
+                for segment, mask in zip(current.segments[len(state.segments):], current.live[len(state.segments):]):
+                    merged.append(Segment.write(
+                        directory=self.directory,
+                        name=self._next_name("seg"),
+                        vectors=np.asarray(segment.vectors),
+                        ids=segment.ids,
+                        uuids=segment.uuids,
+                        documents=segment.documents,
+                        metadatas=segment.metadatas,
+                        lists=None if centroids is None else assign_lists(segment.vectors, centroids),
+                    ))
+                    live.append(mask)
+                old_files = self._files(self._manifest)
+                self._manifest["centroids"] = None if centroids is None else f"{centroids_name}.npy"
+                self._manifest["tombstones"] = f"{self._next_name('tomb')}.log"
+                with open(os.path.join(self.directory, self._manifest["tombstones"]), "w", encoding="utf-8") as f:
+                    f.writelines(f"{segment.name}\t{row}\n"
+                                 for segment, mask in zip(merged, live) for row in np.flatnonzero(~mask))
+                self._manifest["segments"] = [segment.name for segment in merged]
+                self._write_manifest()
+                self._state = StoreState(merged, live, centroids)
+                self._remove_files(set(old_files) - set(self._files(self._manifest)))
+        logger.info("######LocalVectorStore compact INFO, directory={}, rows={}, lists={}.",
+                    self.directory, self._state.live_count, 0 if centroids is None else len(centroids))
+
+    def wait(self) -> None:
+        """Wait for a running background compaction."""
+        thread = self._compaction
+        if thread is not None:
+            thread.join()
+
+    def _maybe_compact(self) -> None:
+        state = self._state
+        needed = (
+            len(state.segments) > self.compact_segments
+            or (state.total and (state.total - state.live_count) / state.total > self.compact_deleted_ratio)
+            or (state.centroids is None and state.live_count and self._manifest["ivf"] is not False
+                and (self._manifest["ivf"] or state.live_count >= self.ivf_min_rows))
+        )
+        if not needed:
+            return
+        with self._lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return
+            self._compaction = threading.Thread(target=self._compact_in_background,
+                                                name="local-vector-compaction", daemon=True)
+            self._compaction.start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception as err:
+            logger.error("######LocalVectorStore compact ERROR, directory={}: {}", self.directory, err)
+
+    # -- files -------------------------------------------------------------
+
+    def _empty_manifest(self) -> Dict[str, Any]:
+        return {
+            "collection_id": str(uuid.uuid4()),
+            "dimension": None,
+            "sequence": 1,
+            "segments": [],
+            "centroids": None,
+            "tombstones": "tomb_000000.log",
+            # None: train from ivf_min_rows, True: always, False: never
+            "ivf": None,
+        }
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return self._empty_manifest()
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self) -> None:
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _load_state(self) -> StoreState:
+        manifest = self._manifest
+        centroids = None
+        if manifest["centroids"]:
+            centroids = np.load(os.path.join(self.directory, manifest["centroids"]))
+        segments = [Segment.load(self.directory, name, centroids is not None) for name in manifest["segments"]]
+        live = [np.ones(len(segment), dtype=bool) for segment in segments]
+        live_of = {segment.name: mask for segment, mask in zip(segments, live)}
+        path = os.path.join(self.directory, manifest["tombstones"])
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    name, _, row = line.strip().partition("\t")
+                    if name in live_of and row:
+                        live_of[name][int(row)] = False
+        if os.path.isdir(self.directory):
+            # Files left behind by a crash or by a platform that cannot delete mapped files.
+            self._remove_files(set(os.listdir(self.directory)) - set(self._files(manifest)) - {MANIFEST_FILE})
+        return StoreState(segments, live, centroids)
+
+    @staticmethod
+    def _files(manifest: Dict[str, Any]) -> List[str]:
+        files = [manifest["tombstones"]]
+        if manifest["centroids"]:
+            files.append(manifest["centroids"])
+        for name in manifest["segments"]:
+            files += [f"{name}.npy", f"{name}.json"]
+            if manifest["centroids"]:
+                files.append(f"{name}.lists.npy")
+        return files
+
+    def _remove_files(self, names: Iterable[str]) -> None:
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            except OSError as err:
+                logger.warning("######LocalVectorStore WARN, cannot remove {}: {}", name, err)
+
+    def _next_name(self, prefix: str) -> str:
+        sequence = self._manifest["sequence"]
+        self._manifest["sequence"] = sequence + 1
+        return f"{prefix}_{sequence:06d}"
+
+
+_stores: Dict[str, LocalVectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_local_store(root: str, namespace: str, **kwargs: Any) -> LocalVectorStore:
+    """Return the process-wide store of a namespace under `root`.
+
+    Keyword arguments are passed to `LocalVectorStore` on first use.
+    """
+    directory = os.path.join(root, re.sub(r"[^\w.-]", "_", namespace))
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = _stores[directory] = LocalVectorStore(directory, **kwargs)
+        return store
+
+
+def drop_local_store(root: str, namespace: str) -> int:
+    """Delete a namespace under `root` and return the live rows it held."""
+    directory = os.path.join(root, re.sub(r"[^\w.-]", "_", namespace))
+    with _stores_lock:
+        store = _stores.pop(directory, None)
+    if store is None:
+        if not os.path.isdir(directory):
+            return 0
+        store = LocalVectorStore(directory, ivf_min_rows=0)
+    store.wait()
+    return store.drop()
+
+
+def close_local_stores() -> None:
+    """Wait for background compactions and forget the opened stores."""
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        store.wait()
@@ -0,0 +1,85 @@
+"""
+Binary transfer of pgvector values, backed by NumPy `float32` buffers.
+
+pgvector's binary send/recv format is an int16 dimension count, an int16
+reserved word and the components as big-endian float4. Reads select
+`vector_send(embedding)` as bytea and decode it with `BinaryVector`;
+writes go through `COPY ... FROM STDIN WITH (FORMAT BINARY)` built by
+`build_copy_buffer`.
+"""
+from __future__ import annotations
+import io
+import struct
+import uuid
+from typing import Iterable, List, Optional, Sequence, Union
+import numpy as np
+import sqlalchemy
+
+_VECTOR_HEADER = struct.Struct(">HH")
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_COPY_TRAILER = struct.pack(">h", -1)
+_FIELD_COUNT = struct.Struct(">h")
+_FIELD_LENGTH = struct.Struct(">i")
+_NULL_FIELD = _FIELD_LENGTH.pack(-1)
+_JSONB_VERSION = b"\x01"
+
+VectorLike = Union[Sequence[float], np.ndarray]
+
+
+def encode_vectors(vectors: Sequence[VectorLike]) -> List[bytes]:
+    """Encode vectors of the same dimension into pgvector binary format."""
+    if len(vectors) == 0:
+        return []
+    matrix = np.asarray(vectors, dtype=">f4")
+    header = _VECTOR_HEADER.pack(matrix.shape[1], 0)
+    return [header + row.tobytes() for row in matrix]
+
+
+def decode_vector(value: Union[bytes, memoryview]) -> np.ndarray:
+    """Decode a pgvector binary value into a native `float32` array."""
+    dimensions, _ = _VECTOR_HEADER.unpack_from(value, 0)
+    return np.frombuffer(value, dtype=">f4", count=dimensions, offset=_VECTOR_HEADER.size).astype(np.float32)
+
+
+class BinaryVector(sqlalchemy.types.TypeDecorator):
+    """Result type for `vector_send(embedding)`, decoded to `np.ndarray`."""
+    impl = sqlalchemy.LargeBinary
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        return decode_vector(value) if value is not None else None
+
+
+def select_binary_vector(column: sqlalchemy.Column, label: str = "embedding") -> sqlalchemy.sql.ColumnElement:
+    return sqlalchemy.type_coerce(sqlalchemy.func.vector_send(column), BinaryVector()).label(label)
+
+
+def encode_uuid(value: uuid.UUID) -> bytes:
+    return value.bytes
+
+
+def encode_text(value: Optional[str]) -> Optional[bytes]:
+    return value.encode("utf-8") if value is not None else None
+
+
+def encode_json(value: Optional[str], jsonb: bool = False) -> Optional[bytes]:
+    if value is None:
+        return None
+    return (_JSONB_VERSION if jsonb else b"") + value.encode("utf-8")
+
+
+def build_copy_buffer(rows: Iterable[Sequence[Optional[bytes]]]) -> io.BytesIO:
+    """Build a binary COPY payload from rows of already encoded fields."""
+    buffer = io.BytesIO()
+    buffer.write(_COPY_HEADER)
+    for fields in rows:
+        buffer.write(_FIELD_COUNT.pack(len(fields)))
+        for field in fields:
+            if field is None:
+                buffer.write(_NULL_FIELD)
+            else:
+                buffer.write(_FIELD_LENGTH.pack(len(field)))
+                buffer.write(field)
+    buffer.write(_COPY_TRAILER)
+    buffer.seek(0)
+    return buffer
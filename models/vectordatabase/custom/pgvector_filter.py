@@ -0,0 +1,156 @@
+"""
+Metadata filter DSL compiled to GIN-indexable JSONB predicates.
+
+Filters are dicts of metadata key to condition; the conditions are ANDed:
+
+    {"source": "a.pdf"}                           # equality, same as {"$eq": ...}
+    {"scene": {"$in": ["faq", "guide"]}}
+    {"answer": {"$exists": True}}
+    {"page": {"$gte": 2, "$lt": 10}}
+
+Equality conditions are merged into one `cmetadata @> {...}` containment,
+`$in` becomes an OR of containments and `$exists` a `@?` path test, all of
+which a `jsonb_path_ops` GIN index serves. Ranges compile to a `@@`
+jsonpath predicate that is checked on the rows the other conditions select.
+Values are compared with their JSON types, so `{"page": 1}` does not match
+`{"page": "1"}`. `compile_metadata_filter` evaluates the same DSL on
+metadata dicts in Python for stores without SQL.
+"""
+from __future__ import annotations
+import json
+import operator as op
+from typing import Any, Callable, Dict, List, Optional
+import sqlalchemy
+
+_RANGE_OPERATORS = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+_RANGE_FUNCTIONS = {"$gt": op.gt, "$gte": op.ge, "$lt": op.lt, "$lte": op.le}
+
+
+class JSONPath(sqlalchemy.types.UserDefinedType):
+    cache_ok = True
+
+    def get_col_spec(self, **kw) -> str:
+        return "jsonpath"
+
+
+def _path(key: str) -> str:
+    return "$." + json.dumps(key)
+
+
+def _jsonpath(value: str) -> sqlalchemy.sql.ColumnElement:
+    return sqlalchemy.cast(sqlalchemy.literal(value), JSONPath())
+
+
+def _operator(name: str) -> str:
+    name = name.lower()
+    return name if name.startswith("$") else "$" + name
+
+
+def _range_value(key: str, operator: str, value: Any) -> str:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Filter {operator} on {key!r} needs a number, got {value!r}")
+    return json.dumps(value)
+
+
+def build_metadata_filter(
+    column: sqlalchemy.Column,
+    filter: Optional[Dict[str, Any]],
+) -> Optional[sqlalchemy.sql.ColumnElement]:
+    """Compile a metadata filter into a SQL clause on a JSONB column.
+
+    Operator names are case-insensitive and the `$` prefix is optional, so
+    the langchain style `{"key": {"in": [...]}}` keeps working.
+
+    Returns:
+        The clause, or None for an empty filter.
+    """
+    if not filter:
+        return None
+    contains: Dict[str, Any] = {}
+    clauses: List[sqlalchemy.sql.ColumnElement] = []
+    for key, condition in filter.items():
+        if not isinstance(condition, dict):
+            contains[key] = condition
+            continue
+        ranges = []
+        for operator, value in condition.items():
+            operator = _operator(operator)
+            if operator == "$eq":
+                contains[key] = value
+            elif operator == "$in":
+                values = list(value)
+                clauses.append(
+                    sqlalchemy.or_(*[column.contains({key: v}) for v in values])
+                    if values else sqlalchemy.false()
+                )
+            elif operator == "$exists":
+                exists = column.op("@?", return_type=sqlalchemy.Boolean)(_jsonpath(_path(key)))
+                clauses.append(exists if value else sqlalchemy.not_(exists))
+            elif operator in _RANGE_OPERATORS:
+                ranges.append(f"{_path(key)} {_RANGE_OPERATORS[operator]} {_range_value(key, operator, value)}")
+            else:
+                raise ValueError(f"Unsupported filter operator {operator!r} on {key!r}")
+        if ranges:
+            clauses.append(column.op("@@", return_type=sqlalchemy.Boolean)(_jsonpath(" && ".join(ranges))))
+    if contains:
+        clauses.insert(0, column.contains(contains))
+    return sqlalchemy.and_(*clauses)
+
+
+def _json_contains(value: Any, expected: Any) -> bool:
+    """Python version of jsonb `@>` for one value."""
+    if isinstance(expected, dict):
+        return isinstance(value, dict) and all(
+            key in value and _json_contains(value[key], v) for key, v in expected.items()
+        )
+    if isinstance(expected, (list, tuple)):
+        return isinstance(value, (list, tuple)) and all(
+            any(_json_contains(item, e) for item in value) for e in expected
+        )
+    if isinstance(expected, bool) or isinstance(value, bool):
+        return isinstance(expected, bool) and isinstance(value, bool) and value == expected
+    if isinstance(expected, (int, float)):
+        return isinstance(value, (int, float)) and value == expected
+    return type(value) is type(expected) and value == expected
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def compile_metadata_filter(
+    filter: Optional[Dict[str, Any]],
+) -> Optional[Callable[[Optional[dict]], bool]]:
+    """Compile a metadata filter into a predicate on metadata dicts.
+
+    Matches exactly the rows `build_metadata_filter` selects, so stores
+    without SQL accept the same filters. Invalid filters raise ValueError
+    here rather than on the first row.
+
+    Returns:
+        The predicate, or None for an empty filter.
+    """
+    if not filter:
+        return None
+    checks: List[Callable[[dict], bool]] = []
+    for key, condition in filter.items():
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, value in condition.items():
+            operator = _operator(operator)
+            if operator == "$eq":
+                checks.append(lambda m, k=key, v=value: k in m and _json_contains(m[k], v))
+            elif operator == "$in":
+                values = list(value)
+                checks.append(lambda m, k=key, vs=values: k in m and any(_json_contains(m[k], v) for v in vs))
+            elif operator == "$exists":
+                checks.append(lambda m, k=key, e=bool(value): (k in m) == e)
+            elif operator in _RANGE_FUNCTIONS:
+                _range_value(key, operator, value)
+                checks.append(
+                    lambda m, k=key, f=_RANGE_FUNCTIONS[operator], v=value:
+                    _is_number(m.get(k)) and f(m[k], v)
+                )
+            else:
+                raise ValueError(f"Unsupported filter operator {operator!r} on {key!r}")
+    return lambda metadata: all(check(metadata or {}) for check in checks)
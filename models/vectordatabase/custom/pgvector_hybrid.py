@@ -0,0 +1,63 @@
+"""
+Prepare `langchain_pg_embedding` for hybrid (vector + trigram) search.
+
+Installs `pg_trgm` and builds the GIN trigram index on `document` with
+CREATE INDEX CONCURRENTLY, so writes are not blocked. Run it once before
+switching `PGVECTOR_HYBRID_SEARCH` on:
+
+    python -m models.vectordatabase.custom.pgvector_hybrid
+
+pg_trgm splits words by the database LC_CTYPE: under the C locale Chinese
+text yields no trigrams, so the index is not built and hybrid search stays
+on vector search until the database uses a UTF-8 locale.
+"""
+import argparse
+import sqlalchemy
+from loguru import logger
+from config.base_config import (
+    PGVECTOR_DRIVER,
+    PGVECTOR_HOST,
+    PGVECTOR_PORT,
+    PGVECTOR_DATABASE,
+    PGVECTOR_USER,
+    PGVECTOR_PASSWORD,
+)
+from models.vectordatabase.custom.custom_pgvector import (
+    PGVector,
+    check_hybrid_search,
+    create_document_trgm_index,
+)
+
+
+def migrate_hybrid(engine: sqlalchemy.engine.Engine) -> bool:
+    """Build the trigram index concurrently.
+
+    Returns:
+        True if hybrid search can run afterwards.
+    """
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        ready = create_document_trgm_index(conn, concurrently=True) and check_hybrid_search(conn)
+    logger.info("######PGvector hybrid INFO, migration done, ready={}.", ready)
+    return ready
+
+
+def main():
+    argparse.ArgumentParser(description="Build the pg_trgm index used by hybrid search.").parse_args()
+    connection_string = PGVector.connection_string_from_db_params(
+        driver=PGVECTOR_DRIVER,
+        host=PGVECTOR_HOST,
+        port=PGVECTOR_PORT,
+        database=PGVECTOR_DATABASE,
+        user=PGVECTOR_USER,
+        password=PGVECTOR_PASSWORD
+    )
+    engine = sqlalchemy.create_engine(connection_string)
+    try:
+        print(f"hybrid search ready={migrate_hybrid(engine)}")
+    finally:
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Migrate `langchain_pg_embedding.cmetadata` to JSONB with its GIN index.
+
+Tables created before the column became JSONB have to be rewritten once,
+under an ACCESS EXCLUSIVE lock, so run this in a maintenance window:
+
+    python -m models.vectordatabase.custom.pgvector_metadata
+
+The GIN index is then built with CREATE INDEX CONCURRENTLY, so writes are
+not blocked; an interrupted build is cleaned up on the next run.
+"""
+import argparse
+import sqlalchemy
+from loguru import logger
+from config.base_config import (
+    PGVECTOR_DRIVER,
+    PGVECTOR_HOST,
+    PGVECTOR_PORT,
+    PGVECTOR_DATABASE,
+    PGVECTOR_USER,
+    PGVECTOR_PASSWORD,
+)
+from models.vectordatabase.custom.custom_pgvector import (
+    PGVector,
+    create_metadata_index,
+    migrate_metadata_to_jsonb,
+)
+
+
+def migrate_metadata(engine: sqlalchemy.engine.Engine, skip_alter: bool = False) -> bool:
+    """Convert `cmetadata` to JSONB, then build its GIN index concurrently.
+
+    Args:
+        engine: Engine of the vector database.
+        skip_alter: Only build the index, e.g. if the rewrite is done already.
+
+    Returns:
+        True if the column was converted.
+    """
+    converted = False
+    if not skip_alter:
+        with engine.begin() as conn:
+            converted = migrate_metadata_to_jsonb(conn)
+    with engine.connect() as conn:
+        create_metadata_index(conn.execution_options(isolation_level="AUTOCOMMIT"), concurrently=True)
+    logger.info("######PGvector metadata INFO, migration done, converted={}.", converted)
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate langchain_pg_embedding.cmetadata to JSONB with a GIN index.")
+    parser.add_argument("--skip-alter", action="store_true", help="only build the GIN index concurrently")
+    args = parser.parse_args()
+    connection_string = PGVector.connection_string_from_db_params(
+        driver=PGVECTOR_DRIVER,
+        host=PGVECTOR_HOST,
+        port=PGVECTOR_PORT,
+        database=PGVECTOR_DATABASE,
+        user=PGVECTOR_USER,
+        password=PGVECTOR_PASSWORD
+    )
+    engine = sqlalchemy.create_engine(connection_string)
+    try:
+        converted = migrate_metadata(engine, skip_alter=args.skip_alter)
+        print(f"cmetadata converted={converted}, index ready")
+    finally:
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Migrate `langchain_pg_embedding` to the layout list-partitioned by collection.
+
+Run once before switching `PGVECTOR_PARTITIONED` on:
+
+    python -m models.vectordatabase.custom.pgvector_partition [--drop-legacy]
+"""
+from __future__ import annotations
+import argparse
+from typing import Dict
+import sqlalchemy
+from loguru import logger
+from config.base_config import (
+    PGVECTOR_DRIVER,
+    PGVECTOR_HOST,
+    PGVECTOR_PORT,
+    PGVECTOR_DATABASE,
+    PGVECTOR_USER,
+    PGVECTOR_PASSWORD,
+    PGVECTOR_HYBRID_SEARCH,
+)
+from models.vectordatabase.custom.custom_pgvector import (
+    PGVector,
+    CollectionStore,
+    EmbeddingStore,
+    create_partition,
+    create_partitioned_embedding_table,
+    create_document_trgm_index,
+    create_metadata_index,
+)
+
+LEGACY_TABLE_NAME = f"{EmbeddingStore.__tablename__}_legacy"
+
+
+def is_partitioned(conn: sqlalchemy.engine.Connection) -> bool:
+    return conn.execute(
+        sqlalchemy.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :name)"
+        ),
+        {"name": EmbeddingStore.__tablename__},
+    ).scalar()
+
+
+def migrate_to_partitioned(engine: sqlalchemy.engine.Engine, drop_legacy: bool = False) -> Dict[str, int]:
+    """Move every embedding into a per-collection partition in one transaction.
+
+    The existing table is renamed to `langchain_pg_embedding_legacy`, its
+    per-collection ANN indexes are dropped (recreate them through
+    `PGVector.create_index`, which targets the partitions), the metadata and
+    document GIN indexes are recreated on the partitioned table, and rows are
+    copied collection by collection. Rows without a known collection
+    cannot be placed in a partition and stay in the legacy table.
+
+    Returns:
+        Migrated row count per collection name.
+    """
+    table_name = EmbeddingStore.__tablename__
+    columns = ", ".join(column.name for column in EmbeddingStore.__table__.columns)
+    result: Dict[str, int] = {}
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            logger.info("######PGvector partition INFO, {} is already partitioned.", table_name)
+            return result
+        conn.execute(sqlalchemy.text(f"ALTER TABLE {table_name} RENAME TO {LEGACY_TABLE_NAME}"))
+        conn.execute(sqlalchemy.text(
+            f"ALTER TABLE {LEGACY_TABLE_NAME} RENAME CONSTRAINT {table_name}_pkey TO {LEGACY_TABLE_NAME}_pkey"
+        ))
+        index_names = conn.execute(
+            sqlalchemy.text("SELECT indexname FROM pg_indexes WHERE tablename = :table AND indexname LIKE 'ix_pg_emb_%'"),
+            {"table": LEGACY_TABLE_NAME},
+        ).scalars().all()
+        for index_name in index_names:
+            conn.execute(sqlalchemy.text(f"DROP INDEX {index_name}"))
+            logger.info("######PGvector partition INFO, dropped legacy index={}.", index_name)
+
+        create_partitioned_embedding_table(conn)
+        create_metadata_index(conn)
+        if PGVECTOR_HYBRID_SEARCH:
+            create_document_trgm_index(conn)
+        collection_table = CollectionStore.__table__
+        collections = conn.execute(sqlalchemy.select(collection_table.c.uuid, collection_table.c.name)).all()
+        for collection_uuid, name in collections:
+            create_partition(conn, collection_uuid)
+            result[name] = conn.execute(
+                sqlalchemy.text(
+                    f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {LEGACY_TABLE_NAME} "
+                    f"WHERE collection_id = CAST(:collection_id AS uuid)"
+                ),
+                {"collection_id": str(collection_uuid)},
+            ).rowcount
+            logger.info("######PGvector partition INFO, collection={}, rows={}.", name, result[name])
+
+        orphans = conn.execute(sqlalchemy.text(
+            f"SELECT count(*) FROM {LEGACY_TABLE_NAME} l WHERE NOT EXISTS "
+            f"(SELECT 1 FROM {CollectionStore.__tablename__} c WHERE c.uuid = l.collection_id)"
+        )).scalar()
+        if orphans:
+            logger.warning("######PGvector partition WARN, {} rows without collection kept in {}.",
+                           orphans, LEGACY_TABLE_NAME)
+        elif drop_legacy:
+            conn.execute(sqlalchemy.text(f"DROP TABLE {LEGACY_TABLE_NAME}"))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partition langchain_pg_embedding by collection.")
+    parser.add_argument("--drop-legacy", action="store_true", help="drop the legacy table after migrating")
+    args = parser.parse_args()
+    connection_string = PGVector.connection_string_from_db_params(
+        driver=PGVECTOR_DRIVER,
+        host=PGVECTOR_HOST,
+        port=PGVECTOR_PORT,
+        database=PGVECTOR_DATABASE,
+        user=PGVECTOR_USER,
+        password=PGVECTOR_PASSWORD
+    )
+    engine = sqlalchemy.create_engine(connection_string)
+    try:
+        result = migrate_to_partitioned(engine, drop_legacy=args.drop_legacy)
+        print(f"migrated collections={len(result)}, rows={sum(result.values())}")
+    finally:
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Quantized ANN stage for pgvector, rescored with full-precision vectors.
+
+The table keeps the `float32` vectors; only the ANN index is built on a
+quantized expression over them, which is what has to fit in RAM:
+
+    halfvec  (embedding::halfvec(n))                 halfvec_*_ops    1/2 the size
+    binary   (binary_quantize(embedding)::bit(n))    bit_hamming_ops  1/32 the size
+
+A search orders by the same expression, so the planner picks the index,
+over-fetches `k * rescore_factor` candidates and re-ranks them by the exact
+distance on `embedding`. Both types need pgvector 0.7 or later; pgvector
+has no int8 vector type, so there is no scalar int8 mode.
+"""
+from __future__ import annotations
+from typing import Sequence, Union
+import sqlalchemy
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects.postgresql import BIT
+
+QUANTIZATION_NONE = "none"
+QUANTIZATION_HALFVEC = "halfvec"
+QUANTIZATION_BINARY = "binary"
+QUANTIZATION_TYPES = (QUANTIZATION_NONE, QUANTIZATION_HALFVEC, QUANTIZATION_BINARY)
+MIN_PGVECTOR_VERSION = (0, 7, 0)
+
+
+class HalfVector(sqlalchemy.types.UserDefinedType):
+    cache_ok = True
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+
+    def get_col_spec(self, **kw) -> str:
+        return f"halfvec({self.dimensions})"
+
+
+def check_quantization(quantization: str) -> None:
+    if quantization not in QUANTIZATION_TYPES:
+        raise ValueError(f"Unsupported quantization: {quantization}")
+
+
+def quantize(
+    vector: sqlalchemy.sql.ColumnElement,
+    quantization: str,
+    dimensions: int,
+) -> sqlalchemy.sql.ColumnElement:
+    """Quantize a vector expression, matching the index expression."""
+    if quantization == QUANTIZATION_HALFVEC:
+        return sqlalchemy.cast(vector, HalfVector(dimensions))
+    if quantization == QUANTIZATION_BINARY:
+        return sqlalchemy.cast(sqlalchemy.func.binary_quantize(vector), BIT(dimensions))
+    return vector
+
+
+def quantized_distance(
+    column: sqlalchemy.sql.ColumnElement,
+    query: Union[Sequence[float], sqlalchemy.sql.ColumnElement],
+    quantization: str,
+    dimensions: int,
+    operator: str,
+) -> sqlalchemy.sql.ColumnElement:
+    """Distance between the quantized column and query vector.
+
+    Args:
+        column: The full-precision vector column.
+        query: Query vector, or a vector expression.
+        quantization: `halfvec` or `binary`.
+        dimensions: Vector dimensions.
+        operator: pgvector distance operator of the collection; binary
+            vectors always use hamming distance (`<~>`).
+    """
+    if not isinstance(query, sqlalchemy.sql.ClauseElement):
+        query = sqlalchemy.cast(sqlalchemy.literal(query, Vector(dimensions)), Vector(dimensions))
+    if quantization == QUANTIZATION_BINARY:
+        operator = "<~>"
+    return quantize(column, quantization, dimensions).op(operator, return_type=sqlalchemy.Float)(
+        quantize(query, quantization, dimensions)
+    )
+
+
+def index_expression(quantization: str, dimensions: int, operator_class: str) -> str:
+    """Indexed expression and operator class for `CREATE INDEX`.
+
+    Args:
+        quantization: Quantization type.
+        dimensions: Vector dimensions.
+        operator_class: The full-precision `vector_*_ops` operator class.
+    """
+    if quantization == QUANTIZATION_HALFVEC:
+        return f"(embedding::halfvec({dimensions})) {operator_class.replace('vector_', 'halfvec_', 1)}"
+    if quantization == QUANTIZATION_BINARY:
+        return f"(binary_quantize(embedding)::bit({dimensions})) bit_hamming_ops"
+    return f"embedding {operator_class}"
+
+
+def parse_version(version: str) -> tuple:
+    return tuple(int(part) for part in version.split(".")[:3] if part.isdigit())
@@ -0,0 +1,46 @@
+from typing import Any, List
+
+import numpy as np
+
+
+def _normalize(vectors: Any) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def maximal_marginal_relevance(
+        query_embedding: Any,
+        embeddings: Any,
+        k: int,
+        lambda_mult: float = 0.5,
+) -> List[int]:
+    """
+    最大边际相关性(MMR)重排, 兼顾与问题的相关性及已选文档间的差异性, 用于去除重叠或重复的Chunk
+    向量化实现: 候选与问题的相似度一次计算, 每轮只计算新选中文档与全部候选的相似度并更新最大值
+    :param query_embedding: 问题向量
+    :param embeddings: 候选向量集合
+    :param k: 选取数量
+    :param lambda_mult: 相关性权重, 1为仅按相关性排序, 0为仅按差异性选取
+    :return: 选中候选的下标, 按选取顺序
+    """
+    matrix = _normalize(embeddings) if len(embeddings) else np.empty((0, 0), dtype=np.float32)
+    k = min(k, len(matrix))
+    if k <= 0:
+        return []
+    query_similarity = matrix @ _normalize(query_embedding)[0]
+    selected = [int(np.argmax(query_similarity))]
+    max_similarity = matrix @ matrix[selected[0]]
+    available = np.ones(len(matrix), dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < k:
+        scores = lambda_mult * query_similarity - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        chosen = int(np.argmax(scores))
+        selected.append(chosen)
+        available[chosen] = False
+        np.maximum(max_similarity, matrix @ matrix[chosen], out=max_similarity)
+    return selected
@@ -0,0 +1,173 @@
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from config.base_config import PGVECTOR_DIMENSIONS, VECTOR_SNAPSHOT_BATCH_SIZE
+from models.vectordatabase.base_vector_client import BaseVectorClient
+
+SNAPSHOT_FORMAT_VERSION = "1"
+SNAPSHOT_FORMAT_PARQUET = "parquet"
+SNAPSHOT_FORMAT_ARROW = "arrow"
+SNAPSHOT_FORMATS = (SNAPSHOT_FORMAT_PARQUET, SNAPSHOT_FORMAT_ARROW)
+SNAPSHOT_COLUMNS = ["custom_id", "document", "cmetadata", "embedding"]
+
+
+def _import_pyarrow():
+    """
+    按需导入pyarrow(可选依赖, 仅快照导出/导入使用)
+    :return: pyarrow模块
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "Could not import pyarrow python package. "
+            "Please install it with `pip install pyarrow`."
+        )
+    return pyarrow
+
+
+def snapshot_format(path: str) -> str:
+    """
+    按文件扩展名识别快照格式: .parquet为Parquet, 其余为Arrow IPC
+    :param path: 快照文件路径
+    :return: 快照格式
+    """
+    return SNAPSHOT_FORMAT_PARQUET if path.lower().endswith(".parquet") else SNAPSHOT_FORMAT_ARROW
+
+
+def _schema(pa, dimensions: int, metadata: Dict[str, str]):
+    return pa.schema(
+        [
+            pa.field("custom_id", pa.string()),
+            pa.field("document", pa.string()),
+            pa.field("cmetadata", pa.string()),
+            pa.field("embedding", pa.list_(pa.float32(), dimensions)),
+        ],
+        metadata=metadata,
+    )
+
+
+def _record_batch(pa, schema, rows: List[Any], dimensions: int):
+    vectors = np.asarray([row.embedding for row in rows], dtype=np.float32).reshape(-1)
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array([row.custom_id for row in rows], pa.string()),
+            pa.array([row.document for row in rows], pa.string()),
+            pa.array([json.dumps(row.cmetadata, ensure_ascii=False) for row in rows], pa.string()),
+            pa.FixedSizeListArray.from_arrays(pa.array(vectors, pa.float32()), dimensions),
+        ],
+        schema=schema,
+    )
+
+
+def export_namespace(
+        vector_client: BaseVectorClient,
+        namespace: str,
+        path: str,
+        namespace_info: Optional[Dict[str, Any]] = None,
+        files: Optional[List[Dict[str, Any]]] = None,
+        batch_size: int = VECTOR_SNAPSHOT_BATCH_SIZE,
+) -> int:
+    """
+    导出命名空间快照: 向量(定长float32列表)、文档、元数据按批写入列式文件, 知识库及文件信息写入Schema元数据
+    向量数据以游标流式读取, 内存占用与批大小相关, 与命名空间大小无关
+    :param vector_client: 向量库客户端
+    :param namespace: 命名空间标识
+    :param path: 快照文件路径, .parquet为Parquet格式, 其余为Arrow IPC格式
+    :param namespace_info: 知识库信息
+    :param files: 知识库文件信息
+    :param batch_size: 每批的向量数量
+    :return: 导出的向量数量
+    """
+    pa = _import_pyarrow()
+    rows = iter(vector_client.query_data(namespace=namespace, columns=SNAPSHOT_COLUMNS, stream=True))
+    batch = [row for _, row in zip(range(batch_size), rows)]
+    dimensions = len(batch[0].embedding) if batch else PGVECTOR_DIMENSIONS
+    schema = _schema(pa, dimensions, {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "namespace": namespace,
+        "dimensions": str(dimensions),
+        "namespace_info": json.dumps(namespace_info or {}, ensure_ascii=False, default=str),
+        "files": json.dumps(files or [], ensure_ascii=False, default=str),
+    })
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if snapshot_format(path) == SNAPSHOT_FORMAT_PARQUET:
+        writer = pa.parquet.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    total = 0
+    with writer:
+        while batch:
+            writer.write_batch(_record_batch(pa, schema, batch, dimensions))
+            total += len(batch)
+            batch = [row for _, row in zip(range(batch_size), rows)]
+    logger.info("######NamespaceSnapshot export INFO, namespace={}, path={}, rows={}.", namespace, path, total)
+    return total
+
+
+def read_snapshot_metadata(path: str) -> Dict[str, Any]:
+    """
+    读取快照的Schema元数据
+    :param path: 快照文件路径
+    :return: namespace[命名空间] dimensions[向量维度] namespace_info[知识库信息] files[知识库文件信息]
+    """
+    pa = _import_pyarrow()
+    if snapshot_format(path) == SNAPSHOT_FORMAT_PARQUET:
+        schema = pa.parquet.read_schema(path)
+    else:
+        with pa.memory_map(path) as source:
+            schema = pa.ipc.open_file(source).schema
+    metadata = {key.decode(): value.decode() for key, value in (schema.metadata or {}).items()}
+    return {
+        "format_version": metadata.get("format_version"),
+        "namespace": metadata.get("namespace"),
+        "dimensions": int(metadata.get("dimensions") or PGVECTOR_DIMENSIONS),
+        "namespace_info": json.loads(metadata.get("namespace_info") or "{}"),
+        "files": json.loads(metadata.get("files") or "[]"),
+    }
+
+
+def _iter_batches(pa, path: str, batch_size: int):
+    if snapshot_format(path) == SNAPSHOT_FORMAT_PARQUET:
+        yield from pa.parquet.ParquetFile(path).iter_batches(batch_size=batch_size)
+        return
+    with pa.memory_map(path) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def import_namespace(
+        vector_client: BaseVectorClient,
+        namespace: str,
+        path: str,
+        batch_size: int = VECTOR_SNAPSHOT_BATCH_SIZE,
+) -> int:
+    """
+    导入命名空间快照: 保留原向量标识, 按批经批量写入通道写入向量库, 不重新向量化
+    :param vector_client: 向量库客户端
+    :param namespace: 目标命名空间标识
+    :param path: 快照文件路径
+    :param batch_size: 每批的向量数量
+    :return: 导入的向量数量
+    """
+    pa = _import_pyarrow()
+    dimensions = read_snapshot_metadata(path)["dimensions"]
+    total = 0
+    for record_batch in _iter_batches(pa, path, batch_size):
+        vectors = record_batch.column("embedding").flatten().to_numpy(zero_copy_only=False)
+        total += vector_client.insert_vectors(
+            namespace=namespace,
+            ids=record_batch.column("custom_id").to_pylist(),
+            documents=record_batch.column("document").to_pylist(),
+            metadatas=[json.loads(value) for value in record_batch.column("cmetadata").to_pylist()],
+            vectors=vectors.reshape(-1, dimensions),
+        )
+    logger.info("######NamespaceSnapshot import INFO, namespace={}, path={}, rows={}.", namespace, path, total)
+    return total
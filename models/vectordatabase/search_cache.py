@@ -0,0 +1,216 @@
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from langchain.docstore.document import Document
+from loguru import logger
+
+from config.base_config import (
+    VECTOR_SEARCH_CACHE_ENABLED,
+    VECTOR_SEARCH_CACHE_MAX_BYTES,
+    VECTOR_SEARCH_CACHE_TTL,
+)
+
+# 单条缓存的固定开销估算(键、元组、Document对象), 单位字节
+ENTRY_OVERHEAD_BYTES = 512
+# 记录版本号的命名空间数量上限, 超过时淘汰最久未变更的命名空间
+MAX_NAMESPACE_GENERATIONS = 10000
+
+_TRAILING_PUNCTUATION = "?？!！。.,，;；~～ "
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(ques: str) -> str:
+    """
+    问题归一化: 全半角统一、去除首尾空白及句尾标点、合并连续空白、英文小写
+    :param ques: 问题
+    :return: 归一化后的问题
+    """
+    ques = unicodedata.normalize("NFKC", ques or "")
+    ques = _WHITESPACE.sub(" ", ques).strip().rstrip(_TRAILING_PUNCTUATION)
+    return ques.lower()
+
+
+def estimate_size(results: List[Tuple[Document, float]]) -> int:
+    """
+    估算检索结果占用的字节数
+    :param results: 检索结果
+    :return: 字节数
+    """
+    size = ENTRY_OVERHEAD_BYTES
+    for doc, _ in results:
+        size += len(doc.page_content.encode("utf-8")) + 64
+        if doc.metadata:
+            size += len(json.dumps(doc.metadata, ensure_ascii=False, default=str).encode("utf-8"))
+    return size
+
+
+class SearchResultCache:
+    """
+    向量检索结果缓存
+        - LRU淘汰, 总大小按字节数限制
+        - 按TTL过期
+        - 按命名空间的版本号失效: 命名空间写入或删除数据时分配新的版本号, 旧版本的缓存不再命中
+        - 版本号取自全局递增计数, 仅记录最近变更的命名空间, 其余命名空间的版本号为基准版本号;
+          淘汰记录时基准版本号取新值, 并移除未记录版本号的命名空间的缓存
+    """
+    def __init__(
+            self,
+            max_bytes: int = VECTOR_SEARCH_CACHE_MAX_BYTES,
+            ttl: float = VECTOR_SEARCH_CACHE_TTL,
+    ):
+        """
+        构造方法
+        :param max_bytes: 缓存总大小上限, 单位字节
+        :param ttl: 缓存有效期, 单位秒
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, List[Tuple[Document, float]]]]" = OrderedDict()
+        self._namespace_keys: Dict[str, set] = {}
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        self._last_generation = 0
+        self._base_generation = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "misses": 0, "expirations": 0, "evictions": 0, "invalidations": 0}
+
+    def make_key(
+            self,
+            namespace: str,
+            model: str,
+            ques: str,
+            k: int,
+            **options: Any
+    ) -> Tuple:
+        """
+        生成缓存键, 包含命名空间当前版本号
+        :param namespace: 命名空间标识
+        :param model: Embedding模型标识
+        :param ques: 问题
+        :param k: 匹配数量
+        :param options: 其他影响检索结果的参数
+        :return: 缓存键
+        """
+        with self._lock:
+            generation = self._generations.get(namespace, self._base_generation)
+        return namespace, generation, model, normalize_question(ques), k, tuple(sorted(options.items()))
+
+    def get(self, key: Tuple) -> Optional[List[Tuple[Document, float]]]:
+        """
+        查询缓存
+        :param key: 缓存键
+        :return: 检索结果副本, 未命中时为None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._metrics["misses"] += 1
+                return None
+            expires_at, _, results = entry
+            if expires_at <= now:
+                self._remove(key)
+                self._metrics["expirations"] += 1
+                self._metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._metrics["hits"] += 1
+        return [(Document(page_content=doc.page_content, metadata=dict(doc.metadata)), score) for doc, score in results]
+
+    def put(self, key: Tuple, results: List[Tuple[Document, float]]) -> None:
+        """
+        写入缓存, 键的版本号已过期(检索期间命名空间有写入)时不写入
+        :param key: 缓存键
+        :param results: 检索结果
+        :return: None
+        """
+        namespace, generation = key[0], key[1]
+        size = estimate_size(results)
+        if size > self.max_bytes:
+            return
+        results = [(Document(page_content=doc.page_content, metadata=dict(doc.metadata)), score) for doc, score in results]
+        with self._lock:
+            if self._generations.get(namespace, self._base_generation) != generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, results)
+            self._namespace_keys.setdefault(namespace, set()).add(key)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._metrics["evictions"] += 1
+
+    def invalidate(self, namespace: str) -> int:
+        """
+        命名空间数据变更时失效其全部缓存
+        :param namespace: 命名空间标识
+        :return: 新的版本号
+        """
+        with self._lock:
+            self._last_generation += 1
+            generation = self._last_generation
+            self._generations[namespace] = generation
+            self._generations.move_to_end(namespace)
+            for key in list(self._namespace_keys.get(namespace, ())):
+                self._remove(key)
+            if len(self._generations) > MAX_NAMESPACE_GENERATIONS:
+                self._generations.popitem(last=False)
+                # 新的基准版本号大于已分配的全部版本号, 检索中的旧版本结果不会写入
+                self._last_generation += 1
+                self._base_generation = self._last_generation
+                for tracked in [ns for ns in self._namespace_keys if ns not in self._generations]:
+                    for key in list(self._namespace_keys.get(tracked, ())):
+                        self._remove(key)
+            self._metrics["invalidations"] += 1
+        logger.info("######SearchResultCache INFO, namespace={} invalidated, generation={}.", namespace, generation)
+        return generation
+
+    def clear(self) -> None:
+        """
+        清空缓存
+        :return: None
+        """
+        with self._lock:
+            self._entries.clear()
+            self._namespace_keys.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        缓存统计信息
+        :return: 命中、未命中、过期、淘汰、失效次数, 命中率, 条数及字节数
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["entries"] = len(self._entries)
+            metrics["bytes"] = self._bytes
+            metrics["max_bytes"] = self.max_bytes
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics["hit_rate"] = metrics["hits"] / lookups if lookups else 0.0
+        return metrics
+
+    def _remove(self, key: Tuple) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        keys = self._namespace_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._namespace_keys[key[0]]
+
+
+_search_cache = SearchResultCache()
+
+
+def get_search_cache() -> Optional[SearchResultCache]:
+    """
+    获取进程内的检索结果缓存
+    :return: 缓存实例, 未开启缓存时为None
+    """
+    return _search_cache if VECTOR_SEARCH_CACHE_ENABLED else None
@@ -4,6 +4,7 @@ from config.base_config import VECTOR_DATABASE_TYPE
 from framework.business_except import BusinessException
 from models.vectordatabase.base_vector_client import BaseVectorClient
 from models.vectordatabase.vector_postgres_client import VectorPostgresClient
+from models.vectordatabase.vector_local_client import VectorLocalClient
 
 
 def get_instance_client() -> BaseVectorClient:
@@ -14,6 +15,8 @@ def get_instance_client() -> BaseVectorClient:
     try:
         if VECTOR_DATABASE_TYPE == 'Postgres':
             return VectorPostgresClient()
+        elif VECTOR_DATABASE_TYPE == 'Local':
+            return VectorLocalClient()
         else:
             pass
     except Exception as err:
@@ -0,0 +1,239 @@
+import os
+import uuid
+from typing import List, Tuple, Dict, Any, Iterable, Sequence
+
+from langchain.embeddings.base import Embeddings
+from langchain.schema import Document
+from loguru import logger
+
+from config.base_config import *
+from models.vectordatabase.base_vector_client import BaseVectorClient
+from models.vectordatabase.custom.custom_pgvector import DEFAULT_QUERY_COLUMNS
+from models.vectordatabase.custom.local_vector_store import (
+    LocalVectorStore,
+    IVF_INDEX_TYPE,
+    get_local_store,
+    drop_local_store,
+    close_local_stores,
+)
+from models.vectordatabase.search_cache import get_search_cache
+from models.vectordatabase.vector_mirror import get_vector_mirror
+
+
+class VectorLocalClient(BaseVectorClient):
+    """
+    本地向量库客户端: 数据以内存映射文件存储在本地目录, NumPy实现IVF索引, 不依赖Postgres
+    适用于离线压测及小规模部署, 仅支持单进程访问同一数据目录
+    """
+    local_path: str = VECTOR_LOCAL_PATH
+
+    def init_client(self) -> None:
+        os.makedirs(self.local_path, exist_ok=True)
+
+    def close_client(self) -> None:
+        close_local_stores()
+
+    def delete_data(
+            self,
+            namespace: str = None,
+            ids: list[str] = None,
+            delete_all: bool = None,
+            **kwargs
+    ) -> Dict[str, Any]:
+        try:
+            if delete_all:
+                deleted = drop_local_store(self.local_path, namespace)
+            else:
+                deleted = self.__get_store(namespace=namespace).delete(ids or [])
+        finally:
+            self.__invalidate_search_cache(namespace)
+        vector_mirror = get_vector_mirror()
+        if vector_mirror:
+            vector_mirror.on_delete(namespace=namespace, ids=ids, delete_all=delete_all)
+        logger.info("######VectorLocalClient delete_data INFO, namespace={}, delete_all={}, deleted={}.",
+                    namespace, delete_all, deleted)
+        return {"deleted": deleted}
+
+    def query_data(
+            self,
+            namespace: str = None,
+            ids: list[str] = None,
+            columns: Sequence[str] = None,
+            limit: int = None,
+            after: str = None,
+            stream: bool = False,
+    ) -> Iterable[Any]:
+        rows = self.__get_store(namespace=namespace).query(
+            ids=ids,
+            columns=columns or DEFAULT_QUERY_COLUMNS,
+            limit=limit,
+            after=after,
+        )
+        return iter(rows) if stream else rows
+
+    def count_data(
+            self,
+            namespace: str
+    ) -> int:
+        return self.__get_store(namespace=namespace).count()
+
+    def insert_data(
+            self,
+            split_docs: List[Document],
+            embedding: Embeddings,
+            namespace: str
+    ) -> list[str]:
+        ids = [str(uuid.uuid4()).replace("-", "") for n in range(0, len(split_docs))]
+        texts = [doc.page_content for doc in split_docs]
+        vectors = embedding.embed_documents(texts)
+        if len(vectors) != len(texts):
+            raise ValueError(f"文档向量化结果数量不一致, documents={len(texts)}, vectors={len(vectors)}")
+        try:
+            self.__get_store(namespace=namespace).add(
+                ids=ids,
+                documents=texts,
+                metadatas=[doc.metadata for doc in split_docs],
+                vectors=vectors,
+            )
+        finally:
+            self.__invalidate_search_cache(namespace)
+        vector_mirror = get_vector_mirror()
+        if vector_mirror:
+            vector_mirror.on_insert(namespace=namespace, ids=ids, client=self)
+        return ids
+
+    def insert_vectors(
+            self,
+            namespace: str,
+            ids: List[str],
+            documents: List[str],
+            metadatas: List[dict],
+            vectors: Any,
+    ) -> int:
+        try:
+            self.__get_store(namespace=namespace).add(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas,
+                vectors=vectors,
+            )
+        finally:
+            self.__invalidate_search_cache(namespace)
+        vector_mirror = get_vector_mirror()
+        if vector_mirror:
+            vector_mirror.on_insert(namespace=namespace, ids=ids, client=self)
+        return len(ids)
+
+    def search_data(
+            self,
+            ques: str,
+            embedding: Embeddings,
+            namespace: str,
+            search_top_k: int,
+            **kwargs
+    ) -> List[Tuple[Document, float]]:
+        # 不支持关键词检索, hybrid模式按向量检索处理
+        return self.__search(
+            store=self.__get_store(namespace=namespace),
+            vector=embedding.embed_query(ques),
+            search_top_k=search_top_k,
+            **kwargs
+        )
+
+    def search_data_batch(
+            self,
+            queries: Sequence[str],
+            embedding: Embeddings,
+            namespaces: Sequence[str],
+            search_top_k: int,
+            **kwargs
+    ) -> Dict[str, List[List[Tuple[Document, float]]]]:
+        queries = list(queries)
+        namespaces = list(dict.fromkeys(namespaces))
+        vectors = embedding.embed_documents(queries) if queries else []
+        if len(vectors) != len(queries):
+            raise ValueError(f"问题向量化结果数量不一致, queries={len(queries)}, vectors={len(vectors)}")
+        results = {}
+        for namespace in namespaces:
+            store = self.__get_store(namespace=namespace)
+            results[namespace] = [self.__search(store=store, vector=vector, search_top_k=search_top_k, **kwargs)
+                                  for vector in vectors]
+        return results
+
+    def create_index(
+            self,
+            namespace: str,
+            index_type: str = None,
+            **kwargs
+    ) -> str:
+        if index_type not in (None, IVF_INDEX_TYPE):
+            raise ValueError(f"本地向量库仅支持{IVF_INDEX_TYPE}索引, index_type={index_type}")
+        store = self.__get_store(namespace=namespace)
+        store.compact(train=True, lists=kwargs.get("lists"))
+        return store.status()["index_name"]
+
+    def rebuild_index(
+            self,
+            namespace: str
+    ) -> List[str]:
+        store = self.__get_store(namespace=namespace)
+        store.compact()
+        return [store.status()["index_name"]] if store.status()["is_valid"] else []
+
+    def drop_index(
+            self,
+            namespace: str,
+            index_type: str = None
+    ) -> List[str]:
+        store = self.__get_store(namespace=namespace)
+        index_name = store.status()["index_name"]
+        store.compact(train=False)
+        return [index_name] if index_name else []
+
+    def get_index_status(
+            self,
+            namespace: str
+    ) -> List[Dict[str, Any]]:
+        status = self.__get_store(namespace=namespace).status()
+        return [status] if status["is_valid"] else []
+
+    def __get_store(
+            self,
+            namespace: str
+    ) -> LocalVectorStore:
+        return get_local_store(
+            self.local_path,
+            namespace,
+            ivf_min_rows=VECTOR_LOCAL_IVF_MIN_ROWS,
+            ivf_lists=VECTOR_LOCAL_IVF_LISTS,
+            probes=VECTOR_LOCAL_IVF_PROBES,
+            compact_segments=VECTOR_LOCAL_COMPACT_SEGMENTS,
+            compact_deleted_ratio=VECTOR_LOCAL_COMPACT_DELETED_RATIO,
+        )
+
+    @staticmethod
+    def __search(
+            store: LocalVectorStore,
+            vector: List[float],
+            search_top_k: int,
+            **kwargs
+    ) -> List[Tuple[Document, float]]:
+        return store.search(
+            embedding=vector,
+            k=search_top_k,
+            filter=kwargs.get("filter"),
+            probes=kwargs.get("probes"),
+            max_distance=kwargs.get("max_distance"),
+            exact_match_first=kwargs.get("exact_match_first", False),
+            fetch_k=kwargs.get("fetch_k"),
+            mmr_lambda=kwargs.get("mmr_lambda"),
+        )
+
+    @staticmethod
+    def __invalidate_search_cache(namespace: str) -> None:
+        search_cache = get_search_cache()
+        if search_cache:
+            search_cache.invalidate(namespace)
+
+    def get_vector_database_type(self) -> str:
+        return 'Local'
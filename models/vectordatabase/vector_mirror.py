@@ -0,0 +1,370 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.docstore.document import Document
+from loguru import logger
+
+from config.base_config import (
+    VECTOR_MIRROR_ENABLED,
+    VECTOR_MIRROR_MAX_ROWS,
+    VECTOR_MIRROR_PATH,
+)
+from models.vectordatabase.base_vector_client import BaseVectorClient, uuid_fingerprint
+from models.vectordatabase.mmr import maximal_marginal_relevance
+
+# 余弦距离小于该值视为完全匹配(float32计算误差)
+EXACT_MATCH_EPSILON = 1e-6
+MIRROR_COLUMNS = ["uuid", "custom_id", "document", "cmetadata", "embedding"]
+
+
+class MirrorState:
+    """
+    命名空间镜像的只读快照, 更新时整体替换
+    """
+    def __init__(
+            self,
+            ids: List[str],
+            uuids: List[str],
+            documents: List[str],
+            metadatas: List[dict],
+            matrix: np.ndarray,
+    ):
+        """
+        构造方法
+        :param ids: 向量标识
+        :param uuids: 向量数据在向量库中的uuid, 用于计算指纹
+        :param documents: 文档内容
+        :param metadatas: 元数据
+        :param matrix: L2归一化后的float32向量矩阵, 行与ids一一对应
+        """
+        self.ids = ids
+        self.uuids = uuids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.matrix = matrix
+
+
+def normalize_rows(vectors: Any) -> np.ndarray:
+    """
+    转换为连续的float32矩阵并按行L2归一化
+    :param vectors: 向量集合
+    :return: 归一化矩阵
+    """
+    matrix = np.ascontiguousarray(np.asarray(vectors, dtype=np.float32))
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NamespaceMirror:
+    """
+    命名空间向量的内存镜像, 精确检索(余弦距离)
+    """
+    def __init__(
+            self,
+            namespace: str,
+            state: MirrorState,
+    ):
+        """
+        构造方法
+        :param namespace: 命名空间标识
+        :param state: 镜像数据
+        """
+        self.namespace = namespace
+        self._state = state
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._state.ids)
+
+    def fingerprint(self) -> str:
+        """
+        镜像数据的指纹, 与向量库的fingerprint_data一致时镜像是最新的
+        :return: 指纹
+        """
+        return uuid_fingerprint(self._state.uuids)
+
+    def search(
+            self,
+            embedding: Sequence[float],
+            k: int,
+            max_distance: float = None,
+            exact_match_first: bool = False,
+            fetch_k: int = None,
+            mmr_lambda: float = None,
+    ) -> List[Tuple[Document, float]]:
+        """
+        一次矩阵向量乘法加argpartition计算top-k
+        :param embedding: 问题向量
+        :param k: 匹配数量
+        :param max_distance: 距离阈值, 超过阈值的文档不返回
+        :param exact_match_first: 存在完全匹配的文档时仅返回完全匹配的文档
+        :param fetch_k: MMR重排的候选数量, 不小于匹配数量
+        :param mmr_lambda: MMR相关性权重, 为空时不重排
+        :return: 文档及余弦距离列表, 按距离升序(MMR重排时按选取顺序)
+        """
+        state = self._state
+        total = len(state.ids)
+        if total == 0 or k <= 0:
+            return []
+        limit = min(k if mmr_lambda is None else max(k, fetch_k or k), total)
+        query = normalize_rows(embedding)[0]
+        scores = state.matrix @ query
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        distances = np.maximum(1.0 - scores[top].astype(np.float64), 0.0)
+        distances[distances < EXACT_MATCH_EPSILON] = 0.0
+        keep = np.ones(limit, dtype=bool)
+        if exact_match_first and distances[0] == 0.0:
+            keep = distances == 0.0
+        elif max_distance is not None:
+            keep = distances <= max_distance
+        top, distances = top[keep], distances[keep]
+        if mmr_lambda is not None:
+            selected = maximal_marginal_relevance(query, state.matrix[top], k, mmr_lambda)
+            top, distances = top[selected], distances[selected]
+        return [
+            (
+                Document(page_content=state.documents[i], metadata=dict(state.metadatas[i] or {})),
+                float(distance),
+            )
+            for i, distance in zip(top, distances)
+        ]
+
+    def add(
+            self,
+            ids: List[str],
+            uuids: List[Any],
+            documents: List[str],
+            metadatas: List[dict],
+            vectors: Any,
+    ) -> None:
+        """
+        追加向量, 已存在的标识先移除
+        :param ids: 向量标识
+        :param uuids: 向量数据在向量库中的uuid
+        :param documents: 文档内容
+        :param metadatas: 元数据
+        :param vectors: 向量集合
+        :return: None
+        """
+        if not ids:
+            return
+        with self._lock:
+            state = self._without(set(ids))
+            self._state = MirrorState(
+                ids=state.ids + list(ids),
+                uuids=state.uuids + [str(value) for value in uuids],
+                documents=state.documents + list(documents),
+                metadatas=state.metadatas + list(metadatas),
+                matrix=np.vstack([state.matrix, normalize_rows(vectors)]) if len(state.ids) else normalize_rows(vectors),
+            )
+
+    def remove(self, ids: Sequence[str]) -> None:
+        """
+        移除向量
+        :param ids: 向量标识
+        :return: None
+        """
+        with self._lock:
+            self._state = self._without(set(ids))
+
+    def _without(self, ids: set) -> MirrorState:
+        state = self._state
+        keep = [i for i, custom_id in enumerate(state.ids) if custom_id not in ids]
+        if len(keep) == len(state.ids):
+            return state
+        return MirrorState(
+            ids=[state.ids[i] for i in keep],
+            uuids=[state.uuids[i] for i in keep],
+            documents=[state.documents[i] for i in keep],
+            metadatas=[state.metadatas[i] for i in keep],
+            matrix=np.ascontiguousarray(state.matrix[keep]),
+        )
+
+    def save(self, path: str) -> None:
+        """
+        持久化快照: 向量矩阵为npy文件(加载时内存映射), 标识、uuid、文档及元数据为json文件, 先写临时文件再替换
+        :param path: 快照文件路径前缀
+        :return: None
+        """
+        state = self._state
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.npy.tmp", "wb") as f:
+            np.save(f, state.matrix)
+        with open(f"{path}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump({"ids": state.ids, "uuids": state.uuids, "documents": state.documents,
+                       "metadatas": state.metadatas}, f, ensure_ascii=False, default=str)
+        os.replace(f"{path}.npy.tmp", f"{path}.npy")
+        os.replace(f"{path}.json.tmp", f"{path}.json")
+
+    @classmethod
+    def load(cls, namespace: str, path: str) -> Optional["NamespaceMirror"]:
+        """
+        从快照加载, 向量矩阵以只读方式内存映射
+        :param namespace: 命名空间标识
+        :param path: 快照文件路径前缀
+        :return: 镜像, 快照不存在或不完整时为None
+        """
+        if not (os.path.exists(f"{path}.npy") and os.path.exists(f"{path}.json")):
+            return None
+        try:
+            matrix = np.load(f"{path}.npy", mmap_mode="r")
+            with open(f"{path}.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as err:
+            logger.warning("######VectorMirror WARN, namespace={} snapshot unreadable: {}", namespace, err)
+            return None
+        if matrix.shape[0] != len(data["ids"]) or len(data.get("uuids", ())) != len(data["ids"]):
+            return None
+        return cls(namespace, MirrorState(data["ids"], data["uuids"], data["documents"], data["metadatas"], matrix))
+
+
+class VectorMirrorRegistry:
+    """
+    进程内的命名空间镜像注册表
+        - 首次检索时优先从快照加载, 快照与向量库的数据指纹不一致时从向量库加载
+        - 向量库写入、删除时增量更新已加载的镜像及其快照
+    """
+    def __init__(
+            self,
+            path: str = VECTOR_MIRROR_PATH,
+            max_rows: int = VECTOR_MIRROR_MAX_ROWS,
+    ):
+        """
+        构造方法
+        :param path: 快照目录
+        :param max_rows: 可镜像的命名空间最大向量数, 超过时不镜像
+        """
+        self.path = path
+        self.max_rows = max_rows
+        self._mirrors: Dict[str, Optional[NamespaceMirror]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+            self,
+            namespace: str,
+            client: BaseVectorClient,
+    ) -> Optional[NamespaceMirror]:
+        """
+        获取命名空间镜像, 未加载时加载
+        :param namespace: 命名空间标识
+        :param client: 向量库客户端
+        :return: 镜像, 命名空间超过最大向量数时为None
+        """
+        if namespace in self._mirrors:
+            return self._mirrors[namespace]
+        with self._lock:
+            if namespace not in self._mirrors:
+                self._mirrors[namespace] = self._load(namespace, client)
+            return self._mirrors[namespace]
+
+    def on_insert(
+            self,
+            namespace: str,
+            ids: List[str],
+            client: BaseVectorClient,
+    ) -> None:
+        """
+        向量库写入后增量更新镜像
+        :param namespace: 命名空间标识
+        :param ids: 写入的向量标识
+        :param client: 向量库客户端
+        :return: None
+        """
+        mirror = self._mirrors.get(namespace)
+        if mirror is None:
+            self._discard(namespace)
+            return
+        rows = list(client.query_data(namespace=namespace, ids=ids, columns=MIRROR_COLUMNS))
+        if len(mirror) + len(rows) > self.max_rows:
+            self._discard(namespace)
+            return
+        if rows:
+            mirror.add(
+                ids=[row.custom_id for row in rows],
+                uuids=[row.uuid for row in rows],
+                documents=[row.document for row in rows],
+                metadatas=[row.cmetadata for row in rows],
+                vectors=[row.embedding for row in rows],
+            )
+        mirror.save(self._snapshot_path(namespace))
+
+    def on_delete(
+            self,
+            namespace: str,
+            ids: List[str] = None,
+            delete_all: bool = False,
+    ) -> None:
+        """
+        向量库删除后增量更新镜像
+        :param namespace: 命名空间标识
+        :param ids: 删除的向量标识
+        :param delete_all: 是否删除整个命名空间
+        :return: None
+        """
+        mirror = self._mirrors.get(namespace)
+        if mirror is None or delete_all:
+            self._discard(namespace)
+            return
+        mirror.remove(ids or [])
+        mirror.save(self._snapshot_path(namespace))
+
+    def _load(
+            self,
+            namespace: str,
+            client: BaseVectorClient,
+    ) -> Optional[NamespaceMirror]:
+        total = client.count_data(namespace=namespace)
+        if total > self.max_rows:
+            logger.info("######VectorMirror INFO, namespace={} has {} rows, over limit {}, not mirrored.",
+                        namespace, total, self.max_rows)
+            return None
+        path = self._snapshot_path(namespace)
+        mirror = NamespaceMirror.load(namespace, path)
+        # 条数相同不代表数据相同(如删除后写入同样数量的数据), 比较指纹
+        if mirror is not None and len(mirror) == total and mirror.fingerprint() == client.fingerprint_data(namespace):
+            logger.info("######VectorMirror INFO, namespace={} loaded from snapshot, rows={}.", namespace, total)
+            return mirror
+
+        ids, uuids, documents, metadatas, vectors = [], [], [], [], []
+        for row in client.query_data(namespace=namespace, columns=MIRROR_COLUMNS, stream=True):
+            ids.append(row.custom_id)
+            uuids.append(row.uuid)
+            documents.append(row.document)
+            metadatas.append(row.cmetadata)
+            vectors.append(row.embedding)
+        mirror = NamespaceMirror(namespace, MirrorState([], [], [], [], np.empty((0, 0), dtype=np.float32)))
+        mirror.add(ids=ids, uuids=uuids, documents=documents, metadatas=metadatas, vectors=vectors)
+        mirror.save(path)
+        logger.info("######VectorMirror INFO, namespace={} loaded from database, rows={}.", namespace, len(ids))
+        return mirror
+
+    def _discard(self, namespace: str) -> None:
+        with self._lock:
+            self._mirrors.pop(namespace, None)
+            for suffix in (".npy", ".json"):
+                try:
+                    os.remove(self._snapshot_path(namespace) + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def _snapshot_path(self, namespace: str) -> str:
+        return os.path.join(self.path, re.sub(r"[^\w.-]", "_", namespace))
+
+
+_vector_mirror = VectorMirrorRegistry()
+
+
+def get_vector_mirror() -> Optional[VectorMirrorRegistry]:
+    """
+    获取进程内的向量镜像注册表
+    :return: 注册表, 未开启镜像时为None
+    """
+    return _vector_mirror if VECTOR_MIRROR_ENABLED else None
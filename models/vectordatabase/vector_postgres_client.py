@@ -1,15 +1,24 @@
 import uuid
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Iterable, Sequence
 
 from langchain.embeddings.base import Embeddings
 from langchain.schema import Document
-from models.vectordatabase.custom.custom_pgvector import PGVector, DistanceStrategy, EmbeddingStore
+from models.vectordatabase.custom.custom_pgvector import (
+    PGVector,
+    DistanceStrategy,
+    DEFAULT_QUERY_COLUMNS,
+    SEARCH_MODE_HYBRID,
+    get_engine,
+    dispose_engines,
+)
 from loguru import logger
 
 from config.base_config import *
 from framework.business_except import BusinessException
 from models.embeddings.es_model_adapter import EmbeddingsModelAdapter
 from models.vectordatabase.base_vector_client import BaseVectorClient
+from models.vectordatabase.search_cache import get_search_cache
+from models.vectordatabase.vector_mirror import get_vector_mirror
 
 
 class VectorPostgresClient(BaseVectorClient):
@@ -34,6 +43,12 @@ class VectorPostgresClient(BaseVectorClient):
         )
         return CONNECTION_STRING
 
+    def init_client(self) -> None:
+        get_engine(self.__get_db_conn())
+
+    def close_client(self) -> None:
+        dispose_engines()
+
     def delete_data(
             self,
             namespace: str = None,
@@ -45,36 +60,60 @@ class VectorPostgresClient(BaseVectorClient):
         embeddingsModelAdapter = EmbeddingsModelAdapter()
         embedding = embeddingsModelAdapter.get_model_instance()
 
-        if delete_all:
-            PGVector.from_existing_index(
-                embedding=embedding,
-                collection_name=namespace,
-                connection_string=self.__get_db_conn(),
-                distance_strategy=DistanceStrategy.COSINE,
-                pre_delete_collection=False
-            ).delete_collection()
-        else:
-            PGVector.from_existing_index(
-                embedding=embedding,
-                collection_name=namespace,
-                connection_string=self.__get_db_conn(),
-                distance_strategy=DistanceStrategy.COSINE,
-                pre_delete_collection=False
-            ).delete_embeddings(ids=ids)
-        pass
+        try:
+            if delete_all:
+                deleted = PGVector.from_existing_index(
+                    embedding=embedding,
+                    collection_name=namespace,
+                    connection_string=self.__get_db_conn(),
+                    distance_strategy=DistanceStrategy.COSINE,
+                    pre_delete_collection=False
+                ).delete_collection()
+            else:
+                deleted = PGVector.from_existing_index(
+                    embedding=embedding,
+                    collection_name=namespace,
+                    connection_string=self.__get_db_conn(),
+                    distance_strategy=DistanceStrategy.COSINE,
+                    pre_delete_collection=False
+                ).delete_embeddings(ids=ids)
+        finally:
+            self.__invalidate_search_cache(namespace)
+        vector_mirror = get_vector_mirror()
+        if vector_mirror:
+            vector_mirror.on_delete(namespace=namespace, ids=ids, delete_all=delete_all)
+        logger.info("######VectorPostgresClient delete_data INFO, namespace={}, delete_all={}, deleted={}.",
+                    namespace, delete_all, deleted)
+        return {"deleted": deleted}
 
     def query_data(
             self,
             namespace: str = None,
-            ids: list[str] = None
-    ) -> List[EmbeddingStore]:
-        return PGVector.from_existing_index(
-                embedding=EmbeddingsModelAdapter().get_model_instance(),
-                collection_name=namespace,
-                connection_string=self.__get_db_conn(),
-                distance_strategy=DistanceStrategy.COSINE,
-                pre_delete_collection=False
-        ).query_embeddings(ids=ids)
+            ids: list[str] = None,
+            columns: Sequence[str] = None,
+            limit: int = None,
+            after: str = None,
+            stream: bool = False,
+    ) -> Iterable[Any]:
+        return self.__get_store(namespace=namespace).query_embeddings(
+            ids=ids,
+            columns=columns or DEFAULT_QUERY_COLUMNS,
+            limit=limit,
+            after=after,
+            stream=stream,
+        )
+
+    def count_data(
+            self,
+            namespace: str
+    ) -> int:
+        return self.__get_store(namespace=namespace).count_embeddings()
+
+    def fingerprint_data(
+            self,
+            namespace: str
+    ) -> str:
+        return self.__get_store(namespace=namespace).fingerprint_embeddings()
 
     def insert_data(
             self,
@@ -83,32 +122,156 @@ class VectorPostgresClient(BaseVectorClient):
             namespace: str
     ) -> list[str]:
         ids = [str(uuid.uuid4()).replace("-", "") for n in range(0, len(split_docs))]
-        PGVector.from_documents(
-            documents=split_docs,
-            embedding=embedding,
-            collection_name=namespace,
-            connection_string=self.__get_db_conn(),
-            distance_strategy=DistanceStrategy.COSINE,
-            pre_delete_collection=False,
-            ids=ids
-        )
+        try:
+            PGVector.from_documents(
+                documents=split_docs,
+                embedding=embedding,
+                collection_name=namespace,
+                connection_string=self.__get_db_conn(),
+                distance_strategy=DistanceStrategy.COSINE,
+                pre_delete_collection=False,
+                ids=ids
+            )
+        finally:
+            self.__invalidate_search_cache(namespace)
+        vector_mirror = get_vector_mirror()
+        if vector_mirror:
+            vector_mirror.on_insert(namespace=namespace, ids=ids, client=self)
         return ids
 
+    def insert_vectors(
+            self,
+            namespace: str,
+            ids: List[str],
+            documents: List[str],
+            metadatas: List[dict],
+            vectors: Any,
+    ) -> int:
+        try:
+            inserted = self.__get_store(namespace=namespace).bulk_add_embeddings(
+                texts=documents,
+                embeddings=vectors,
+                metadatas=metadatas,
+                ids=ids,
+            )
+        finally:
+            self.__invalidate_search_cache(namespace)
+        vector_mirror = get_vector_mirror()
+        if vector_mirror:
+            vector_mirror.on_insert(namespace=namespace, ids=ids, client=self)
+        return inserted
+
     def search_data(
             self,
             ques: str,
             embedding: Embeddings,
             namespace: str,
-            search_top_k: int
+            search_top_k: int,
+            **kwargs
     ) -> List[Tuple[Document, float]]:
-        store = PGVector.from_existing_index(
-            embedding=embedding,
+        store = self.__get_store(namespace=namespace, embedding=embedding)
+        options = dict(
+            query=ques,
+            k=search_top_k,
+            filter=kwargs.get("filter"),
+            ef_search=kwargs.get("ef_search") or max(PGVECTOR_HNSW_EF_SEARCH,
+                                                     search_top_k * PGVECTOR_HNSW_EF_SEARCH_FACTOR),
+            probes=kwargs.get("probes") or PGVECTOR_IVFFLAT_PROBES,
+            max_distance=kwargs.get("max_distance"),
+            exact_match_first=kwargs.get("exact_match_first", False),
+        )
+        if kwargs.get("search_mode") == SEARCH_MODE_HYBRID:
+            return store.hybrid_search_with_score(**options)
+        return store.similarity_search_with_score(
+            fetch_k=kwargs.get("fetch_k"),
+            mmr_lambda=kwargs.get("mmr_lambda"),
+            **options
+        )
+
+    def search_data_batch(
+            self,
+            queries: Sequence[str],
+            embedding: Embeddings,
+            namespaces: Sequence[str],
+            search_top_k: int,
+            **kwargs
+    ) -> Dict[str, List[List[Tuple[Document, float]]]]:
+        queries = list(queries)
+        namespaces = list(dict.fromkeys(namespaces))
+        if not queries or not namespaces:
+            return {namespace: [[] for _ in queries] for namespace in namespaces}
+        vectors = embedding.embed_documents(queries)
+        if len(vectors) != len(queries):
+            raise ValueError(f"问题向量化结果数量不一致, queries={len(queries)}, vectors={len(vectors)}")
+        stores = [self.__get_store(namespace=namespace, embedding=embedding) for namespace in namespaces]
+        results = stores[0].similarity_search_batch_with_score_by_vector(
+            embeddings=vectors,
+            k=search_top_k,
+            collection_uuids=[store.get_collection_uuid() for store in stores],
+            filter=kwargs.get("filter"),
+            ef_search=kwargs.get("ef_search") or max(PGVECTOR_HNSW_EF_SEARCH,
+                                                     search_top_k * PGVECTOR_HNSW_EF_SEARCH_FACTOR),
+            probes=kwargs.get("probes") or PGVECTOR_IVFFLAT_PROBES,
+        )
+        logger.info("######VectorPostgresClient search_data_batch INFO, namespaces={}, queries={}, search_top_k={}.",
+                    namespaces, len(queries), search_top_k)
+        return dict(zip(namespaces, results))
+
+    def clone_data(
+            self,
+            source_namespace: str,
+            target_namespace: str
+    ) -> Dict[str, str]:
+        try:
+            return self.__get_store(namespace=source_namespace).clone_collection(target_name=target_namespace)
+        finally:
+            self.__invalidate_search_cache(target_namespace)
+
+    def create_index(
+            self,
+            namespace: str,
+            index_type: str = None,
+            **kwargs
+    ) -> str:
+        return self.__get_store(namespace=namespace).create_index(index_type=index_type or PGVECTOR_INDEX_TYPE, **kwargs)
+
+    def rebuild_index(
+            self,
+            namespace: str
+    ) -> List[str]:
+        return self.__get_store(namespace=namespace).rebuild_index()
+
+    def drop_index(
+            self,
+            namespace: str,
+            index_type: str = None
+    ) -> List[str]:
+        return self.__get_store(namespace=namespace).drop_index(index_type=index_type)
+
+    def get_index_status(
+            self,
+            namespace: str
+    ) -> List[Dict[str, Any]]:
+        return self.__get_store(namespace=namespace).get_index_status()
+
+    def __get_store(
+            self,
+            namespace: str,
+            embedding: Embeddings = None
+    ) -> PGVector:
+        return PGVector.from_existing_index(
+            embedding=embedding or EmbeddingsModelAdapter().get_model_instance(),
             collection_name=namespace,
             connection_string=self.__get_db_conn(),
             distance_strategy=DistanceStrategy.COSINE,
             pre_delete_collection=False
         )
-        return store.similarity_search_with_score(query=ques, k=search_top_k)
+
+    @staticmethod
+    def __invalidate_search_cache(namespace: str) -> None:
+        search_cache = get_search_cache()
+        if search_cache:
+            search_cache.invalidate(namespace)
 
     def get_vector_database_type(self) -> str:
         return 'Postgres'
@@ -79,10 +79,15 @@ class ChatPrivateDomain(BaseChatMessage):
             history = chatHistoryDomain.find_last_by_id(user_id=user_id, bot_id=bot_id, limit_size=memory_limit_size)
 
         # 知识库-语义搜索
+        search_config = chatBotModel.get_search_config()
         ques_docs = LocalRepositoryDomain(request_id=self.request_id).search(
             ques=ques,
             namespace=namespace,
-            vector_search_top_k=chatBotModel.vector_top_k
+            vector_search_top_k=chatBotModel.vector_top_k,
+            search_mode=search_config["search_mode"],
+            in_memory=namespaceModel.is_prepare_type(),
+            mmr_lambda=search_config["mmr_lambda"],
+            mmr_fetch_factor=search_config["mmr_fetch_factor"],
         )
 
         if AMWAY_CUS_ENABLED and len(ques_docs) == 0:
@@ -170,13 +175,16 @@ class ChatPrivateDomain(BaseChatMessage):
         :param llm: 大模型对象
         :return: 问答结果
         """
-        llm = llm if llm else LLMsAdapter().get_model_instance(history=ChainModel.init_memory(history=history)[1])
+        llm = llm if llm else LLMsAdapter().get_model_instance()
+        # 历史聊天记录随每次调用传入大模型, 不写入共享的大模型实例
+        llm_history = ChainModel.init_memory(history=history)[1]
         if split_chunk_type == "stuff":
             chain = ChainModel.get_instance_with_stuff(
                 prompt=prompt,
                 str_prompt_variables=prompt_variables,
                 history=history,
                 llm=llm,
+                llm_history=llm_history,
                 **kwargs
             )
             input_documents = [doc for doc, _ in ques_docs]
@@ -189,7 +197,8 @@ class ChatPrivateDomain(BaseChatMessage):
                 prefix_prompt=prefix_prompt,
                 str_prompt_variables=prompt_variables,
                 str_prefix_prompt_variables=prefix_prompt_variables,
-                llm=llm
+                llm=llm,
+                llm_history=llm_history,
             )
             input_documents = [doc for doc, _ in ques_docs]
             answer = chain.run(input_documents=input_documents, question=ques)
@@ -282,6 +282,62 @@ class NamespaceDomain:
         finally:
             conn.close()
 
+    def create(
+            self,
+            namespace: str,
+            name: str,
+            remark: str,
+            chunk_size: int,
+            chunk_overlap: int,
+            type: int,
+            user_id: str,
+            files: List[NamespaceFileModel] = None,
+    ) -> int:
+        """
+        创建知识库信息及所属文件信息(同一事务)
+        :param namespace: 知识库空间
+        :param name: 知识库名称
+        :param remark: 备注信息
+        :param chunk_size: Chunk长度
+        :param chunk_overlap: Chunk字符重叠值
+        :param type: 知识库类型
+        :param user_id: 专属用户
+        :param files: 所属文件信息, namespace_id以新建的知识库为准
+        :return: 自增长序号, 失败时为0
+        """
+        conn = get_db_conn()
+        try:
+            with conn.cursor() as cursor:
+                current_time = datetime.now()
+                sql = f"insert into {self.table_name} " \
+                      f"(deleted, creator, create_time, updator, update_time, version, " \
+                      f"namespace, name, remark, chunk_size, chunk_overlap, type, user_id) " \
+                      f"values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);"
+                cursor.execute(sql, ('0', 'system', current_time, 'system', current_time, '0',
+                                     namespace, name, remark, chunk_size, chunk_overlap, type, user_id))
+                namespace_id = cursor.lastrowid
+                if files:
+                    sql = f"insert into {NamespaceFileDomain.table_name} " \
+                          f"(deleted, creator, create_time, updator, update_time, version, " \
+                          f"namespace_id, name, display_name, path, type, size, remark, vector_ids, " \
+                          f"vector_status, vector_count, channel, md5) " \
+                          f"values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);"
+                    cursor.executemany(sql, [
+                        ('0', 'system', current_time, 'system', current_time, '0',
+                         namespace_id, f.name, f.display_name, f.path, f.type, f.size, f.remark, f.vector_ids,
+                         f.vector_status, f.vector_count, f.channel, f.md5)
+                        for f in files
+                    ])
+                conn.commit()
+                logger.info("Request_id={}, [{}]保存成功! files={}", self.request_id, self.table_name, len(files or []))
+                return namespace_id
+        except Exception as e:
+            conn.rollback()
+            logger.error("Request_id={}, [{}]数据库操作异常, Message={}", self.request_id, self.table_name, e)
+            return 0
+        finally:
+            conn.close()
+
 
 class NamespaceFileDomain:
     """
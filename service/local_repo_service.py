@@ -1,15 +1,38 @@
 # -*- coding: utf-8 -*-
+import os
 import uuid
+from datetime import datetime
+from types import SimpleNamespace
 from typing import List, Tuple
 from loguru import logger
 from langchain.document_loaders import DirectoryLoader, PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.docstore.document import Document
 from config.base_config import *
-from framework.business_code import ERROR_10208
+from framework.business_code import (
+    ERROR_10001,
+    ERROR_10208,
+    ERROR_10211,
+    ERROR_10212,
+    ERROR_10213,
+    ERROR_10214,
+    ERROR_10215,
+)
 from framework.business_except import BusinessException
 from models.embeddings.es_model_adapter import EmbeddingsModelAdapter
+from models.embeddings.embedding_cache import CachedEmbeddings
+from models.embeddings.embedding_dedup import DedupEmbeddings, get_embedding_dedup_store
 from models.vectordatabase.v_client import get_instance_client
+from models.vectordatabase.custom.custom_pgvector import SEARCH_MODE_HYBRID
+from models.vectordatabase.search_cache import get_search_cache
+from models.vectordatabase.vector_mirror import get_vector_mirror
+from models.vectordatabase.namespace_snapshot import (
+    SNAPSHOT_FORMAT_PARQUET,
+    export_namespace,
+    import_namespace,
+    read_snapshot_metadata,
+)
+from service.local_entity_service import NamespaceDomain, NamespaceFileDomain
 
 
 class LocalRepositoryDomain:
@@ -30,6 +53,8 @@ class LocalRepositoryDomain:
         :param request_id: 请求唯一标识
         """
         self.request_id = request_id
+        # 最近一次推送的向量化去重统计
+        self.dedup_stats = None
 
     def push(self,
              glob: str,
@@ -72,10 +97,156 @@ class LocalRepositoryDomain:
         embeddingsModelAdapter = EmbeddingsModelAdapter()
         embedding = embeddingsModelAdapter.get_model_instance()
         vector_client = get_instance_client()
+        # 相同内容的Chunk复用已有向量, 仅未命中的Chunk请求向量化服务
+        dedup_store = get_embedding_dedup_store() if vector_client.get_vector_database_type() == 'Postgres' else None
+        if dedup_store:
+            # 去重存储与本地向量缓存均按 模型版本标识 + 文本sha256 存储, 以去重存储为准(跨实例共享、不淘汰),
+            # 不再经过本地向量缓存, 避免未命中的Chunk两次查询、两次写入
+            if isinstance(embedding, CachedEmbeddings):
+                embedding = embedding.embedding
+            embedding = DedupEmbeddings(
+                embedding=embedding,
+                store=dedup_store,
+                model=embeddingsModelAdapter.get_model_version()
+            )
         ids = vector_client.insert_data(split_docs=split_docs, embedding=embedding, namespace=namespace)
         print(f"####切割后的文件ids有：", ids)
+        if dedup_store:
+            self.dedup_stats = dict(embedding.stats, file=glob)
+            logger.info("####向量化去重统计，request_id={}, namespace={}, stats={}",
+                        self.request_id, namespace, self.dedup_stats)
         return ids
 
+    def clone(
+            self,
+            namespace_id: str,
+            namespace: str = None,
+            name: str = None,
+            user_id: str = None,
+    ) -> int:
+        """
+        复制知识库: 向量数据在向量库内直接复制(不重新解析、切割及向量化), 并复制所属文件信息
+        向量库与知识库信息分属不同数据库, 知识库信息保存失败时删除已复制的向量数据
+        :param namespace_id: 源知识库标识
+        :param namespace: 新知识库空间, 为空时按源知识库空间生成
+        :param name: 新知识库名称, 为空时按源知识库名称生成
+        :param user_id: 新知识库专属用户, 为空时与源知识库一致
+        :return: 新知识库标识
+        """
+        namespaceModel = NamespaceDomain(request_id=self.request_id).find_by_id(namespace_id=namespace_id)
+        if not namespaceModel:
+            raise BusinessException(ERROR_10001.code, ERROR_10001.message)
+        namespace = namespace or f"{namespaceModel.namespace}_{uuid.uuid4().hex[:8]}"
+        files = NamespaceFileDomain(request_id=self.request_id).find_by_condition(namespace_id=namespace_id) or []
+
+        vector_client = get_instance_client()
+        try:
+            id_map = vector_client.clone_data(source_namespace=namespaceModel.namespace, target_namespace=namespace)
+        except Exception as err:
+            logger.error("LocalRepositoryDomain clone ERROR, request_id={}, namespace={}, target={}, err={}",
+                         self.request_id, namespaceModel.namespace, namespace, err)
+            raise BusinessException(ERROR_10211.code, ERROR_10211.message)
+        # 文件的向量标识替换为复制后的标识
+        for file in files:
+            if file.vector_ids:
+                file.vector_ids = ','.join(id_map[i] for i in str(file.vector_ids).split(',') if i in id_map)
+
+        new_namespace_id = NamespaceDomain(request_id=self.request_id).create(
+            namespace=namespace,
+            name=name or f"{namespaceModel.name}-副本",
+            remark=namespaceModel.remark,
+            chunk_size=namespaceModel.chunk_size,
+            chunk_overlap=namespaceModel.chunk_overlap,
+            type=namespaceModel.type,
+            user_id=user_id or namespaceModel.user_id,
+            files=files,
+        )
+        if not new_namespace_id:
+            vector_client.delete_data(namespace=namespace, delete_all=True)
+            raise BusinessException(ERROR_10212.code, ERROR_10212.message)
+        logger.info("####复制知识库完成，request_id={}, namespace={}, target={}, namespace_id={}, 文件数量: {}, 向量数量: {}",
+                    self.request_id, namespaceModel.namespace, namespace, new_namespace_id, len(files), len(id_map))
+        return new_namespace_id
+
+    def export_snapshot(
+            self,
+            namespace_id: str,
+            file_format: str = SNAPSHOT_FORMAT_PARQUET,
+    ) -> dict:
+        """
+        导出知识库快照(向量、文档、元数据及知识库文件信息), 用于跨环境迁移及备份
+        :param namespace_id: 知识库标识
+        :param file_format: 快照格式: parquet[Parquet] arrow[Arrow IPC]
+        :return: file_name[快照文件名称] count[向量数量]
+        """
+        namespaceModel = NamespaceDomain(request_id=self.request_id).find_by_id(namespace_id=namespace_id)
+        if not namespaceModel:
+            raise BusinessException(ERROR_10001.code, ERROR_10001.message)
+        files = NamespaceFileDomain(request_id=self.request_id).find_by_condition(namespace_id=namespace_id) or []
+        file_name = f"{namespaceModel.namespace}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{file_format}"
+        count = export_namespace(
+            vector_client=get_instance_client(),
+            namespace=namespaceModel.namespace,
+            path=os.path.join(VECTOR_SNAPSHOT_PATH, file_name),
+            namespace_info=vars(namespaceModel),
+            files=[vars(file) for file in files],
+        )
+        logger.info("####导出知识库快照完成，request_id={}, namespace={}, file_name={}, 文件数量: {}, 向量数量: {}",
+                    self.request_id, namespaceModel.namespace, file_name, len(files), count)
+        return {"file_name": file_name, "count": count}
+
+    def import_snapshot(
+            self,
+            file_name: str,
+            namespace: str = None,
+            name: str = None,
+    ) -> int:
+        """
+        导入知识库快照: 向量按原标识批量写入(不重新向量化)
+        目标知识库信息已存在时仅恢复向量数据, 否则按快照创建知识库及文件信息, 保存失败时删除已导入的向量数据
+        :param file_name: 快照文件名称(位于VECTOR_SNAPSHOT_PATH目录)
+        :param namespace: 目标知识库空间, 为空时与快照一致
+        :param name: 目标知识库名称, 为空时与快照一致
+        :return: 知识库标识
+        """
+        path = os.path.join(VECTOR_SNAPSHOT_PATH, os.path.basename(file_name))
+        if not os.path.isfile(path):
+            raise BusinessException(ERROR_10213.code, ERROR_10213.message)
+        snapshot = read_snapshot_metadata(path)
+        namespace = namespace or snapshot["namespace"]
+        vector_client = get_instance_client()
+        if vector_client.count_data(namespace=namespace):
+            raise BusinessException(ERROR_10214.code, ERROR_10214.message)
+        try:
+            count = import_namespace(vector_client=vector_client, namespace=namespace, path=path)
+        except Exception as err:
+            logger.error("LocalRepositoryDomain import_snapshot ERROR, request_id={}, path={}, namespace={}, err={}",
+                         self.request_id, path, namespace, err)
+            vector_client.delete_data(namespace=namespace, delete_all=True)
+            raise BusinessException(ERROR_10215.code, ERROR_10215.message)
+
+        existing = NamespaceDomain(request_id=self.request_id).find_all(namespace=namespace)
+        if existing:
+            namespace_id = existing[0].id
+        else:
+            info = snapshot["namespace_info"]
+            namespace_id = NamespaceDomain(request_id=self.request_id).create(
+                namespace=namespace,
+                name=name or info.get("name"),
+                remark=info.get("remark"),
+                chunk_size=info.get("chunk_size"),
+                chunk_overlap=info.get("chunk_overlap"),
+                type=info.get("type"),
+                user_id=info.get("user_id"),
+                files=[SimpleNamespace(**file) for file in snapshot["files"]],
+            )
+            if not namespace_id:
+                vector_client.delete_data(namespace=namespace, delete_all=True)
+                raise BusinessException(ERROR_10212.code, ERROR_10212.message)
+        logger.info("####导入知识库快照完成，request_id={}, file_name={}, namespace={}, namespace_id={}, 向量数量: {}",
+                    self.request_id, file_name, namespace, namespace_id, count)
+        return namespace_id
+
     def loader(
             self,
             glob: str,
@@ -106,40 +277,70 @@ class LocalRepositoryDomain:
             ques: str,
             namespace: str = None,
             vector_search_top_k: int = VECTOR_SEARCH_TOP_K,
+            search_mode: str = VECTOR_SEARCH_MODE,
+            in_memory: bool = False,
+            mmr_lambda: float = VECTOR_SEARCH_MMR_LAMBDA,
+            mmr_fetch_factor: int = VECTOR_SEARCH_MMR_FETCH_FACTOR,
     ) -> List[Tuple[Document, float]]:
         """
         本地知识库-语义搜索
         :param ques: 问题信息
         :param namespace: 向量库标识
         :param vector_search_top_k: 匹配数量
+        :param search_mode: 搜索模式: vector[向量检索] hybrid[向量+关键词混合检索]
+        :param in_memory: 是否使用内存镜像检索(适用于数据量小的预设问答类知识库, 需开启VECTOR_MIRROR_ENABLED)
+        :param mmr_lambda: MMR重排的相关性权重, 为空时不重排
+        :param mmr_fetch_factor: MMR重排的候选数量(匹配数量的倍数)
         :return: 向量库文档列表
         """
+        # 相同知识库、模型、问题及参数的检索结果优先从缓存获取
+        search_cache = get_search_cache()
+        cache_key = None
+        if search_cache:
+            cache_key = search_cache.make_key(
+                namespace=namespace,
+                model=f"{VECTOR_EMBEDDINGS_MODEL}:{VECTOR_EMBEDDINGS_MODEL_TYPE}",
+                ques=ques,
+                k=vector_search_top_k,
+                search_mode=search_mode,
+                max_distance=float(VECTOR_SEARCH_SCORE),
+                mmr_lambda=mmr_lambda,
+                mmr_fetch_factor=mmr_fetch_factor,
+            )
+            cached_docs = search_cache.get(cache_key)
+            if cached_docs is not None:
+                logger.info("####检索结果缓存命中，request_id={}, \n>>>文档数量: {} \n>>>用户问题: {}",
+                            self.request_id, len(cached_docs), ques)
+                return cached_docs
+
         embedding = EmbeddingsModelAdapter().get_model_instance()
         vector_client = get_instance_client()
-        ques_docs = vector_client.search_data(
-            ques=ques,
-            embedding=embedding,
-            namespace=namespace,
-            search_top_k=vector_search_top_k
-        )
-        logger.info("####向量库查询结果，request_id={}, \n>>>匹配数: {} \n>>>文档数量: {} \n>>>文档内容: {} \n>>>用户问题: {}",
-                    self.request_id, vector_search_top_k, len(ques_docs), ques_docs, ques)
-
-        new_ques_docs = [
-            (
-                _doc,
-                _score,
+        vector_mirror = get_vector_mirror() if in_memory and search_mode != SEARCH_MODE_HYBRID else None
+        mirror = vector_mirror.get(namespace=namespace, client=vector_client) if vector_mirror else None
+        if mirror is not None:
+            new_ques_docs = mirror.search(
+                embedding=embedding.embed_query(ques),
+                k=vector_search_top_k,
+                max_distance=float(VECTOR_SEARCH_SCORE),
+                exact_match_first=True,
+                fetch_k=vector_search_top_k * mmr_fetch_factor,
+                mmr_lambda=mmr_lambda,
             )
-            for _doc, _score in ques_docs if _score == float(0.0)
-        ]
-
-        new_ques_docs = new_ques_docs if len(new_ques_docs) > 0 else [
-            (
-                _doc,
-                _score,
+        else:
+            # 完全匹配优先、阈值过滤在向量库查询中完成
+            new_ques_docs = vector_client.search_data(
+                ques=ques,
+                embedding=embedding,
+                namespace=namespace,
+                search_top_k=vector_search_top_k,
+                max_distance=float(VECTOR_SEARCH_SCORE),
+                exact_match_first=True,
+                search_mode=search_mode,
+                fetch_k=vector_search_top_k * mmr_fetch_factor,
+                mmr_lambda=mmr_lambda,
             )
-            for _doc, _score in ques_docs if _score <= float(VECTOR_SEARCH_SCORE)
-        ]
         logger.info("####阈值控制筛选结果，request_id={}, \n>>>阈值: {}, \n>>>文档数量: {}, \n>>>文档内容: {} \n>>>用户问题: {}",
                     self.request_id, float(VECTOR_SEARCH_SCORE), len(new_ques_docs), new_ques_docs, ques)
+        if search_cache:
+            search_cache.put(cache_key, new_ques_docs)
         return new_ques_docs
@@ -193,7 +193,7 @@ class MeetingParams:
         """
         prompt_template = PromptTemplate(template=query_prompt, input_variables=["params_temp_str","params","sequence"])
         params_temp_str = cls.params_template(controlType=controlType)
-        llm = LLMsAdapter().get_model_instance(history=None)
+        llm = LLMsAdapter().get_model_instance()
         chain = LLMChain(
             llm=llm,
             prompt=prompt_template,
@@ -307,7 +307,7 @@ class MeetingParams:
         :return controlType (int) 请求类型编号
         """
         prompt_template = PromptTemplate(template=control_prompt, input_variables=["sequence"])
-        llm = LLMsAdapter().get_model_instance(history=None)
+        llm = LLMsAdapter().get_model_instance()
         chain = LLMChain(
             llm=llm,
             prompt=prompt_template,
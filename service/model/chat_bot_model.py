@@ -1,3 +1,11 @@
+from config.base_config import (
+    VECTOR_SEARCH_MODE,
+    VECTOR_SEARCH_BOT_CONFIG,
+    VECTOR_SEARCH_MMR_LAMBDA,
+    VECTOR_SEARCH_MMR_FETCH_FACTOR,
+)
+
+
 class ChatBotModel:
     """
     机器人实体模型
@@ -123,3 +131,15 @@ class ChatBotModel:
         """
         return self.use_type == self.CONSTANTS_PRIVATE_BOT
 
+    def get_search_config(self) -> dict:
+        """
+        获取机器人的语义搜索配置, 按机器人标识覆盖默认配置
+        :return: 搜索配置: search_mode[检索模式] mmr_lambda[MMR相关性权重] mmr_fetch_factor[MMR候选倍数]
+        """
+        return {
+            "search_mode": VECTOR_SEARCH_MODE,
+            "mmr_lambda": VECTOR_SEARCH_MMR_LAMBDA,
+            "mmr_fetch_factor": VECTOR_SEARCH_MMR_FETCH_FACTOR,
+            **VECTOR_SEARCH_BOT_CONFIG.get(self.bot_id, {}),
+        }
+